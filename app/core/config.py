@@ -38,11 +38,60 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    WEB_CONCURRENCY: int = 1  # uvicorn/gunicorn worker processes, read by uvicorn too
     DEBUG: bool = True
 
     # Optional: Advanced
     CORS_ORIGINS: Optional[str] = None
+    OPERATOR_EMAILS: Optional[str] = None  # comma-separated accounts allowed to read the /stats endpoints
     MAX_UPLOAD_SIZE: int = 10  # MB
+    IMAGE_CACHE_MAX_AGE: int = 60 * 60 * 24 * 365  # seconds, images are immutable
+    IMAGE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # in-process image cache budget
+    IMAGE_CACHE_MAX_ITEM_BYTES: int = 32 * 1024 * 1024  # larger images are streamed
+    IMAGE_DISK_CACHE_DIR: Optional[str] = None  # unset disables the disk tier
+    IMAGE_DISK_CACHE_MAX_BYTES: int = 4 * 1024 * 1024 * 1024
+
+    # Background image processing
+    IMAGE_WORKER_PROCESSES: int = 0  # per web worker; 0 = CPU cores / WEB_CONCURRENCY
+    IMAGE_JOB_MAX_ATTEMPTS: int = 3
+    IMAGE_JOB_LEASE_SECONDS: int = 600
+    IMAGE_JOB_POLL_SECONDS: float = 5.0
+    PANORAMA_TILES_ENABLED: bool = False  # also split uploads into cubemap tiles
+
+    # Password hashing (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # beyond this logins get HTTP 429
+
+    # Authentication caches (0 disables)
+    AUTH_TOKEN_CACHE_TTL: int = 300  # seconds a verified token is trusted, capped by its exp
+    AUTH_USER_CACHE_TTL: int = 30  # seconds a resolved user document is reused
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # Scene graph index (per space, in memory)
+    SCENE_GRAPH_MAX_SPACES: int = 1000
+    SCENE_GRAPH_TTL: int = 600  # seconds before a space's graph is reloaded
+
+    # Neighbor scene prefetch (0 disables)
+    SCENE_PREFETCH_MAX_LINKS: int = 8
+
+    # POI viewport culling
+    POI_INDEX_MAX_SCENES: int = 500  # scenes whose POI index stays in memory
+    POI_INDEX_TTL: int = 600
+    POI_PAGE_MAX: int = 500  # most POIs one API response returns
+    POI_LOD_NEAR: float = 6.0  # full detail within this distance
+    POI_LOD_FAR: float = 15.0  # labels within this distance, markers beyond
+    SCENE_POI_INLINE_MAX: int = 200  # POIs rendered into the scene page, the rest load on demand
+
+    # Cross-worker cache invalidation: auto | change_stream | poll | off
+    CACHE_INVALIDATION: str = "auto"  # auto falls back to polling without a replica set
+    CACHE_INVALIDATION_POLL_SECONDS: float = 2.0
+    CACHE_INVALIDATION_POLL_LAG: float = 5.0  # clock skew allowed between workers
+
+    # Templates
+    TEMPLATE_BYTECODE_CACHE: bool = True  # keep compiled templates on disk across restarts
+    TEMPLATE_BYTECODE_CACHE_DIR: Optional[str] = None  # unset uses a per-user dir under the system temp dir
+    TEMPLATE_FRAGMENT_CACHE_MAX_ENTRIES: int = 2000  # rendered {% cache %} blocks (0 disables)
+    TEMPLATE_FRAGMENT_CACHE_TTL: int = 3600
     LOG_LEVEL: str = "INFO"
 
     model_config = SettingsConfigDict(
@@ -59,6 +108,12 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
         return []
 
+    def get_operator_emails(self) -> set:
+        """운영 통계를 볼 수 있는 계정 이메일 집합"""
+        if self.OPERATOR_EMAILS:
+            return {email.strip() for email in self.OPERATOR_EMAILS.split(",") if email.strip()}
+        return set()
+
 
 # 전역 설정 인스턴스
 settings = Settings()
@@ -0,0 +1,167 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class _Abandoned(Exception):
+    """The request running a shared load was cancelled before it finished."""
+
+
+class ByteLRUCache:
+    """LRU cache bounded by the total byte size of its values.
+
+    Concurrent misses for the same key share a single load (single-flight),
+    so a burst of viewers entering the same scene triggers one GridFS read.
+    If the request running the load goes away, its waiters start over
+    instead of failing with it.
+
+    Values can also be filled by a caller that streams them in: begin_fill
+    reserves the bytes, end_fill caches the finished value. Fills in flight
+    together hold at most max_item_bytes, so copies being assembled stay
+    bounded alongside the cached ones.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_item_bytes: Optional[int] = None,
+        size_of: Callable[[Any], int] = len,
+    ):
+        self.max_bytes = max(int(max_bytes), 0)
+        self.max_item_bytes = min(max_item_bytes or self.max_bytes, self.max_bytes)
+        self._size_of = size_of
+        self._entries: "OrderedDict[Hashable, tuple[Any, int]]" = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._filling: dict[Hashable, int] = {}
+        self.current_bytes = 0
+        self.filling_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def accepts(self, size: int) -> bool:
+        return 0 < size <= self.max_item_bytes
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    async def lookup(self, key: Hashable) -> Any:
+        """Return a cached value, waiting on an in-flight load if there is one."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except _Abandoned:
+                return None
+        return None
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        size = self._size_of(value)
+        if not self.accepts(size):
+            self.rejected += 1
+            return False
+        self.discard(key)
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+        return True
+
+    def begin_fill(self, key: Hashable, size: int) -> bool:
+        """Claim key for a caller streaming in a size-byte value; False when
+        it is cached, already being filled, or over the fill budget."""
+        if key in self._entries or key in self._filling or key in self._inflight:
+            return False
+        if not self.accepts(size) or self.filling_bytes + size > self.max_item_bytes:
+            return False
+        self._filling[key] = size
+        self.filling_bytes += size
+        return True
+
+    def end_fill(self, key: Hashable, value: Any = None) -> None:
+        """Release a fill, caching value unless it is None (the fill failed)."""
+        self.filling_bytes -= self._filling.pop(key, 0)
+        if value is not None:
+            self.put(key, value)
+
+    def discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                # shield: cancelling this waiter leaves the shared load alone
+                return await asyncio.shield(future)
+            except _Abandoned:
+                continue
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # only this caller went away; the waiters retry the load
+            future.set_exception(_Abandoned())
+            future.exception()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # mark as retrieved so an unwaited failure is not logged twice
+            future.exception()
+            raise
+        else:
+            if value is not None:
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "max_item_bytes": self.max_item_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+            "inflight": len(self._inflight),
+            "filling": len(self._filling),
+            "filling_bytes": self.filling_bytes,
+        }
@@ -0,0 +1,158 @@
+import io
+import math
+from typing import NamedTuple
+
+import numpy as np
+from PIL import Image
+
+
+CUBE_FACES = ("px", "nx", "py", "ny", "pz", "nz")
+TILE_SIZE = 512
+MAX_LEVELS = 4
+JPEG_QUALITY = 85
+
+# (center, right, up) for each face as seen from inside the cube. The
+# client builds each face plane from the same basis (see cubemap-tiles.js).
+FACE_BASIS = {
+    "px": ((1, 0, 0), (0, 0, 1), (0, 1, 0)),
+    "nx": ((-1, 0, 0), (0, 0, -1), (0, 1, 0)),
+    "py": ((0, 1, 0), (1, 0, 0), (0, 0, 1)),
+    "ny": ((0, -1, 0), (1, 0, 0), (0, 0, -1)),
+    "pz": ((0, 0, 1), (-1, 0, 0), (0, 1, 0)),
+    "nz": ((0, 0, -1), (1, 0, 0), (0, 1, 0)),
+}
+
+
+class Tile(NamedTuple):
+    level: int
+    face: str
+    x: int
+    y: int
+    content: bytes
+    content_type: str = "image/jpeg"
+
+
+def tile_levels(width: int, tile_size: int = TILE_SIZE, max_levels: int = MAX_LEVELS) -> int:
+    """Number of zoom levels worth generating for an equirect ``width``.
+
+    Level ``k`` has faces of ``tile_size * 2**k`` pixels; a face spans 90
+    degrees, so the source holds about ``width / 4`` pixels per face.
+    """
+    native = max(width // 4, 1)
+    levels = 1
+    while levels < max_levels and tile_size * 2 ** levels <= native:
+        levels += 1
+    return levels
+
+
+def face_directions(face: str, size: int) -> np.ndarray:
+    """Unit view directions for every pixel of a face, shape (size, size, 3)."""
+    center, right, up = (np.array(v, dtype=np.float32) for v in FACE_BASIS[face])
+    steps = (np.arange(size, dtype=np.float32) + 0.5) / size * 2 - 1
+    a = steps[np.newaxis, :, np.newaxis]   # left -> right
+    b = -steps[:, np.newaxis, np.newaxis]  # top -> bottom
+    directions = center + a * right + b * up
+    return directions / np.linalg.norm(directions, axis=2, keepdims=True)
+
+
+def equirect_to_face(pixels: np.ndarray, face: str, size: int) -> np.ndarray:
+    """Resample an equirectangular image (H, W, 3) onto one cube face.
+
+    Uses the same longitude convention as A-Frame's ``<a-sky>`` so a
+    tiled scene faces the same way as the equirect one.
+    """
+    height, width = pixels.shape[:2]
+    directions = face_directions(face, size)
+    x, y, z = directions[..., 0], directions[..., 1], directions[..., 2]
+
+    u = (np.arctan2(z, x) / (2 * math.pi)) % 1.0
+    v = np.arccos(np.clip(y, -1.0, 1.0)) / math.pi
+
+    fx = u * width - 0.5
+    fy = np.clip(v * height - 0.5, 0, height - 1)
+    x0 = np.floor(fx).astype(np.int64)
+    y0 = np.floor(fy).astype(np.int64)
+    wx = (fx - x0).astype(np.float32)[..., np.newaxis]
+    wy = (fy - y0).astype(np.float32)[..., np.newaxis]
+    x0 %= width
+    x1 = (x0 + 1) % width  # longitude wraps around
+    y1 = np.minimum(y0 + 1, height - 1)
+
+    # gather from the uint8 source and widen only the samples: a float copy
+    # of a whole 8K panorama would be ~400 MB per face
+    def sample(rows, columns):
+        return pixels[rows, columns].astype(np.float32)
+
+    top = sample(y0, x0) * (1 - wx) + sample(y0, x1) * wx
+    bottom = sample(y1, x0) * (1 - wx) + sample(y1, x1) * wx
+    return np.clip(top * (1 - wy) + bottom * wy, 0, 255).astype(np.uint8)
+
+
+def _encode_jpeg(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def build_cubemap_tiles(data: bytes, tile_size: int = TILE_SIZE, max_levels: int = MAX_LEVELS) -> tuple[int, list[Tile]]:
+    """Split an equirect panorama into cube faces tiled at several levels.
+
+    Returns ``(levels, tiles)``. Each face is resampled once at the top
+    level and downscaled for the others. CPU bound, run off the loop.
+    Raises ValueError when the data cannot be decoded.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source.load()
+            image = source.convert("RGB")
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"unreadable panorama: {exc}") from exc
+
+    levels = tile_levels(image.width, tile_size, max_levels)
+    top_size = tile_size * 2 ** (levels - 1)
+    pixels = np.asarray(image)
+
+    tiles = []
+    for face in CUBE_FACES:
+        full = Image.fromarray(equirect_to_face(pixels, face, top_size))
+        for level in range(levels):
+            count = 2 ** level
+            face_image = full if count * tile_size == top_size else full.resize(
+                (count * tile_size, count * tile_size), Image.Resampling.LANCZOS
+            )
+            for ty in range(count):
+                for tx in range(count):
+                    box = (tx * tile_size, ty * tile_size, (tx + 1) * tile_size, (ty + 1) * tile_size)
+                    tiles.append(Tile(level, face, tx, ty, _encode_jpeg(face_image.crop(box))))
+    return levels, tiles
+
+
+def tile_center(face: str, level: int, x: int, y: int) -> np.ndarray:
+    """Unit direction of a tile's center."""
+    center, right, up = (np.array(v, dtype=np.float64) for v in FACE_BASIS[face])
+    count = 2 ** level
+    a = (x + 0.5) / count * 2 - 1
+    b = 1 - (y + 0.5) / count * 2
+    direction = center + a * right + b * up
+    return direction / np.linalg.norm(direction)
+
+
+def tiles_in_view(forward, fov_degrees: float, level: int) -> list[tuple[str, int, int]]:
+    """Tiles of ``level`` a client looking along ``forward`` needs.
+
+    Mirrors the selection rule in cubemap-tiles.js: a tile is wanted when
+    its center lies within half the field of view plus the tile's own
+    angular radius.
+    """
+    forward = np.asarray(forward, dtype=np.float64)
+    forward = forward / np.linalg.norm(forward)
+    count = 2 ** level
+    tile_radius = math.radians(90 / count) * 0.75
+    threshold = math.cos(min(math.pi, math.radians(fov_degrees) / 2 + tile_radius))
+    return [
+        (face, x, y)
+        for face in CUBE_FACES
+        for y in range(count)
+        for x in range(count)
+        if float(np.dot(tile_center(face, level, x, y), forward)) >= threshold
+    ]
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Hashable, NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+
+class DiskEntry(NamedTuple):
+    path: Path
+    size: int
+    content_type: str
+    upload_date: datetime
+
+
+class DiskImageCache:
+    """Content-addressed on-disk image cache with an LRU size cap.
+
+    Layout under ``root``::
+
+        blobs/<sha256[:2]>/<sha256>   image bytes, shared by identical uploads
+        index/<image_id>.json         image id -> digest, content type, upload date
+        tmp/                          in-progress writes, renamed into place
+
+    Every file is written to ``tmp/`` and moved with ``os.replace``, so a
+    crash never leaves a truncated blob or index entry behind. Blob mtimes
+    are bumped on every hit and act as the LRU clock, which also keeps
+    eviction consistent between several workers sharing one directory.
+
+    Lookups, commits and evictions run on threadpool threads; ``_lock``
+    guards the counters they share.
+    """
+
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.blob_dir = self.root / "blobs"
+        self.index_dir = self.root / "index"
+        self.tmp_dir = self.root / "tmp"
+        for directory in (self.blob_dir, self.index_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sweep_partials()
+        self.current_bytes = self._scan_bytes()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest
+
+    def _index_path(self, key) -> Path:
+        return self.index_dir / f"{key}.json"
+
+    def _scan_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.blob_dir.glob("*/*"))
+
+    def sweep_partials(self, max_age: float = 3600) -> int:
+        """Remove leftovers of writes interrupted by a crash.
+
+        Only files older than ``max_age`` seconds are removed so that writes
+        still in progress in another worker are left alone.
+        """
+        removed = 0
+        cutoff = time.time() - max_age
+        for path in self.tmp_dir.iterdir():
+            try:
+                if path.stat().st_mtime <= cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def get(self, key) -> Optional[DiskEntry]:
+        """``lookup`` off the event loop: it reads the index and touches the blob."""
+        return await run_in_threadpool(self.lookup, key)
+
+    def lookup(self, key) -> Optional[DiskEntry]:
+        index_path = self._index_path(key)
+        try:
+            meta = json.loads(index_path.read_text())
+            path = self._blob_path(meta["digest"])
+            os.utime(path)
+        except FileNotFoundError:
+            # blob evicted underneath the index entry
+            index_path.unlink(missing_ok=True)
+            self._count_miss()
+            return None
+        except (ValueError, KeyError):
+            index_path.unlink(missing_ok=True)
+            self._count_miss()
+            return None
+        with self._lock:
+            self.hits += 1
+        return DiskEntry(
+            path, meta["size"], meta["content_type"], datetime.fromisoformat(meta["upload_date"])
+        )
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    async def store(
+        self,
+        key,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        upload_date: datetime,
+    ) -> DiskEntry:
+        """Write ``chunks`` once per key; concurrent callers share the write."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await self._write(key, chunks, content_type, upload_date)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        else:
+            future.set_result(entry)
+            return entry
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _write(self, key, chunks, content_type, upload_date) -> DiskEntry:
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+        digest = hashlib.sha256()
+        size = 0
+        handle = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                await run_in_threadpool(handle.write, chunk)
+            await run_in_threadpool(_flush_and_sync, handle)
+        except BaseException:
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        handle.close()
+
+        meta = {
+            "digest": digest.hexdigest(),
+            "size": size,
+            "content_type": content_type,
+            "upload_date": upload_date.isoformat(),
+        }
+        return await run_in_threadpool(self._commit, key, tmp_path, meta)
+
+    def _commit(self, key, tmp_path: Path, meta: dict) -> DiskEntry:
+        blob_path = self._blob_path(meta["digest"])
+        if blob_path.exists():
+            # identical content already stored under another image id
+            tmp_path.unlink(missing_ok=True)
+            os.utime(blob_path)
+        else:
+            blob_path.parent.mkdir(exist_ok=True)
+            os.replace(tmp_path, blob_path)
+            with self._lock:
+                self.current_bytes += meta["size"]
+
+        index_tmp = self.tmp_dir / f"{uuid.uuid4().hex}.json"
+        index_tmp.write_text(json.dumps(meta))
+        os.replace(index_tmp, self._index_path(key))
+
+        if self.current_bytes > self.max_bytes:
+            self.evict(keep=blob_path)
+        return DiskEntry(
+            blob_path, meta["size"], meta["content_type"], datetime.fromisoformat(meta["upload_date"])
+        )
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Delete least recently used blobs until the cache fits its budget."""
+        with self._lock:
+            return self._evict(keep)
+
+    def _evict(self, keep: Optional[Path]) -> int:
+        blobs = []
+        for path in self.blob_dir.glob("*/*"):
+            try:
+                stat_result = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat_result.st_mtime, stat_result.st_size, path))
+        total = sum(size for _, size, _ in blobs)
+
+        removed = 0
+        for _, size, path in sorted(blobs, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self.evictions += removed
+        self.current_bytes = total
+        return removed
+
+    def purge(self) -> int:
+        """Drop every cached blob and index entry."""
+        removed = 0
+        with self._lock:
+            for path in list(self.index_dir.iterdir()) + list(self.blob_dir.glob("*/*")):
+                path.unlink(missing_ok=True)
+                removed += 1
+            self.sweep_partials(max_age=0)
+            self.current_bytes = 0
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "root": str(self.root),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
+
+
+def _flush_and_sync(handle) -> None:
+    handle.flush()
+    os.fsync(handle.fileno())
+
+
+async def iter_bytes(content: bytes) -> AsyncIterator[bytes]:
+    yield content
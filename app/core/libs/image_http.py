@@ -0,0 +1,164 @@
+import mimetypes
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import AsyncIterator, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+
+class ImageBlob(NamedTuple):
+    """A fully buffered image, as kept by the in-process image cache."""
+    content: bytes
+    content_type: str
+    upload_date: datetime
+
+
+def resolve_content_type(gridout) -> str:
+    """Pick the best content type for a GridFS file.
+
+    Older uploads stored the content type as the raw ``metadata`` value,
+    the seed script stores it as ``metadata.content_type``.
+    """
+    if gridout.content_type:
+        return gridout.content_type
+    metadata = gridout.metadata
+    if isinstance(metadata, str) and metadata:
+        return metadata
+    if isinstance(metadata, dict) and metadata.get("content_type"):
+        return metadata["content_type"]
+    guessed, _ = mimetypes.guess_type(gridout.filename or "")
+    return guessed or DEFAULT_CONTENT_TYPE
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Parse a single ``bytes=`` Range header into an inclusive (start, end).
+
+    Returns None when the whole entity should be sent (no header, another
+    unit, or a multi-range request). Raises 416 when the range cannot be
+    satisfied.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # suffix range: last N bytes
+            length = int(last)
+            if length <= 0:
+                raise _unsatisfiable(size)
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise _unsatisfiable(size)
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _unsatisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+
+async def iter_gridout(gridout, start: int, end: int) -> AsyncIterator[bytes]:
+    """Yield bytes ``start..end`` (inclusive) one GridFS chunk at a time."""
+    remaining = end - start + 1
+    gridout.seek(start)
+    while remaining > 0:
+        chunk = await gridout.readchunk()
+        if not chunk:
+            break
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        yield chunk
+
+
+def image_etag(image_id) -> str:
+    """Strong ETag for a stored image.
+
+    Images are never rewritten once uploaded, so the GridFS ObjectId
+    identifies the bytes and the ETag can be computed without a read.
+    """
+    return f'"{image_id}"'
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_not_modified(headers, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since (RFC 9110 precedence).
+
+    Pass ``last_modified=None`` to validate on the ETag alone.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    since = _parse_http_date(headers.get("if-modified-since"))
+    if since is None or last_modified is None:
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def range_applies(headers, etag: str, last_modified: datetime) -> bool:
+    """False when an If-Range validator no longer matches the entity."""
+    if_range = headers.get("if-range")
+    if not if_range:
+        return True
+    if if_range.strip().startswith(('"', "W/")):
+        return if_range.strip() == etag
+    since = _parse_http_date(if_range)
+    return since is not None and http_date(last_modified) == http_date(since)
+
+
+def cache_headers(etag: str, max_age: int, last_modified: Optional[datetime] = None,
+                  immutable: bool = True) -> dict:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}, immutable" if immutable else "private, no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
@@ -0,0 +1,75 @@
+import io
+from typing import NamedTuple, Optional, Sequence
+
+from PIL import Image, ImageFilter
+
+
+PYRAMID_WIDTHS = (1024, 2048, 4096, 8192)
+PLACEHOLDER_WIDTH = 64
+JPEG_QUALITY = 85
+
+
+class Derivative(NamedTuple):
+    kind: str  # "level" or "placeholder"
+    width: int
+    height: int
+    content: bytes
+    content_type: str = "image/jpeg"
+
+
+def _encode_jpeg(image: Image.Image, quality: int = JPEG_QUALITY) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _resized(image: Image.Image, width: int) -> Image.Image:
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def build_pyramid(data: bytes, widths: Sequence[int] = PYRAMID_WIDTHS) -> tuple[tuple[int, int], list[Derivative]]:
+    """Derive lower-resolution levels and a blurred placeholder from a panorama.
+
+    Only levels narrower than the source are produced; the source itself
+    stays the top level. Returns ``((width, height), derivatives)``.
+    This is CPU bound and must not run on the event loop. Raises
+    ValueError when the data cannot be decoded as an image.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source.load()
+            image = source.convert("RGB")
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"unreadable panorama: {exc}") from exc
+
+    derivatives = []
+    for width in sorted(set(widths)):
+        if width >= image.width:
+            break
+        level = _resized(image, width)
+        derivatives.append(Derivative("level", level.width, level.height, _encode_jpeg(level)))
+
+    placeholder = _resized(image, min(PLACEHOLDER_WIDTH, image.width))
+    placeholder = placeholder.filter(ImageFilter.GaussianBlur(radius=1.5))
+    derivatives.append(
+        Derivative("placeholder", placeholder.width, placeholder.height, _encode_jpeg(placeholder, quality=60))
+    )
+    return image.size, derivatives
+
+
+def choose_level(levels: Sequence[dict], width: int, placeholder: Optional[dict] = None) -> Optional[dict]:
+    """Pick the smallest level at least ``width`` wide, or the largest one.
+
+    ``levels`` are ``{"width": ..., "image_id": ...}`` dicts and should
+    include the original image as the top level.
+    """
+    if placeholder is not None and width <= placeholder["width"]:
+        return placeholder
+    if not levels:
+        return None
+    ordered = sorted(levels, key=lambda level: level["width"])
+    for level in ordered:
+        if level["width"] >= width:
+            return level
+    return ordered[-1]
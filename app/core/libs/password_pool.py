@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+from .utils import get_password_hash, verify_password
+
+logger = logging.getLogger("simulverse.auth")
+
+
+class PasswordPool(object):
+    '''
+    Bounded thread pool for bcrypt.
+
+    Hashing a password costs 100-300 ms of CPU; doing it on the event loop
+    stalls every other request on the worker. Calls run on a dedicated
+    executor (bcrypt releases the GIL) and at most ``max_pending`` may be
+    queued or running: beyond that callers get a 429 instead of piling up
+    behind a login storm.
+    '''
+
+    def __init__(self, workers: int = 4, max_pending: int = 64):
+        self.workers = max(workers, 1)
+        self.max_pending = max(max_pending, self.workers)
+        self.executor = None
+        self.pending = 0
+        self.peak = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self.executor
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning("password pool saturated (%d pending), rejecting", self.pending)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many sign-in attempts in progress, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        def timed():
+            started = time.perf_counter()
+            return started, fn(*args), time.perf_counter() - started
+
+        self.pending += 1
+        self.peak = max(self.peak, self.pending)
+        queued = time.perf_counter()
+        try:
+            started, result, elapsed = await asyncio.get_running_loop().run_in_executor(self._executor(), timed)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        self.wait_seconds += started - queued
+        self.run_seconds += elapsed
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def stats(self) -> dict:
+        completed = max(self.completed, 1)
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "running": min(self.pending, self.workers),
+            "queued": max(self.pending - self.workers, 0),
+            "peak": self.peak,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / completed * 1000, 2),
+            "avg_run_ms": round(self.run_seconds / completed * 1000, 2),
+        }
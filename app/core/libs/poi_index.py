@@ -0,0 +1,139 @@
+import math
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+
+SECTOR_DEGREES = 15
+
+# level of detail, least first: marker only, + title, + description/media
+LOD_MARKER = 0
+LOD_LABEL = 1
+LOD_FULL = 2
+
+
+class Direction(NamedTuple):
+    yaw: float
+    pitch: float
+    distance: float
+
+
+class VisiblePoi(NamedTuple):
+    poi: dict
+    direction: Direction
+    offset: float  # degrees from the middle of the view
+    lod: int
+
+
+def direction(position: Optional[dict]) -> Direction:
+    '''
+    Where a position appears from the camera at the origin, in A-Frame
+    camera terms: yaw 0 looks down -z and grows towards -x, pitch grows
+    upwards.
+    '''
+    values = []
+    for axis in ('x', 'y', 'z'):
+        try:
+            values.append(float((position or {}).get(axis) or 0))
+        except (TypeError, ValueError):
+            values.append(0.0)
+    x, y, z = values
+    horizontal = math.hypot(x, z)
+    return Direction(
+        math.degrees(math.atan2(-x, -z)),
+        math.degrees(math.atan2(y, horizontal)),
+        math.hypot(horizontal, y),
+    )
+
+
+def angle_between(yaw_a: float, pitch_a: float, yaw_b: float, pitch_b: float) -> float:
+    '''Great-circle angle in degrees between two view directions'''
+    pa, pb = math.radians(pitch_a), math.radians(pitch_b)
+    cosine = (math.sin(pa) * math.sin(pb)
+              + math.cos(pa) * math.cos(pb) * math.cos(math.radians(yaw_a - yaw_b)))
+    return math.degrees(math.acos(max(-1.0, min(1.0, cosine))))
+
+
+def yaw_half_width(half_fov: float, pitch: float) -> float:
+    '''Yaw covered either side of the view at pitch; meridians converge towards the poles'''
+    cosine = math.cos(math.radians(min(abs(pitch), 90.0)))
+    if cosine < 1e-6:
+        return 180.0
+    return min(180.0, half_fov / cosine)
+
+
+def level_of_detail(offset: float, distance: float, hfov: float, near: float, far: float) -> int:
+    '''Full detail close by and near the middle of the view, a label within far, a marker beyond'''
+    if distance <= near and offset <= hfov / 4:
+        return LOD_FULL
+    if distance <= far:
+        return LOD_LABEL
+    return LOD_MARKER
+
+
+class PoiIndex(object):
+    '''
+    POIs of one scene bucketed into yaw/pitch sectors, for viewport culling.
+
+    A window query visits only the sectors the window overlaps and then
+    checks each candidate exactly, so its cost follows the POIs in view
+    rather than the scene's total. Built from a scene's pois; version
+    and built_at are its scene view's, for cache validation.
+    '''
+
+    def __init__(self, pois: Iterable[dict], sector: float = SECTOR_DEGREES,
+                 version: int = 0, built_at: Optional[datetime] = None):
+        self.sector = sector
+        self.version = version
+        self.built_at = built_at
+        self.columns = int(math.ceil(360 / sector))
+        self.rows = int(math.ceil(180 / sector))
+        self.pois = list(pois)
+        self.directions = [direction(poi.get('position')) for poi in self.pois]
+        self.sectors: dict = {}
+        for position, heading in enumerate(self.directions):
+            self.sectors.setdefault(self._cell(heading.yaw, heading.pitch), []).append(position)
+
+    def __len__(self):
+        return len(self.pois)
+
+    def _column(self, yaw: float) -> int:
+        return int((yaw % 360) // self.sector) % self.columns
+
+    def _row(self, pitch: float) -> int:
+        return max(0, min(int((pitch + 90) // self.sector), self.rows - 1))
+
+    def _cell(self, yaw: float, pitch: float) -> tuple:
+        return self._column(yaw), self._row(pitch)
+
+    def _columns(self, yaw: float, half_width: float) -> Iterable[int]:
+        if half_width >= 180:
+            return range(self.columns)
+        steps = int(math.ceil(2 * half_width / self.sector)) + 1
+        start = yaw - half_width
+        columns = {self._column(start + step * self.sector) for step in range(steps)}
+        columns.add(self._column(yaw + half_width))
+        return columns
+
+    def query(self, yaw: float, pitch: float, hfov: float, vfov: float,
+              near: float = 6.0, far: float = 15.0) -> list[VisiblePoi]:
+        '''POIs inside the hfov x vfov window centred on yaw/pitch, middle of the view first'''
+        half_h, half_v = min(hfov, 360) / 2, min(vfov, 180) / 2
+        low, high = max(pitch - half_v, -90.0), min(pitch + half_v, 90.0)
+        # the window is widest in yaw at its most polar edge
+        columns = self._columns(yaw, yaw_half_width(half_h, max(abs(low), abs(high))))
+
+        visible = []
+        for row in range(self._row(low), self._row(high) + 1):
+            for column in columns:
+                for position in self.sectors.get((column, row), ()):
+                    heading = self.directions[position]
+                    if not low <= heading.pitch <= high:
+                        continue
+                    yaw_offset = abs((heading.yaw - yaw + 180) % 360 - 180)
+                    if yaw_offset > yaw_half_width(half_h, heading.pitch):
+                        continue
+                    offset = angle_between(yaw, pitch, heading.yaw, heading.pitch)
+                    lod = level_of_detail(offset, heading.distance, hfov, near, far)
+                    visible.append((offset, position, VisiblePoi(self.pois[position], heading, offset, lod)))
+        # ties go to the older POI so pages stay stable
+        visible.sort(key=lambda item: item[:2])
+        return [item[2] for item in visible]
@@ -0,0 +1,145 @@
+from collections import deque
+from typing import Hashable, Iterable, Optional
+
+
+class SceneGraph(object):
+    '''
+    Directed graph of the scenes in one space, an edge per link target.
+
+    Nodes are the space's scenes; edges to scenes outside the space (or
+    deleted ones) are kept but ignored by the queries. Maintained
+    incrementally by the write paths, see db_manager.get_scene_graph.
+    '''
+
+    def __init__(self, scenes: Iterable[Hashable] = (), links: Optional[dict] = None):
+        self.nodes: dict = {}
+        self.edges: dict = {}
+        for scene in scenes:
+            self.add_scene(scene)
+        for scene, targets in (links or {}).items():
+            self.set_links(scene, targets)
+
+    def add_scene(self, scene: Hashable, targets: Iterable[Hashable] = ()):
+        self.nodes[scene] = None
+        self.set_links(scene, targets)
+
+    def remove_scene(self, scene: Hashable):
+        self.nodes.pop(scene, None)
+        self.edges.pop(scene, None)
+        for targets in self.edges.values():
+            targets.pop(scene, None)
+
+    def set_links(self, scene: Hashable, targets: Iterable[Hashable]):
+        '''Replace a scene's outgoing links'''
+        # dict keeps link order and drops duplicate targets
+        self.edges[scene] = dict.fromkeys(targets)
+
+    def neighbors(self, scene: Hashable) -> list:
+        return [target for target in self.edges.get(scene, ()) if target in self.nodes and target != scene]
+
+    def incoming(self) -> dict:
+        counts = dict.fromkeys(self.nodes, 0)
+        for scene in self.nodes:
+            for target in self.neighbors(scene):
+                counts[target] += 1
+        return counts
+
+    def shortest_path(self, source: Hashable, target: Hashable) -> Optional[list]:
+        '''Fewest-links path from source to target (BFS), None when unreachable'''
+        if source not in self.nodes or target not in self.nodes:
+            return None
+        previous = {source: None}
+        queue = deque([source])
+        while queue:
+            scene = queue.popleft()
+            if scene == target:
+                path = []
+                while scene is not None:
+                    path.append(scene)
+                    scene = previous[scene]
+                return path[::-1]
+            for neighbor in self.neighbors(scene):
+                if neighbor not in previous:
+                    previous[neighbor] = scene
+                    queue.append(neighbor)
+        return None
+
+    def reachable(self, source: Hashable) -> set:
+        if source not in self.nodes:
+            return set()
+        seen = {source}
+        stack = [source]
+        while stack:
+            for neighbor in self.neighbors(stack.pop()):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+        return seen
+
+    def orphans(self) -> list:
+        '''Scenes no other scene links to'''
+        return [scene for scene, count in self.incoming().items() if count == 0]
+
+    def unreachable(self, start: Hashable) -> list:
+        '''Scenes a visitor entering at start can never navigate to'''
+        seen = self.reachable(start)
+        return [scene for scene in self.nodes if scene not in seen]
+
+    def dangling(self) -> dict:
+        '''Links pointing at scenes that are not part of the space'''
+        result = {}
+        for scene in self.nodes:
+            missing = [target for target in self.edges.get(scene, ()) if target not in self.nodes]
+            if missing:
+                result[scene] = missing
+        return result
+
+    def strongly_connected_components(self) -> list:
+        '''Tarjan's algorithm, iterative so deep link chains cannot hit the recursion limit'''
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+
+        for root in self.nodes:
+            if root in index:
+                continue
+            work = [(root, iter(self.neighbors(root)))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                scene, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.neighbors(child))))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        lowlink[scene] = min(lowlink[scene], index[child])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[scene])
+                if lowlink[scene] == index[scene]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == scene:
+                            break
+                    components.append(component)
+        return components
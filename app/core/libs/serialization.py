@@ -0,0 +1,38 @@
+from typing import Annotated, Any
+
+import orjson
+from bson.objectid import ObjectId
+from pydantic import BaseModel, PlainSerializer
+from starlette.responses import JSONResponse
+
+
+# ObjectId field whose JSON form (str) is compiled into the model's
+# serializer, so model_dump(mode="json") never falls back to Python code
+ObjectIdStr = Annotated[ObjectId, PlainSerializer(str, return_type=str, when_used="json")]
+
+
+def _default(value: Any):
+    """Types orjson does not know natively; datetimes and UUIDs it handles itself."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize documents straight from MongoDB (ObjectId, datetime, models) to JSON bytes."""
+    return orjson.dumps(content, default=_default)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response for Mongo documents and models.
+
+    Return it directly from a route so FastAPI skips jsonable_encoder;
+    naive datetimes render like jsonable_encoder does (no offset).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,69 @@
+from typing import Optional
+
+import jinja2
+from jinja2 import nodes
+from jinja2.ext import Extension
+from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+
+from .ttl_cache import TTLCache
+
+
+class FragmentCacheExtension(Extension):
+    '''
+    {% cache "name", key, version %}...{% endcache %}
+
+    Renders the block once per distinct key tuple and reuses the output
+    from environment.fragment_cache. Keys must be hashable and should end
+    with a version that changes whenever the block's data does; stale
+    keys are never hit again and age out of the cache. A None anywhere
+    in the key renders the block uncached.
+    '''
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        call = self.call_method("_render", [nodes.List(args)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, key: list, caller) -> str:
+        cache: Optional[TTLCache] = self.environment.fragment_cache
+        if cache is None or None in key:
+            return caller()
+        key = tuple(key)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = Markup(caller())
+            cache.put(key, fragment)
+        return fragment
+
+
+def create_templates(
+    directory,
+    fragment_cache: Optional[TTLCache] = None,
+    bytecode_cache_dir: Optional[str] = None,
+    bytecode_cache: bool = True,
+    auto_reload: bool = True,
+) -> Jinja2Templates:
+    '''
+    Jinja2Templates over one environment with compiled templates kept on
+    disk between restarts and the {% cache %} fragment tag.
+    '''
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(directory)),
+        autoescape=True,
+        auto_reload=auto_reload,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(bytecode_cache_dir) if bytecode_cache else None,
+        extensions=[FragmentCacheExtension],
+    )
+    env.fragment_cache = fragment_cache
+    return Jinja2Templates(env=env)
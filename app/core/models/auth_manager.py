@@ -1,25 +1,29 @@
 import os
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jwt import PyJWTError, encode, decode
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from .database import db_manager
+from .database import db_manager, password_pool
 from ..schemas.user_model import UserModel, UserInDB
 from ..schemas.token_model import Token, TokenData
-from ..libs.utils import verify_password
 from ..libs.oauth2_cookie import OAuth2PasswordBearerWithCookie
+from ..libs.ttl_cache import TTLCache
 from ..config import settings
 
 oauth2_scheme = OAuth2PasswordBearerWithCookie(tokenUrl="/token", auto_error=False)
 
+# token -> subject for tokens whose signature was already checked
+token_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_TOKEN_CACHE_TTL)
+
 class auth_manager(object):
     @classmethod
     async def authenticate_user(cls, userid: str, password: str):
         user = await db_manager.get_user_by_email(userid)
         if not user:
             return False
-        if not verify_password(password, user.hashed_password):
+        if not await password_pool.verify(password, user.hashed_password):
             return False
         return user
     
@@ -40,23 +44,36 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     detail="Could not validate credentials",
     headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        if not token:
-            return None
-        payload = decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if not token:
+        return None
+
+    userid = token_cache.get(token)
+    if userid is None:
+        try:
+            payload = decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except PyJWTError as exc:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-        userid: str = payload.get("sub")
+        userid = payload.get("sub")
         if userid is None:
             raise credentials_exception
-        token_data = TokenData(email=userid)
-    except PyJWTError as exc:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+        # never trust a cached token past its own expiry
+        expires = payload.get("exp")
+        token_cache.put(token, userid, ttl=expires - time.time() if expires else None)
+    token_data = TokenData(email=userid)
 
-    user = await db_manager.get_user_by_email(email=token_data.email)
+    user = await db_manager.get_cached_user(token_data.email)
     if user is None:
         raise credentials_exception
     return user
 
 
+async def get_operator(current_user: UserInDB | None = Depends(get_current_user)):
+    '''The current user if listed in OPERATOR_EMAILS; anyone else gets a 404 so the endpoint stays hidden'''
+    if current_user is None or current_user.email not in settings.get_operator_emails():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return current_user
+
+
 async def get_current_active_user(current_user: UserModel = Depends(get_current_user)):
     return {"current_user":"user"}
\ No newline at end of file
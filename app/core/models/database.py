@@ -1,18 +1,131 @@
+import logging
 import motor.motor_asyncio
+from datetime import datetime
+from typing import AsyncIterator
 
 from bson.objectid import ObjectId
+from gridfs.errors import NoFile
+from pymongo import DeleteMany, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from fastapi import Request
 
-from ..libs.utils import verify_password
-from ..libs.utils import get_password_hash
+from starlette.concurrency import run_in_threadpool
+
+from ..libs.byte_cache import ByteLRUCache
+from ..libs.disk_cache import DiskEntry, DiskImageCache, iter_bytes
+from ..libs.image_http import ImageBlob, iter_gridout, resolve_content_type
+from ..libs.panorama import choose_level
+from ..libs.password_pool import PasswordPool
+from ..libs.ttl_cache import TTLCache
+from ..libs.scene_graph import SceneGraph
+from ..libs.poi_index import PoiIndex
+from ..config import settings
 
 from ..schemas.user_model import UserRegisterForm, UserInDB
-from ..schemas.space_model import CreateSpaceForm, SpaceModel, CreateSceneForm, UpdateSceneForm
+from ..schemas.space_model import CreateSpaceForm, SpaceModel, SpaceSummary, CreateSceneForm, UpdateSceneForm
+
+logger = logging.getLogger("simulverse.database")
+
+image_cache = ByteLRUCache(
+    settings.IMAGE_CACHE_MAX_BYTES,
+    settings.IMAGE_CACHE_MAX_ITEM_BYTES,
+    size_of=lambda blob: len(blob.content),
+)
+
+disk_cache = None
+if settings.IMAGE_DISK_CACHE_DIR:
+    disk_cache = DiskImageCache(settings.IMAGE_DISK_CACHE_DIR, settings.IMAGE_DISK_CACHE_MAX_BYTES)
+
+def _link_targets(proc_links) -> list:
+    '''target scene ids of the link rows in a scene form'''
+    targets = []
+    for plink in proc_links:
+        target_id = plink[0].split(".")[0]
+        if target_id != "":
+            targets.append(ObjectId(target_id))
+    return targets
+
+
+def _bulk_summary(result) -> dict:
+    if result is None:
+        return {'matched': 0, 'modified': 0, 'inserted': 0, 'deleted': 0}
+    return {
+        'matched': result.matched_count,
+        'modified': result.modified_count,
+        'inserted': result.inserted_count,
+        'deleted': result.deleted_count,
+    }
+
+
+# space fields the pages show; roles and the scene map are projected on demand
+SPACE_HEADER_FIELDS = ('name', 'explain', 'creator', 'version', 'updated_at')
+# everything a scene page needs from the scene document; pois live in their own collection
+SCENE_HEADER_FIELDS = ('name', 'image_id', 'status', 'links', 'image_tiles', 'image_variants', 'version', 'updated_at')
+
+
+def _projection(fields) -> dict | None:
+    return None if fields is None else dict.fromkeys(fields, 1)
+
+
+def _poi_filter(scene_id: ObjectId, type: str | None = None, visible: bool | None = None) -> dict:
+    query = {'scene_id': scene_id}
+    if type is not None:
+        query['type'] = type
+    if visible is not None:
+        # POIs saved before the visible flag count as shown
+        query['visible'] = {'$ne': False} if visible else False
+    return query
+
+
+def space_fields(user_id=None, scenes: bool = False) -> tuple:
+    '''Projection for a space as seen by user_id: header fields, that user's role, optionally the scene map'''
+    fields = SPACE_HEADER_FIELDS
+    if user_id is not None:
+        # ObjectId() rejects anything but an id, so the path cannot be injected
+        fields += (f'viewers.{ObjectId(str(user_id))}',)
+    if scenes:
+        fields += ('scenes',)
+    return fields
+
+
+def _versioned(update: dict | None = None, now: datetime | None = None) -> dict:
+    '''
+    Add the change counter to an update document: version goes up by one
+    and updated_at is set in the same atomic write.
+    '''
+    update = dict(update or {})
+    update['$set'] = {**update.get('$set', {}), 'updated_at': now or datetime.utcnow()}
+    update['$inc'] = {**update.get('$inc', {}), 'version': 1}
+    return update
+
+
+password_pool = PasswordPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+# bump when the scene_views layout changes; older views are rebuilt on read
+SCENE_VIEW_SCHEMA = 5
+SCENE_VIEW_LINK_FIELDS = ('_id', 'target_id', 'target_name', 'x', 'y', 'z', 'yaw', 'pitch', 'roll',
+                          'target_image_id', 'target_placeholder_id', 'target_tiled', 'target_levels')
+
+# resolved users by token subject (email), see auth_manager.get_current_user
+user_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_USER_CACHE_TTL)
+
+# space id -> SceneGraph, patched in place by the scene write paths; the
+# TTL bounds staleness when several workers write to the same space
+scene_graphs = TTLCache(settings.SCENE_GRAPH_MAX_SPACES, settings.SCENE_GRAPH_TTL)
+
+# scene id -> PoiIndex over its visible POIs, checked against the view version on use
+poi_indexes = TTLCache(settings.POI_INDEX_MAX_SCENES, settings.POI_INDEX_TTL)
 
 
 class db_manager(object):
     client = None
     db = None
+    image_cache = image_cache
+    disk_cache = disk_cache
+    password_pool = password_pool
+    user_cache = user_cache
+    scene_graphs = scene_graphs
+    poi_indexes = poi_indexes
 
     @classmethod
     def init_manager(cls, _url, _dbname):
@@ -39,12 +152,32 @@ class db_manager(object):
         else:
             return None
 
+    @classmethod
+    async def get_cached_user(cls, email: str) -> UserInDB | None:
+        user = cls.user_cache.get(email)
+        if user is None:
+            user = await cls.get_user_by_email(email)
+            if user is not None:
+                cls.user_cache.put(email, user)
+        return user
+
+    @classmethod
+    def invalidate_users(cls, user_ids):
+        '''Drop cached users whose spaces map was just rewritten'''
+        user_ids = {str(user_id) for user_id in user_ids}
+        cls.user_cache.discard_where(lambda user: str(user.id) in user_ids)
+
+    @classmethod
+    async def get_users_by_ids(cls, user_ids: list[ObjectId]) -> dict[ObjectId, UserInDB]:
+        cursor = cls.get_collection("users").find({'_id': {'$in': list(user_ids)}})
+        return {document['_id']: UserInDB(**document) async for document in cursor}
+
     @classmethod
     async def authenticate_user(cls, userid: str, password: str):
         user = await cls.get_user_by_email(userid)
         if not user:
             return False
-        if not verify_password(password, user.hashed_password):
+        if not await cls.password_pool.verify(password, user.hashed_password):
             return False
         return user
 
@@ -54,59 +187,90 @@ class db_manager(object):
         if userdata:
             return False
         else:
-            data = {'userid':user.username, 'email':user.email, 'spaces':{}, 'hashed_password':get_password_hash(user.password)}
+            hashed_password = await cls.password_pool.hash(user.password)
+            data = {'userid':user.username, 'email':user.email, 'spaces':{}, 'hashed_password':hashed_password}
             await db_manager.get_collection('users').insert_one(data) 
             return True
 
+    @classmethod
+    async def resolve_viewers(cls, creator_id: ObjectId, space:CreateSpaceForm) -> dict:
+        '''
+        Invitees from the space form resolved with one $in query.
+        returns {user_id: role}; the creator is always an Editor, unknown emails are ignored.
+        '''
+        emails = space.form_data.get('username', [])
+        roles = space.form_data.get('role', [])
+        cursor = cls.get_collection('users').find({'email': {'$in': emails}}, {'email': 1})
+        user_ids = {document['email']: document['_id'] async for document in cursor}
+
+        viewers = {str(creator_id):'Editor'}
+        for email, role in zip(emails, roles):
+            user_id = user_ids.get(email)
+            if user_id and user_id != creator_id:
+                viewers[str(user_id)] = role
+        return viewers
+
+    @classmethod
+    async def write_memberships(cls, space_id: ObjectId, granted: dict, revoked=()):
+        '''Mirror space membership into users.spaces with one bulk_write'''
+        key = f'spaces.{str(space_id)}'
+        # updated_at lets other workers notice the change, see invalidation_manager
+        now = datetime.utcnow()
+        operations = [UpdateOne({'_id': ObjectId(user_id)}, {'$set': {key: role, 'updated_at': now}})
+                      for user_id, role in granted.items()]
+        operations += [UpdateOne({'_id': ObjectId(user_id)}, {'$unset': {key: ""}, '$set': {'updated_at': now}})
+                       for user_id in revoked]
+        if operations:
+            await cls.get_collection('users').bulk_write(operations, ordered=False)
+        cls.invalidate_users([*granted, *revoked])
+
     @classmethod
     async def create_space(cls, creator: str, space:CreateSpaceForm):
         userdata = await cls.get_user_by_email(creator)
-        viewers = {str(userdata.id):'Editor'}
-        for _id, role in zip(space.form_data['username'], space.form_data['role']):
-            view = await cls.get_user_by_email(_id)
-            if view :
-                if userdata.id != view.id:
-                    viewers[str(view.id)] = role
+        viewers = await cls.resolve_viewers(userdata.id, space)
 
         data = {'name':space.form_data['space_name'][0], 'explain': space.form_data['space_explain'][0], 
-                'creator': userdata.id, 'viewers':viewers, 'scenes':{}}
+                'creator': userdata.id, 'viewers':viewers, 'scenes':{},
+                'version': 1, 'updated_at': datetime.utcnow()}
         space_id = await db_manager.get_collection('spaces').insert_one(data) 
 
-        for viewer, val in viewers.items():
-            if creator != viewer:
-                await db_manager.get_collection('users').update_one({'_id':ObjectId(viewer)}, [{"$set": {'spaces': {str(space_id.inserted_id): val}}}]) 
-            else:
-                await db_manager.get_collection('users').update_one({'_id':ObjectId(viewer)}, [{"$set": {'spaces': {str(space_id.inserted_id): "Editor"}}}]) 
+        await cls.write_memberships(space_id.inserted_id, viewers)
 
     @classmethod
     async def update_space(cls, creator: UserInDB, space_id:ObjectId, space:CreateSpaceForm):
-        viewers = {str(creator.id):'Editor'}
-        
-        for _id, role in zip(space.form_data['username'], space.form_data['role']):
-            view = await cls.get_user_by_email(_id)
-            if view :
-                if str(creator.id) != str(view.id):
-                    viewers[str(view.id)] = role
-        
-        for _id, role in viewers.items():
-            await db_manager.get_collection('users').update_one({'_id':ObjectId(_id)}, [{"$set": {'spaces': {str(space_id): role}}}])
+        viewers = await cls.resolve_viewers(creator.id, space)
 
-        found_space = await db_manager.get_collection('spaces').find_one({'_id':space_id})
-        for viewer, val in found_space['viewers'].items():
-            if viewer not in viewers:
-                #print("1",viewer)
-                await db_manager.get_collection('users').update_one({'_id':ObjectId(viewer)}, {"$unset": {f'spaces.{str(space_id)}': ""}}) 
+        found_space = await db_manager.get_collection('spaces').find_one({'_id':space_id}, {'viewers': 1})
+        revoked = [viewer for viewer in (found_space.get('viewers') or {}) if viewer not in viewers]
+        await cls.write_memberships(space_id, viewers, revoked)
 
         data = {'name':space.form_data['space_name'][0], 'explain': space.form_data['space_explain'][0], 'viewers':viewers}
+        await db_manager.get_collection('spaces').update_one({'_id':space_id}, _versioned({'$set':data}))
+
+    @classmethod
+    async def delete_space(cls, space_id:ObjectId):
+        '''Delete a space, its scenes, and the membership entries of its viewers only'''
+        found_space = await cls.get_collection('spaces').find_one({'_id': space_id}, {'scenes': 1})
+        if not found_space:
+            return False
+        for scene_id in (found_space.get('scenes') or {}):
+            await cls.delete_scene(space_id, ObjectId(scene_id))
+
+        deleted = await cls.get_collection('spaces').find_one_and_delete({'_id': space_id}, {'viewers': 1})
+        viewers = list((deleted or {}).get('viewers') or {})
+        if viewers:
+            await cls.get_collection('users').update_many(
+                {'_id': {'$in': [ObjectId(viewer) for viewer in viewers]}},
+                {'$unset': {f"spaces.{str(space_id)}": ""}, '$set': {'updated_at': datetime.utcnow()}},
+            )
+        cls.invalidate_users(viewers)
+        cls.scene_graphs.discard(space_id)
+        return True
 
-        await db_manager.get_collection('spaces').update_one({'_id':space_id}, {"$unset": {f'viewers': ""}})
-        await db_manager.get_collection('spaces').update_one({'_id':space_id}, [{'$set':data}]) 
-    
     @classmethod
     async def create_scene(cls, form:CreateSceneForm, space_id:ObjectId ):
-        image_id = await cls.store_image(form.form_data['file'][0].filename, 
-                                        form.form_data['file'][0].content_type, 
-                                        form.form_data['file'][0].file )
+        upload = form.form_data['file'][0]
+        image_id = await cls.store_image(upload.filename, upload.content_type, upload.file)
         '''
         link: link_name, scene_id, x, y, z
         '''
@@ -121,69 +285,364 @@ class db_manager(object):
                 res = await db_manager.get_collection('links').insert_one(data)
                 check_list.append(res.inserted_id)
 
-        data = {'name':form.scene_name, 'image_id':image_id, 'links':check_list}
+        # derived image levels are built by job_manager; until then the
+        # scene renders the original upload
+        data = {'name':form.scene_name, 'image_id':image_id, 'links':check_list, 'status':'processing',
+                'version': 1, 'updated_at': datetime.utcnow()}
         scene_id = await db_manager.get_collection('scenes').insert_one(data)
-        await db_manager.get_collection('spaces').update_one({'_id':ObjectId(space_id)}, [{"$set": {'scenes': {str(scene_id.inserted_id): form.scene_name}}}]) 
+        await db_manager.get_collection('spaces').update_one(
+            {'_id':ObjectId(space_id)}, _versioned({'$set': {f'scenes.{scene_id.inserted_id}': form.scene_name}}))
+        await cls.rebuild_scene_view(scene_id.inserted_id)
+        cls.patch_scene_graph(space_id, lambda graph: graph.add_scene(scene_id.inserted_id, _link_targets(proc_links)))
+        return scene_id.inserted_id, image_id
 
     @classmethod
     async def create_link(cls, data:dict):
         link_id = await db_manager.get_collection('links').insert_one(data)
         return link_id
 
+    @classmethod
+    async def update_link_poses(cls, poses: dict):
+        '''
+        poses: {link_id: {x, y, z, yaw, pitch, roll}}
+        One unordered bulk_write for every link; returns a write summary.
+        '''
+        if not poses:
+            return _bulk_summary(None)
+        operations = [UpdateOne({'_id': link_id}, {'$set': data}) for link_id, data in poses.items()]
+        result = await cls.get_collection('links').bulk_write(operations, ordered=False)
+
+        scene_ids = [scene['_id'] async for scene in cls.get_collection('scenes').find({'links': {'$in': list(poses)}}, {'_id': 1})]
+        if scene_ids:
+            await cls.get_collection('scenes').update_many({'_id': {'$in': scene_ids}}, _versioned())
+        for scene_id in scene_ids:
+            await cls.rebuild_scene_view(scene_id)
+        return _bulk_summary(result)
+
     @classmethod
     async def add_scene_poi(cls, scene_id: ObjectId, poi_data: dict):
-        await cls.get_collection('scenes').update_one({'_id': scene_id}, {'$push': {'pois': poi_data}})
+        await cls.get_collection('pois').insert_one({**poi_data, 'scene_id': scene_id})
+        await cls.get_collection('scenes').update_one({'_id': scene_id}, _versioned())
+        await cls.rebuild_scene_view(scene_id)
         return poi_data.get('poi_id')
 
     @classmethod
     async def remove_scene_poi(cls, scene_id: ObjectId, poi_id: ObjectId):
-        await cls.get_collection('scenes').update_one({'_id': scene_id}, {'$pull': {'pois': {'poi_id': poi_id}}})
+        await cls.get_collection('pois').delete_one({'scene_id': scene_id, 'poi_id': poi_id})
+        # the $pull covers a scene whose embedded pois are not migrated yet
+        await cls.get_collection('scenes').update_one({'_id': scene_id}, _versioned({'$pull': {'pois': {'poi_id': poi_id}}}))
+        await cls.rebuild_scene_view(scene_id)
+
+    @classmethod
+    async def get_scene_pois(cls, scene_id: ObjectId, type: str | None = None, visible: bool | None = None,
+                             after: ObjectId | None = None, limit: int | None = None) -> list[dict]:
+        '''
+        POIs of a scene from the pois collection in poi_id (creation) order,
+        optionally only one type or visibility. Page by passing the last
+        poi_id seen as after; limit None returns all of them.
+        '''
+        query = _poi_filter(scene_id, type, visible)
+        if after is not None:
+            query['poi_id'] = {'$gt': after}
+        cursor = cls.get_collection('pois').find(query, {'_id': 0, 'scene_id': 0}).sort('poi_id', 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        return [poi async for poi in cursor]
+
+    @classmethod
+    async def count_scene_pois(cls, scene_id: ObjectId, type: str | None = None, visible: bool | None = None) -> int:
+        return await cls.get_collection('pois').count_documents(_poi_filter(scene_id, type, visible))
+
+    @classmethod
+    async def migrate_scene_pois(cls, scene_id: ObjectId, pois: list | None = None) -> int:
+        '''
+        Move POIs still embedded in a scene document into the pois
+        collection; pois is the embedded array when the caller already read
+        it. Safe to repeat and to run while the app serves: inserts never
+        overwrite a POI already moved, and only the moved ids are pulled,
+        so a POI pushed meanwhile by an older worker waits for the next
+        run. POIs without a poi_id are left in place. Returns how many moved.
+        '''
+        scenes = cls.get_collection('scenes')
+        if pois is None:
+            scene = await scenes.find_one({'_id': scene_id}, {'pois': 1})
+            pois = (scene or {}).get('pois') or []
+        pois = [poi for poi in pois if poi.get('poi_id') is not None]
+        if not pois:
+            return 0
+
+        operations = [
+            UpdateOne({'scene_id': scene_id, 'poi_id': poi['poi_id']}, {'$setOnInsert': poi}, upsert=True)
+            for poi in pois
+        ]
+        await cls.get_collection('pois').bulk_write(operations, ordered=False)
+        await scenes.update_one({'_id': scene_id}, {'$pull': {'pois': {'poi_id': {'$in': [poi['poi_id'] for poi in pois]}}}})
+        await scenes.update_one({'_id': scene_id, 'pois': {'$size': 0}}, {'$unset': {'pois': ''}})
+        return len(pois)
 
     @classmethod
     async def update_scene(cls, form:UpdateSceneForm, space_id:ObjectId, scene_id:ObjectId ):
         '''
         link: link_name, scene_id, x, y, z
+        All link writes go out as one unordered bulk_write: existing links are
+        updated, new ones inserted with ids assigned here, and links dropped
+        from the form deleted. The scene is then patched with one $pull/$in
+        and one $push/$each. returns a write summary.
         '''
-        # insert new link
-        # update prev_link
-
-        prev_scene = await db_manager.get_collection('scenes').find_one(scene_id)
+        prev_scene = await db_manager.get_collection('scenes').find_one(scene_id, {'links': 1})
         proc_links = list(zip(form.scene, form.x, form.y, form.z, form.yaw, form.pitch, form.roll))
-        #print(proc_links)
 
-        prev_links = prev_scene['links']
+        prev_links = list(prev_scene['links'])
 
-        check_list = []
+        operations = []
+        new_links = []
         for plink in proc_links:
             target_id, link_id = plink[0].split(".")
+            if target_id == "":
+                continue
 
+            data = {'x':plink[1], 'y':plink[2], 'z':plink[3],'target_id':ObjectId(target_id), 'yaw':plink[4], 'pitch':plink[5], 'roll':plink[6],}
             if link_id != "":
                 if ObjectId(link_id) in prev_links:
                     prev_links.remove(ObjectId(link_id))
-                data = {'x':plink[1], 'y':plink[2], 'z':plink[3],'target_id':ObjectId(target_id), 'yaw':plink[4], 'pitch':plink[5], 'roll':plink[6],}
-                #print(data)
-                await db_manager.get_collection('links').update_one({'_id':ObjectId(link_id)}, {'$set':data})
+                operations.append(UpdateOne({'_id':ObjectId(link_id)}, {'$set':data}))
             else:
-                if target_id != "":
-                    data = {'x':plink[1], 'y':plink[2], 'z':plink[3],'target_id':ObjectId(target_id), 'yaw':plink[4], 'pitch':plink[5], 'roll':plink[6],}
-                    res = await db_manager.get_collection('links').insert_one(data)
-                    await db_manager.get_collection('scenes').update_one({'_id':ObjectId(scene_id)}, {'$push':{'links':ObjectId(res.inserted_id)}})
+                data['_id'] = ObjectId()
+                operations.append(InsertOne(data))
+                new_links.append(data['_id'])
+
+        if prev_links:
+            operations.append(DeleteMany({'_id': {'$in': prev_links}}))
+
+        summary = {'links': _bulk_summary(None), 'removed': len(prev_links), 'added': len(new_links)}
+        if operations:
+            result = await db_manager.get_collection('links').bulk_write(operations, ordered=False)
+            summary['links'] = _bulk_summary(result)
+
+        scene_update = {'$set': {'name': form.scene_name}}
+        if prev_links:
+            scene_update['$pull'] = {'links': {'$in': prev_links}}
+        if new_links:
+            # $pull and $push on links cannot share one update
+            await db_manager.get_collection('scenes').update_one({'_id':scene_id}, scene_update)
+            scene_update = {'$push': {'links': {'$each': new_links}}}
+        # the version moves with the last write, so nobody caches a half-applied edit
+        await db_manager.get_collection('scenes').update_one({'_id':scene_id}, _versioned(scene_update))
+
+        await db_manager.get_collection('spaces').update_one(
+            {'_id':space_id}, _versioned({'$set': {f'scenes.{scene_id}': form.scene_name}}))
+        cls.patch_scene_graph(space_id, lambda graph: graph.set_links(scene_id, _link_targets(proc_links)))
+
+        await cls.rebuild_scene_view(scene_id)
+        # scenes linking here show its name
+        await cls.rebuild_referrer_views(scene_id)
+        return summary
 
-        for link in prev_links:
-            await db_manager.get_collection('scenes').update_one({'_id':ObjectId(scene_id)}, {'$pull':{'links':ObjectId(link)}})
-
-        data = {'name':form.scene_name, 'links':check_list}
-        #scene_id = await db_manager.get_collection('scenes').insert_one(data)
+    @classmethod
+    async def get_scene(cls, scene_id:ObjectId, fields=None):
+        '''
+        fields limits the returned keys (see SCENE_HEADER_FIELDS).
+        POIs are not part of the scene, see get_scene_pois.
+        '''
+        scene = await db_manager.get_collection('scenes').find_one({"_id":scene_id}, _projection(fields))
+        return scene
 
-        result = await db_manager.get_collection('spaces').update_one({'_id':space_id}, [{"$set": {'scenes': {str(scene_id): form.scene_name}}}]) 
+    @classmethod
+    async def get_scenes_by_ids(cls, scene_ids: list[ObjectId], fields=None) -> dict[ObjectId, dict]:
+        scenes = {}
+        cursor = cls.get_collection('scenes').find({"_id": {'$in': list(scene_ids)}}, _projection(fields))
+        async for scene in cursor:
+            scenes[scene['_id']] = scene
+        return scenes
 
     @classmethod
-    async def get_scene(cls, scene_id:ObjectId ):
-        scene = await db_manager.get_collection('scenes').find_one({"_id":scene_id})
-        if scene and 'pois' not in scene:
-            scene['pois'] = []
+    async def resolve_scene(cls, scene_id:ObjectId ):
+        '''
+        Scene with its links resolved in one round-trip.
+        links: link documents in scene order, each with target_name,
+        target_image_id, target_placeholder_id, target_tiled and
+        target_levels (the target's pyramid, None until it has one) added;
+        dangling link ids are dropped, missing targets give None.
+        pois is only present while the scene still embeds them.
+        Needs MongoDB 5.0+ ($lookup with localField and pipeline).
+        '''
+        pipeline = [
+            {'$match': {'_id': scene_id}},
+            {'$lookup': {'from': 'links', 'localField': 'links', 'foreignField': '_id', 'as': 'link_docs'}},
+            {'$lookup': {'from': 'scenes', 'localField': 'link_docs.target_id', 'foreignField': '_id',
+                         'pipeline': [{'$project': {'name': 1, 'image_id': 1, 'image_tiles.levels': 1,
+                                                    'image_variants.placeholder.image_id': 1,
+                                                    'image_variants.levels': 1}}],
+                         'as': 'link_targets'}},
+        ]
+        documents = await cls.get_collection('scenes').aggregate(pipeline).to_list(length=1)
+        if not documents:
+            return None
+
+        scene = documents[0]
+        link_docs = {link['_id']: link for link in scene.pop('link_docs')}
+        targets = {target['_id']: target for target in scene.pop('link_targets')}
+
+        links = []
+        for link_id in scene.get('links', []):
+            link = link_docs.get(link_id)
+            if link:
+                target = targets.get(link.get('target_id')) or {}
+                variants = target.get('image_variants') or {}
+                placeholder = variants.get('placeholder') or {}
+                link['target_name'] = target.get('name')
+                link['target_image_id'] = target.get('image_id')
+                link['target_placeholder_id'] = placeholder.get('image_id')
+                link['target_tiled'] = bool(target.get('image_tiles'))
+                link['target_levels'] = variants.get('levels')
+                links.append(link)
+        scene['links'] = links
         return scene
 
+    @classmethod
+    async def rebuild_scene_view(cls, scene_id:ObjectId ):
+        '''
+        Materialize everything a scene page renders into scene_views.
+        view: _id(scene id), name, image_id, status, placeholder_id, image_tiles,
+              links[{_id, target_id, target_name, x, y, z, yaw, pitch, roll,
+                     target_image_id, target_placeholder_id, target_tiled, target_levels}],
+              visible_pois, poi_count, scene_version, updated_at, schema, version, built_at
+        visible_pois holds at most SCENE_POI_INLINE_MAX POIs, those nearest
+        the opening view; poi_count is how many are visible in all, the rest
+        come from get_poi_index. The index built here is cached under the
+        new view version.
+        version counts rebuilds (it also moves when a linked scene is renamed),
+        scene_version/updated_at mirror the scene document.
+        Called by every write path that changes what a scene renders; POIs
+        still embedded in the scene are moved to the pois collection first.
+        A rebuild that read an older scene than the stored view is dropped
+        and the stored view returned.
+        '''
+        views = cls.get_collection('scene_views')
+        scene = await cls.resolve_scene(scene_id)
+        if scene is None:
+            await views.delete_one({'_id': scene_id})
+            return None
+        if scene.get('pois'):
+            await cls.migrate_scene_pois(scene_id, scene['pois'])
+
+        index = PoiIndex(await cls.get_scene_pois(scene_id, visible=True))
+        inline = index.pois
+        if len(inline) > settings.SCENE_POI_INLINE_MAX:
+            inline = [item.poi for item in index.query(0, 0, 360, 180)[:settings.SCENE_POI_INLINE_MAX]]
+
+        placeholder = (scene.get('image_variants') or {}).get('placeholder') or {}
+        view = {
+            'name': scene.get('name'),
+            'image_id': scene.get('image_id'),
+            'status': scene.get('status', 'ready'),
+            'placeholder_id': placeholder.get('image_id'),
+            'image_tiles': scene.get('image_tiles'),
+            'links': [{key: link.get(key) for key in SCENE_VIEW_LINK_FIELDS} for link in scene['links']],
+            'visible_pois': inline,
+            'poi_count': len(index),
+            'scene_version': scene.get('version', 0),
+            'updated_at': scene.get('updated_at'),
+            'schema': SCENE_VIEW_SCHEMA,
+            'built_at': datetime.utcnow(),
+        }
+        # overlapping rebuilds can finish out of order: one that read an older
+        # scene than the stored view misses the filter, and its upsert then
+        # hits the _id index instead of overwriting the newer view
+        fresh = {'$or': [{'scene_version': {'$lte': view['scene_version']}}, {'scene_version': {'$exists': False}}]}
+        try:
+            view = await views.find_one_and_update(
+                {'_id': scene_id, **fresh},
+                {'$set': view, '$inc': {'version': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return await views.find_one({'_id': scene_id})
+        index.version, index.built_at = view.get('version', 0), view.get('built_at')
+        cls.poi_indexes.put(scene_id, index)
+        return view
+
+    @classmethod
+    async def rebuild_referrer_views(cls, scene_id:ObjectId ):
+        '''Rebuild the views of scenes that link to scene_id (they show its name)'''
+        link_ids = [link['_id'] async for link in cls.get_collection('links').find({'target_id': scene_id}, {'_id': 1})]
+        if not link_ids:
+            return
+        async for scene in cls.get_collection('scenes').find({'links': {'$in': link_ids}}, {'_id': 1}):
+            await cls.rebuild_scene_view(scene['_id'])
+
+    @classmethod
+    async def get_scene_graph(cls, space_id:ObjectId ) -> SceneGraph | None:
+        '''
+        Link graph of a space: nodes are its scenes, edges link targets.
+        Loaded with three queries on a miss, then kept up to date in memory.
+        '''
+        graph = cls.scene_graphs.get(space_id)
+        if graph is not None:
+            return graph
+
+        space = await cls.get_collection('spaces').find_one({'_id': space_id}, {'scenes': 1})
+        if not space:
+            return None
+        scene_ids = [ObjectId(scene_id) for scene_id in (space.get('scenes') or {})]
+        scene_links = {scene['_id']: scene.get('links', [])
+                       async for scene in cls.get_collection('scenes').find({'_id': {'$in': scene_ids}}, {'links': 1})}
+        link_ids = [link_id for links in scene_links.values() for link_id in links]
+        targets = {link['_id']: link.get('target_id')
+                   async for link in cls.get_collection('links').find({'_id': {'$in': link_ids}}, {'target_id': 1})}
+
+        graph = SceneGraph(scene_ids, {
+            scene_id: [targets[link_id] for link_id in links if link_id in targets]
+            for scene_id, links in scene_links.items()
+        })
+        cls.scene_graphs.put(space_id, graph)
+        return graph
+
+    @classmethod
+    def patch_scene_graph(cls, space_id:ObjectId, change):
+        '''Apply an edit to a loaded graph; unloaded spaces are built fresh on next read'''
+        graph = cls.scene_graphs.peek(space_id)
+        if graph is not None:
+            change(graph)
+
+    @classmethod
+    async def get_scene_view(cls, scene_id:ObjectId ):
+        '''
+        Render document for a scene, one find_one on scene_views.
+        Views missing or built for an older layout are rebuilt on read.
+        '''
+        view = await cls.get_collection('scene_views').find_one({'_id': scene_id})
+        if view is None or view.get('schema') != SCENE_VIEW_SCHEMA:
+            view = await cls.rebuild_scene_view(scene_id)
+        return view
+
+    @classmethod
+    async def get_poi_index(cls, scene_id:ObjectId, view: dict | None = None) -> PoiIndex | None:
+        '''
+        Sector index over a scene's visible POIs. A cached index costs one
+        find_one for the view version (none when the caller has the view);
+        the POIs are only read from the pois collection again after the
+        view changed.
+        '''
+        head = view or await cls.get_collection('scene_views').find_one(
+            {'_id': scene_id}, {'version': 1, 'schema': 1, 'built_at': 1})
+        if not head or head.get('schema') != SCENE_VIEW_SCHEMA:
+            # the rebuild caches a fresh index
+            head = await cls.rebuild_scene_view(scene_id)
+            if not head:
+                cls.poi_indexes.discard(scene_id)
+                return None
+
+        cached = cls.poi_indexes.get(scene_id)
+        if cached is not None and cached.version == head.get('version', 0):
+            return cached
+        # read after the view head: a POI written in between only makes the index look older
+        index = PoiIndex(await cls.get_scene_pois(scene_id, visible=True),
+                         version=head.get('version', 0), built_at=head.get('built_at'))
+        cls.poi_indexes.put(scene_id, index)
+        return index
+
     @classmethod
     async def get_link(cls, link_id:ObjectId ):
         link = await db_manager.get_collection('links').find_one({"_id":link_id})
@@ -191,57 +650,349 @@ class db_manager(object):
     
     @classmethod
     async def get_scenes(cls, spaceid: ObjectId):
-        scenes = []
-        cursor = await cls.get_collection("spaces").find_one({"_id":spaceid})
-        for sceneid, scene_name in cursor["scenes"].items():
-            scenes.append((sceneid, scene_name))
-        
-        return scenes
+        return await cls.get_scenes_from_space(spaceid)
 
     @classmethod
-    async def get_spaces(cls, creator: UserInDB):
+    async def get_spaces(cls, creator: UserInDB, skip: int = 0, limit: int | None = None, sort: str | None = None):
+        '''
+        Spaces the user belongs to, fetched with a single $in query.
+        returns {space_id: [name, explain, role, version]}, in membership order unless
+        sort names a field (prefix '-' for descending). Deleted spaces and
+        memberships without a role are skipped.
+        '''
+        roles = {ObjectId(spaceid): role for spaceid, role in creator.spaces.items()
+                 if role and ObjectId.is_valid(spaceid)}
+
+        cursor = cls.get_collection("spaces").find({"_id": {"$in": list(roles)}}, {"name": 1, "explain": 1, "version": 1})
+        if sort is not None:
+            direction = -1 if sort.startswith('-') else 1
+            cursor = cursor.sort(sort.lstrip('-'), direction).skip(skip)
+            if limit is not None:
+                cursor = cursor.limit(limit)
+        documents = {document['_id']: document async for document in cursor}
+        if sort is None:
+            # membership order: page once deleted spaces are dropped, so pages stay full
+            order = [space_id for space_id in roles if space_id in documents]
+            order = order[skip:skip + limit if limit is not None else None]
+        else:
+            order = list(documents)
+
         spaces = {}
-        for spaceid, role in creator.spaces.items():
-            cursor = await cls.get_collection("spaces").find_one({"_id":ObjectId(spaceid)})
-            spaces[spaceid] = [cursor["name"], cursor['explain'], role]
+        for space_id in order:
+            document = documents[space_id]
+            spaces[str(space_id)] = [document.get("name"), document.get("explain"), roles[space_id],
+                                     document.get("version", 0)]
 
         return spaces
     
     @classmethod
-    async def get_scenes_from_space(cls, spaceid: ObjectId):
-        scenes = []
-        cursor = await cls.get_collection("spaces").find_one({"_id":spaceid})
-        for sceneid, scene_name in cursor["scenes"].items():
-            scenes.append((sceneid, scene_name))
-        
-        return scenes
+    async def get_scenes_from_space(cls, spaceid: ObjectId) -> list[tuple[str, str]]:
+        '''(scene id, name) pairs, only the scene map is fetched'''
+        document = await cls.get_collection("spaces").find_one({"_id":spaceid}, {"scenes": 1})
+        if not document:
+            return []
+        return list((document.get("scenes") or {}).items())
 
     @classmethod
-    async def get_space(cls, space_id: ObjectId):
-        cursor = await cls.get_collection("spaces").find_one({"_id":space_id})
-        if cursor:
-            return SpaceModel(**cursor)
-        else:
+    async def get_space(cls, space_id: ObjectId, fields=None) -> SpaceModel | SpaceSummary | None:
+        '''
+        Whole SpaceModel, or with fields (see space_fields) a SpaceSummary
+        holding only those.
+        '''
+        document = await cls.get_collection("spaces").find_one({"_id":space_id}, _projection(fields))
+        if not document:
             return None
+        return SpaceModel(**document) if fields is None else SpaceSummary.from_document(document)
 
     @classmethod
-    async def store_image(cls, filename:str, metadata, contents):
+    async def get_spaces_by_ids(cls, space_ids: list[ObjectId], fields=None) -> dict[ObjectId, SpaceModel | SpaceSummary]:
+        cursor = cls.get_collection("spaces").find({"_id": {'$in': list(space_ids)}}, _projection(fields))
+        build = SpaceModel.model_validate if fields is None else SpaceSummary.from_document
+        return {document['_id']: build(document) async for document in cursor}
+
+    @classmethod
+    async def store_image(cls, filename:str, content_type, contents, metadata:dict | None = None):
         fs = motor.motor_asyncio.AsyncIOMotorGridFSBucket(cls.db, bucket_name="images")
+        metadata = {'content_type': content_type, **(metadata or {})}
         return await fs.upload_from_stream(filename=filename, source=contents, metadata=metadata)
 
     @classmethod
-    async def download_file(cls, file_id):
-        """Returns iterator over AsyncIOMotorGridOut object"""
+    async def store_pyramid(cls, image_id:ObjectId, size:tuple, derivatives:list) -> dict:
+        '''
+        Stores derived levels and the blurred placeholder next to the original
+        and records them in the original's metadata.variants, replacing any
+        earlier run.
+        variants: width, height, levels[{width, image_id}], placeholder{width, image_id}
+        '''
+        levels = [{'width': size[0], 'image_id': image_id}]
+        placeholder = None
+        stored = []
+        for derivative in derivatives:
+            variant_id = await cls.store_image(
+                f"{image_id}_{derivative.kind}_{derivative.width}.jpg",
+                derivative.content_type,
+                derivative.content,
+                {'variant_of': image_id, 'kind': derivative.kind,
+                 'width': derivative.width, 'height': derivative.height},
+            )
+            stored.append(variant_id)
+            entry = {'width': derivative.width, 'image_id': variant_id}
+            if derivative.kind == 'placeholder':
+                placeholder = entry
+            else:
+                levels.append(entry)
+
+        variants = {'width': size[0], 'height': size[1],
+                    'levels': sorted(levels, key=lambda level: level['width']),
+                    'placeholder': placeholder}
+        files = cls.get_collection('images.files')
+        await files.update_one({'_id': image_id}, {'$set': {'metadata.variants': variants}})
+
+        # variants of a retried or repeated run; removed once nothing points at them
+        fs = motor.motor_asyncio.AsyncIOMotorGridFSBucket(cls.db, bucket_name="images")
+        async for stale in files.find({'metadata.variant_of': image_id, '_id': {'$nin': stored}}, {'_id': 1}):
+            await fs.delete(stale['_id'])
+        return variants
+
+    @classmethod
+    async def store_tiles(cls, image_id:ObjectId, levels:int, tiles:list, tile_size:int) -> dict:
+        '''
+        Stores cubemap tiles for an equirect image, replacing any earlier run.
+        tile metadata: tile_of, level, face, x, y
+        '''
+        files = cls.get_collection('images.files')
+        fs = motor.motor_asyncio.AsyncIOMotorGridFSBucket(cls.db, bucket_name="images")
+        async for stale in files.find({'metadata.tile_of': image_id}, {'_id': 1}):
+            await fs.delete(stale['_id'])
+
+        for tile in tiles:
+            await cls.store_image(
+                f"{image_id}_{tile.face}_{tile.level}_{tile.x}_{tile.y}.jpg",
+                tile.content_type,
+                tile.content,
+                {'tile_of': image_id, 'level': tile.level, 'face': tile.face, 'x': tile.x, 'y': tile.y},
+            )
+
+        info = {'levels': levels, 'tile_size': tile_size}
+        await files.update_one({'_id': image_id}, {'$set': {'metadata.tiles': info}})
+        return info
+
+    @classmethod
+    async def find_tile(cls, image_id:ObjectId, level:int, face:str, x:int, y:int) -> ObjectId | None:
+        document = await cls.get_collection('images.files').find_one(
+            {'metadata.tile_of': image_id, 'metadata.level': level, 'metadata.face': face,
+             'metadata.x': x, 'metadata.y': y},
+            {'_id': 1},
+        )
+        return document['_id'] if document else None
+
+    @classmethod
+    async def set_scene_tiles(cls, scene_id:ObjectId, tiles:dict):
+        await cls.get_collection('scenes').update_one({'_id': scene_id}, _versioned({'$set': {'image_tiles': tiles}}))
+        await cls.rebuild_scene_view(scene_id)
+        await cls.rebuild_referrer_views(scene_id)
+
+    @classmethod
+    async def mark_scene_ready(cls, scene_id:ObjectId, variants:dict | None):
+        data = {'status': 'ready'}
+        if variants:
+            data['image_variants'] = variants
+        await cls.get_collection('scenes').update_one({'_id': scene_id}, _versioned({'$set': data}))
+        await cls.rebuild_scene_view(scene_id)
+        # linking scenes prefetch this scene's placeholder
+        await cls.rebuild_referrer_views(scene_id)
+
+    @classmethod
+    async def resolve_image_variant(cls, image_id:ObjectId, width:int):
+        '''
+        Returns (image_id, settled) for the pyramid level closest to width.
+        settled is False while the image has no pyramid, so callers should not
+        let clients cache the answer for long.
+        '''
+        document = await cls.get_collection('images.files').find_one({'_id': image_id}, {'metadata.variants': 1})
+        metadata = (document or {}).get('metadata')
+        variants = metadata.get('variants') if isinstance(metadata, dict) else None
+        if not variants:
+            return image_id, False
+        level = choose_level(variants.get('levels', []), width, variants.get('placeholder'))
+        return (level['image_id'] if level else image_id), True
+
+    @classmethod
+    async def open_image(cls, file_id):
+        """Returns an AsyncIOMotorGridOut positioned at the start, or None"""
         fs = motor.motor_asyncio.AsyncIOMotorGridFSBucket(cls.db, bucket_name="images")
-        gridout = await fs.open_download_stream(file_id)
-        content = await gridout.read()
+        try:
+            return await fs.open_download_stream(file_id)
+        except NoFile:
+            return None
 
-        return (content, gridout.content_type)
+    @classmethod
+    async def image_exists(cls, file_id) -> bool:
+        """Whether the image is stored, asking the caches before GridFS"""
+        if file_id in cls.image_cache:
+            return True
+        if cls.disk_cache is not None and await cls.disk_cache.get(file_id) is not None:
+            return True
+        return await cls.open_image(file_id) is not None
+
+    @classmethod
+    async def download_file(cls, file_id, gridout=None) -> ImageBlob | None:
+        """Returns the whole image, served from the in-process cache when possible"""
+        return await cls.image_cache.get_or_load(file_id, lambda: cls._load_blob(file_id, gridout))
+
+    @classmethod
+    async def load_image(cls, file_id) -> ImageBlob | DiskEntry | motor.motor_asyncio.AsyncIOMotorGridOut | None:
+        """
+        Where an image response reads from, without reading GridFS: the
+        cached ImageBlob (waiting on a load already under way), else the disk
+        tier's copy, moved into memory when it fits, else an open GridOut to
+        send with stream_image; None when there is no such image.
+        """
+        blob = await cls.image_cache.lookup(file_id)
+        if blob is not None:
+            return blob
+        if cls.disk_cache is not None:
+            entry = await cls.disk_cache.get(file_id)
+            if entry is not None:
+                if not cls.image_cache.accepts(entry.size):
+                    return entry
+                blob = await cls.image_cache.get_or_load(file_id, lambda: cls._read_disk_entry(entry))
+                if blob is not None:
+                    return blob
+        return await cls.open_image(file_id)
+
+    @classmethod
+    async def stream_image(cls, file_id, gridout) -> AsyncIterator[bytes]:
+        """
+        Yield a whole GridFS image chunk by chunk. Unless another response is
+        already filling it (or it would not fit), the chunks are kept and the
+        image is cached once the last one is out; a response cut short
+        caches nothing.
+        """
+        if not cls.image_cache.begin_fill(file_id, gridout.length):
+            async for chunk in iter_gridout(gridout, 0, gridout.length - 1):
+                yield chunk
+            return
+
+        chunks, blob = [], None
+        try:
+            async for chunk in iter_gridout(gridout, 0, gridout.length - 1):
+                chunks.append(chunk)
+                yield chunk
+            content = b"".join(chunks)
+            if len(content) == gridout.length:
+                blob = ImageBlob(content, resolve_content_type(gridout), gridout.upload_date)
+        finally:
+            cls.image_cache.end_fill(file_id, blob)
+
+    @classmethod
+    async def _read_disk_entry(cls, entry: DiskEntry) -> ImageBlob | None:
+        try:
+            content = await run_in_threadpool(entry.path.read_bytes)
+        except FileNotFoundError:
+            # evicted since the lookup
+            return None
+        return ImageBlob(content, entry.content_type, entry.upload_date)
+
+    @classmethod
+    async def _load_blob(cls, file_id, gridout=None) -> ImageBlob | None:
+        """Read a whole image from the disk tier or GridFS, for warmups and image jobs"""
+        if cls.disk_cache is not None and gridout is None:
+            entry = await cls.disk_cache.get(file_id)
+            if entry is not None:
+                blob = await cls._read_disk_entry(entry)
+                if blob is not None:
+                    return blob
+
+        source = gridout or await cls.open_image(file_id)
+        if source is None:
+            return None
+        content = await source.read()
+        blob = ImageBlob(content, resolve_content_type(source), source.upload_date)
+        if cls.disk_cache is not None:
+            await cls.disk_cache.store(file_id, iter_bytes(content), blob.content_type, blob.upload_date)
+        return blob
+
+    @classmethod
+    async def warm_image(cls, file_id):
+        '''Pull an image into the memory cache ahead of the request for it'''
+        if file_id in cls.image_cache:
+            return
+        gridout = await cls.open_image(file_id)
+        if gridout is None:
+            return
+        if cls.image_cache.accepts(gridout.length):
+            await cls.download_file(file_id, gridout)
+        else:
+            await cls.cache_image_on_disk(file_id, gridout)
+
+    @classmethod
+    def scene_images_to_warm(cls, links: list, width: int = 2048) -> list:
+        '''
+        What a visitor needs right after following one of links and the
+        memory cache does not hold yet: the target's placeholder and the
+        pyramid level its page swaps in, picked from the levels the scene
+        view carries, so nothing is queried.
+        '''
+        wanted = []
+        for link in links:
+            wanted.append(link.get('target_placeholder_id'))
+            if link.get('target_levels') and not link.get('target_tiled'):
+                level = choose_level(link['target_levels'], width)
+                wanted.append(level['image_id'] if level else None)
+        return list(dict.fromkeys(image_id for image_id in wanted
+                                  if image_id and image_id not in cls.image_cache))
+
+    @classmethod
+    async def warm_images(cls, image_ids: list):
+        '''Runs after the response is sent; failures only cost the warmup'''
+        for image_id in image_ids:
+            try:
+                await cls.warm_image(image_id)
+            except Exception:
+                logger.warning("image warmup failed for %s", image_id, exc_info=True)
+
+    @classmethod
+    async def cache_image_on_disk(cls, file_id, gridout=None):
+        """
+        Copy an image into the disk cache chunk by chunk, returns the DiskEntry.
+        An image already in memory is written from there instead of GridFS.
+        """
+        if cls.disk_cache is None:
+            return None
+        entry = await cls.disk_cache.get(file_id)
+        if entry is not None:
+            return entry
+        blob = cls.image_cache.get(file_id) if gridout is None else None
+        if blob is not None:
+            return await cls.disk_cache.store(file_id, iter_bytes(blob.content), blob.content_type, blob.upload_date)
+        source = gridout or await cls.open_image(file_id)
+        if source is None:
+            return None
+        return await cls.disk_cache.store(
+            file_id,
+            iter_gridout(source, 0, source.length - 1),
+            resolve_content_type(source),
+            source.upload_date,
+        )
         
     @classmethod
     async def delete_scene(cls, space_id:ObjectId, scene_id:ObjectId):
-        await db_manager.get_collection('scenes').delete_one({'_id':scene_id})
-        d = await db_manager.get_collection('links').delete_many({'target_id':scene_id})
-        res = db_manager.get_collection('links').find({})
+        link_ids = [link['_id'] async for link in cls.get_collection('links').find({'target_id': scene_id}, {'_id': 1})]
+        referrers = [scene['_id'] async for scene in cls.get_collection('scenes').find({'links': {'$in': link_ids}}, {'_id': 1})]
 
-        await db_manager.get_collection('spaces').update_one({'_id':space_id}, {'$unset':{f"scenes.{str(scene_id)}":""}})
\ No newline at end of file
+        referrers = [referrer for referrer in referrers if referrer != scene_id]
+
+        await db_manager.get_collection('scenes').delete_one({'_id':scene_id})
+        await cls.get_collection('pois').delete_many({'scene_id': scene_id})
+        await db_manager.get_collection('links').delete_many({'target_id':scene_id})
+        if referrers:
+            # scenes that linked here lose those links, which changes what they render
+            await cls.get_collection('scenes').update_many(
+                {'_id': {'$in': referrers}}, _versioned({'$pull': {'links': {'$in': link_ids}}}))
+
+        await db_manager.get_collection('spaces').update_one({'_id':space_id}, _versioned({'$unset':{f"scenes.{str(scene_id)}":""}}))
+        await cls.get_collection('scene_views').delete_one({'_id': scene_id})
+        cls.patch_scene_graph(space_id, lambda graph: graph.remove_scene(scene_id))
+        for referrer in referrers:
+            await cls.rebuild_scene_view(referrer)
\ No newline at end of file
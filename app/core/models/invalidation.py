@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .database import db_manager
+from ..config import settings
+
+logger = logging.getLogger("simulverse.invalidation")
+
+WATCHED = ("users", "spaces", "scenes", "links")
+# polled by updated_at; link writes always bump their scene's version too
+POLLED = ("users", "spaces", "scenes")
+# MongoDB's answer to $changeStream on a standalone server
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+
+def _evict_user(user_id, change: dict):
+    db_manager.invalidate_users([user_id])
+
+
+def _evict_space(space_id, change: dict):
+    db_manager.scene_graphs.discard(space_id)
+
+
+def _evict_scene(scene_id, change: dict):
+    db_manager.scene_graphs.discard_where(lambda graph: scene_id in graph.nodes)
+
+
+def _evict_link(link_id, change: dict):
+    # a link only shapes the graph through its target; pose edits do not matter
+    updated = (change.get('updateDescription') or {}).get('updatedFields') or {}
+    if change.get('operationType') == 'update' and 'target_id' not in updated:
+        return
+    db_manager.scene_graphs.clear()
+
+
+class invalidation_manager(object):
+    '''
+    Keeps the in-process caches of every worker in step with writes made
+    by the others.
+
+    One task per process tails a change stream over the watched
+    collections (needs a replica set); on a standalone mongod it polls
+    updated_at instead. Each change is handed to the handlers subscribed
+    to its collection. Whenever events may have been missed every cache
+    is flushed, so a cache can be stale for at most one poll interval.
+    '''
+    handlers = {
+        "users": [_evict_user],
+        "spaces": [_evict_space],
+        "scenes": [_evict_scene],
+        "links": [_evict_link],
+    }
+    task = None
+    mode = None
+    events = 0
+    flushes = 0
+
+    @classmethod
+    def subscribe(cls, collection: str, handler):
+        '''handler(document_id, change) runs for every change to collection'''
+        cls.handlers.setdefault(collection, []).append(handler)
+
+    @classmethod
+    def dispatch(cls, collection: str, document_id, change: dict | None = None):
+        cls.events += 1
+        for handler in cls.handlers.get(collection, ()):
+            try:
+                handler(document_id, change or {})
+            except Exception:
+                logger.exception("cache invalidation handler failed for %s %s", collection, document_id)
+
+    @classmethod
+    def flush(cls):
+        '''Drop every cached document, for when changes may have been missed'''
+        cls.flushes += 1
+        db_manager.user_cache.clear()
+        db_manager.scene_graphs.clear()
+
+    @classmethod
+    def start(cls):
+        mode = settings.CACHE_INVALIDATION
+        if mode == "off":
+            return
+        cls.task = asyncio.create_task(cls.run(mode))
+
+    @classmethod
+    async def stop(cls):
+        if cls.task is not None:
+            cls.task.cancel()
+            await asyncio.gather(cls.task, return_exceptions=True)
+            cls.task = None
+        cls.mode = None
+
+    @classmethod
+    async def run(cls, mode: str):
+        if mode in ("auto", "change_stream"):
+            try:
+                await cls.watch()
+                return
+            except OperationFailure as exc:
+                if exc.code != CHANGE_STREAMS_UNSUPPORTED:
+                    raise
+                if mode != "auto":
+                    logger.error("change streams need a replica set; caches now rely on their TTLs alone")
+                    return
+                logger.info("change streams unavailable, polling updated_at every %ss",
+                            settings.CACHE_INVALIDATION_POLL_SECONDS)
+        await cls.poll()
+
+    @classmethod
+    def handle_change(cls, change: dict):
+        collection = (change.get('ns') or {}).get('coll')
+        document_id = (change.get('documentKey') or {}).get('_id')
+        if collection is None or document_id is None:
+            # drop, rename, invalidate: no telling what went away
+            cls.flush()
+            return
+        cls.dispatch(collection, document_id, change)
+
+    @classmethod
+    async def watch(cls):
+        pipeline = [{'$match': {'ns.coll': {'$in': list(WATCHED)}}}]
+        resume_token = None
+        while True:
+            try:
+                async with db_manager.db.watch(pipeline, resume_after=resume_token) as stream:
+                    cls.mode = "change_stream"
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        cls.handle_change(change)
+            except OperationFailure as exc:
+                if exc.code == CHANGE_STREAMS_UNSUPPORTED:
+                    raise
+                # e.g. the resume point fell off the oplog
+                logger.warning("change stream failed, restarting: %s", exc)
+                resume_token = None
+            except PyMongoError as exc:
+                logger.warning("change stream interrupted: %s", exc)
+            cls.flush()
+            await asyncio.sleep(settings.CACHE_INVALIDATION_POLL_SECONDS)
+
+    @classmethod
+    async def poll(cls):
+        cls.mode = "poll"
+        lag = timedelta(seconds=settings.CACHE_INVALIDATION_POLL_LAG)
+        seen: dict = {}
+        since = datetime.utcnow()
+        while True:
+            await asyncio.sleep(settings.CACHE_INVALIDATION_POLL_SECONDS)
+            started = datetime.utcnow()
+            try:
+                seen = await cls.poll_once(since - lag, seen)
+            except PyMongoError as exc:
+                logger.warning("cache invalidation poll failed: %s", exc)
+                cls.flush()
+                continue
+            since = started
+
+    @classmethod
+    async def poll_once(cls, since: datetime, seen: dict) -> dict:
+        '''
+        Dispatch documents written after since. The window overlaps the
+        previous poll (workers' clocks differ), seen keeps a change from
+        being dispatched twice; returns the new seen map.
+        '''
+        current = {}
+        for collection in POLLED:
+            cursor = db_manager.get_collection(collection).find({'updated_at': {'$gte': since}}, {'updated_at': 1})
+            async for document in cursor:
+                key = (collection, document['_id'])
+                current[key] = document['updated_at']
+                if seen.get(key) != current[key]:
+                    cls.dispatch(collection, document['_id'])
+        return current
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {"mode": cls.mode, "events": cls.events, "flushes": cls.flushes}
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from .database import db_manager
+from ..libs.panorama import build_pyramid
+from ..libs.cubemap import TILE_SIZE, build_cubemap_tiles
+from ..config import settings
+
+logger = logging.getLogger("simulverse.jobs")
+
+JOB_COLLECTION = "image_jobs"
+
+# kind -> picklable function run in the process pool on the image bytes
+PROCESSORS = {
+    "pyramid": build_pyramid,
+    "tiles": build_cubemap_tiles,
+}
+
+
+class job_manager(object):
+    '''
+    Background image processing.
+
+    Jobs live in the image_jobs collection so they survive restarts and can
+    be claimed by any worker process; the CPU heavy part runs in a process
+    pool so the event loop keeps serving requests.
+    job: image_id, scene_id, kind, status(pending/running/done/failed),
+         attempts, crashes, lease_until, error, created_at, updated_at
+    A running job's lease is renewed until it finishes; a job whose lease
+    ran out lost its worker and is claimed again, or failed once it used
+    up its attempts.
+    '''
+    executor = None
+    processes = 0
+    tasks = []
+    wakeup = None
+
+    @classmethod
+    def start(cls):
+        # every web worker runs its own pool, so they share the cores
+        cls.processes = settings.IMAGE_WORKER_PROCESSES or max((os.cpu_count() or 1) // max(settings.WEB_CONCURRENCY, 1), 1)
+        cls.executor = ProcessPoolExecutor(max_workers=cls.processes)
+        cls.wakeup = asyncio.Event()
+        cls.tasks = [asyncio.create_task(cls.worker()) for _ in range(cls.processes)]
+        logger.info("image job workers started (%d processes)", cls.processes)
+
+    @classmethod
+    async def stop(cls):
+        for task in cls.tasks:
+            task.cancel()
+        await asyncio.gather(*cls.tasks, return_exceptions=True)
+        cls.tasks = []
+        if cls.executor is not None:
+            cls.executor.shutdown(wait=False, cancel_futures=True)
+            cls.executor = None
+
+    @classmethod
+    async def enqueue(cls, image_id: ObjectId, scene_id: ObjectId, kind: str = "pyramid") -> ObjectId:
+        now = datetime.utcnow()
+        data = {'image_id': image_id, 'scene_id': scene_id, 'kind': kind, 'status': 'pending',
+                'attempts': 0, 'lease_until': None, 'error': None, 'created_at': now, 'updated_at': now}
+        result = await db_manager.get_collection(JOB_COLLECTION).insert_one(data)
+        if cls.wakeup is not None:
+            cls.wakeup.set()
+        return result.inserted_id
+
+    @classmethod
+    async def enqueue_scene_image(cls, image_id: ObjectId, scene_id: ObjectId):
+        '''Queue every derivation a freshly uploaded scene image needs'''
+        await cls.enqueue(image_id, scene_id, "pyramid")
+        if settings.PANORAMA_TILES_ENABLED:
+            await cls.enqueue(image_id, scene_id, "tiles")
+
+    @classmethod
+    async def get_scene_jobs(cls, scene_id: ObjectId) -> list:
+        cursor = db_manager.get_collection(JOB_COLLECTION).find(
+            {'scene_id': scene_id}, {'kind': 1, 'status': 1, 'attempts': 1, 'error': 1, 'updated_at': 1}
+        ).sort('created_at', -1)
+        return await cursor.to_list(length=20)
+
+    @classmethod
+    def replace_executor(cls, broken):
+        '''A child died (e.g. OOM killed) and broke the pool; start a new one unless another task already did'''
+        if cls.executor is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        cls.executor = ProcessPoolExecutor(max_workers=cls.processes or 1)
+        logger.warning("image worker process died, process pool restarted")
+
+    @classmethod
+    async def fail_abandoned(cls, now: datetime):
+        '''
+        Fail the jobs whose worker died during their last attempt: their
+        lease ran out but claim no longer takes them.
+        '''
+        jobs = db_manager.get_collection(JOB_COLLECTION)
+        while True:
+            job = await jobs.find_one_and_update(
+                {'status': 'running', 'lease_until': {'$lt': now}, 'attempts': {'$gte': settings.IMAGE_JOB_MAX_ATTEMPTS}},
+                {'$set': {'status': 'failed', 'error': 'worker lost', 'lease_until': None, 'updated_at': now}},
+            )
+            if job is None:
+                return
+            logger.warning("image job %s abandoned on its last attempt", job['_id'])
+            await cls.fall_back(job)
+
+    @classmethod
+    async def fall_back(cls, job: dict):
+        '''What a scene does without the failed job's output'''
+        if job.get('kind', 'pyramid') == 'pyramid':
+            # the original image is still usable without derived levels
+            await db_manager.mark_scene_ready(job['scene_id'], None)
+
+    @classmethod
+    async def claim(cls):
+        '''Atomically take the oldest pending job, or one whose lease expired'''
+        now = datetime.utcnow()
+        await cls.fail_abandoned(now)
+        return await db_manager.get_collection(JOB_COLLECTION).find_one_and_update(
+            {'attempts': {'$lt': settings.IMAGE_JOB_MAX_ATTEMPTS},
+             '$or': [{'status': 'pending'}, {'status': 'running', 'lease_until': {'$lt': now}}]},
+            {'$set': {'status': 'running', 'updated_at': now,
+                      'lease_until': now + timedelta(seconds=settings.IMAGE_JOB_LEASE_SECONDS)},
+             '$inc': {'attempts': 1}},
+            sort=[('created_at', 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    @classmethod
+    async def worker(cls):
+        while True:
+            try:
+                job = await cls.claim()
+            except Exception:
+                logger.exception("failed to claim image job")
+                job = None
+
+            if job is None:
+                cls.wakeup.clear()
+                try:
+                    await asyncio.wait_for(cls.wakeup.wait(), timeout=settings.IMAGE_JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await cls.run_job(job)
+
+    @classmethod
+    async def keep_leased(cls, job_id: ObjectId):
+        '''Push lease_until forward while the job runs so no other worker claims it'''
+        jobs = db_manager.get_collection(JOB_COLLECTION)
+        lease = timedelta(seconds=settings.IMAGE_JOB_LEASE_SECONDS)
+        while True:
+            await asyncio.sleep(settings.IMAGE_JOB_LEASE_SECONDS / 3)
+            try:
+                await jobs.update_one({'_id': job_id, 'status': 'running'},
+                                      {'$set': {'lease_until': datetime.utcnow() + lease}})
+            except PyMongoError as exc:
+                logger.warning("could not renew the lease of image job %s: %s", job_id, exc)
+
+    @classmethod
+    async def run_job(cls, job: dict):
+        jobs = db_manager.get_collection(JOB_COLLECTION)
+        kind = job.get('kind', 'pyramid')
+        heartbeat = asyncio.create_task(cls.keep_leased(job['_id']))
+        try:
+            processor = PROCESSORS.get(kind)
+            if processor is None:
+                raise ValueError(f"unknown job kind {kind!r}")
+            gridout = await db_manager.open_image(job['image_id'])
+            if gridout is None:
+                raise ValueError("image not found")
+            contents = await gridout.read()
+
+            loop = asyncio.get_running_loop()
+            executor = cls.executor
+            try:
+                result = await loop.run_in_executor(executor, processor, contents)
+            except BrokenProcessPool:
+                cls.replace_executor(executor)
+                raise
+            await cls.store_result(job, kind, result)
+        except asyncio.CancelledError:
+            # shutting down: hand the job back for the next worker
+            await jobs.update_one({'_id': job['_id']}, {'$set': {'status': 'pending', 'lease_until': None},
+                                                        '$inc': {'attempts': -1}})
+            raise
+        except Exception as exc:
+            crashed = isinstance(exc, BrokenProcessPool)
+            if crashed:
+                # the crash may have been another job's: give the attempt back,
+                # but an image that keeps killing its process fails in the end
+                permanent = job.get('crashes', 0) + 1 >= settings.IMAGE_JOB_MAX_ATTEMPTS
+            else:
+                permanent = isinstance(exc, ValueError) or job['attempts'] >= settings.IMAGE_JOB_MAX_ATTEMPTS
+            logger.warning("image job %s failed: %s", job['_id'], exc)
+            update = {'$set': {'status': 'failed' if permanent else 'pending',
+                               'error': str(exc) or type(exc).__name__, 'lease_until': None,
+                               'updated_at': datetime.utcnow()}}
+            if crashed:
+                update['$inc'] = {'crashes': 1} if permanent else {'crashes': 1, 'attempts': -1}
+            await jobs.update_one({'_id': job['_id']}, update)
+            if permanent:
+                await cls.fall_back(job)
+            return
+        finally:
+            heartbeat.cancel()
+
+        await jobs.update_one({'_id': job['_id']}, {'$set': {
+            'status': 'done', 'error': None, 'lease_until': None, 'updated_at': datetime.utcnow()}})
+
+    @classmethod
+    async def store_result(cls, job: dict, kind: str, result):
+        if kind == 'pyramid':
+            size, derivatives = result
+            variants = await db_manager.store_pyramid(job['image_id'], size, derivatives)
+            await db_manager.mark_scene_ready(job['scene_id'], variants)
+        elif kind == 'tiles':
+            levels, tiles = result
+            info = await db_manager.store_tiles(job['image_id'], levels, tiles, TILE_SIZE)
+            await db_manager.set_scene_tiles(job['scene_id'], info)
@@ -0,0 +1,99 @@
+import asyncio
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from fastapi import Depends, Request
+
+from .auth_manager import get_current_user
+from .database import SCENE_HEADER_FIELDS, db_manager, space_fields
+
+
+class BatchLoader(object):
+    '''
+    DataLoader-style memoizing batch loader.
+
+    load() calls made in the same event loop turn are collected and sent
+    to batch_fn as one list of keys; batch_fn returns {key: value} and
+    missing keys resolve to None. Every key is fetched at most once for
+    the loader's lifetime, which for request loaders is one request.
+    '''
+
+    def __init__(self, batch_fn: Callable[[list], Awaitable[dict]]):
+        self.batch_fn = batch_fn
+        self.futures: dict[Hashable, asyncio.Future] = {}
+        self.queue: list = []
+        self.batches = 0
+        # dispatched batches, held so the event loop cannot collect them mid-flight
+        self._pending: set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> asyncio.Future:
+        future = self.futures.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.futures[key] = future
+        if not self.queue:
+            loop.call_soon(self.dispatch)
+        self.queue.append(key)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any):
+        '''Seed a value already at hand so it is never fetched'''
+        if key not in self.futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self.futures[key] = future
+
+    def clear(self, key: Hashable):
+        '''Forget a key after writing to it'''
+        self.futures.pop(key, None)
+
+    def dispatch(self):
+        keys, self.queue = self.queue, []
+        self.batches += 1
+        task = asyncio.ensure_future(self._resolve(keys))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _resolve(self, keys: list):
+        try:
+            values = await self.batch_fn(keys)
+        except Exception as exc:
+            for key in keys:
+                future = self.futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+            return
+        for key in keys:
+            future = self.futures.get(key)
+            if future is not None and not future.done():
+                future.set_result(values.get(key))
+
+
+class RequestLoader(object):
+    '''
+    Per-request loaders for the documents most handlers read.
+
+    Spaces are projected to the header fields and the requesting user's
+    role (space_scenes adds the scene map), scenes leave out their pois.
+    '''
+
+    def __init__(self, user_id=None):
+        self.spaces = BatchLoader(partial(db_manager.get_spaces_by_ids, fields=space_fields(user_id)))
+        self.space_scenes = BatchLoader(partial(db_manager.get_spaces_by_ids, fields=space_fields(user_id, scenes=True)))
+        self.scenes = BatchLoader(partial(db_manager.get_scenes_by_ids, fields=SCENE_HEADER_FIELDS))
+        self.users = BatchLoader(db_manager.get_users_by_ids)
+
+
+def get_loader(request: Request, auth_user=Depends(get_current_user)) -> RequestLoader:
+    '''FastAPI dependency: the loader shared by everything handling this request'''
+    loader = getattr(request.state, "loader", None)
+    if loader is None:
+        loader = RequestLoader(auth_user.id if auth_user else None)
+        request.state.loader = loader
+    return loader
@@ -0,0 +1,216 @@
+import zlib
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from ..models.database import db_manager
+from ..models.auth_manager import get_current_user
+from ..models.loader import RequestLoader, get_loader
+from ..libs.utils import validate_object_id
+from ..libs.image_http import cache_headers, is_not_modified
+from ..libs.serialization import dumps
+from ..libs.poi_index import LOD_FULL, LOD_LABEL, VisiblePoi
+from ..config import settings
+
+# binary encoding for clients that ask for it; msgpack is in requirements.txt,
+# without it every client gets JSON
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+router = APIRouter()
+
+db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _pose(values: dict, keys: tuple) -> list[float]:
+    pose = []
+    for key in keys:
+        try:
+            pose.append(float(values.get(key) or 0))
+        except (TypeError, ValueError):
+            pose.append(0.0)
+    return pose
+
+
+def _vector(value) -> list[float]:
+    return _pose(value or {}, ("x", "y", "z"))
+
+
+def _id(value):
+    return str(value) if value else None
+
+
+def compact_scene(space_id, view: dict) -> dict:
+    '''
+    Client-side render payload for a scene view.
+    ids are strings, poses are [x, y, z, yaw, pitch, roll] and
+    vectors [x, y, z] float arrays, hidden POIs are left out.
+    '''
+    tiles = view.get('image_tiles')
+    return {
+        'id': str(view['_id']),
+        'space_id': str(space_id),
+        'name': view.get('name'),
+        'version': view.get('version', 0),
+        'scene_version': view.get('scene_version', 0),
+        # pois holds the inlined ones; page the rest from .../pois
+        'poi_count': view.get('poi_count', 0),
+        'status': view.get('status', 'ready'),
+        'image': {
+            'id': _id(view.get('image_id')),
+            'placeholder': _id(view.get('placeholder_id')),
+            'tiles': {'levels': tiles['levels'], 'tile_size': tiles['tile_size']} if tiles else None,
+        },
+        'links': [
+            {
+                'id': str(link['_id']),
+                'target': _id(link.get('target_id')),
+                'name': link.get('target_name'),
+                'placeholder': _id(link.get('target_placeholder_id')),
+                'pose': _pose(link, ('x', 'y', 'z', 'yaw', 'pitch', 'roll')),
+            }
+            for link in view.get('links', [])
+        ],
+        'pois': [
+            {
+                'id': _id(poi.get('poi_id')),
+                'type': poi.get('type'),
+                'title': poi.get('title'),
+                'description': poi.get('description') or None,
+                'position': _vector(poi.get('position')),
+                'rotation': _vector(poi.get('rotation')),
+                'scale': _vector(poi.get('scale')),
+                'target': _id(poi.get('target_scene_id')),
+                'image': _id(poi.get('image_id')),
+            }
+            for poi in view.get('visible_pois', [])
+        ],
+    }
+
+
+def compact_poi(item: VisiblePoi) -> dict:
+    '''A POI trimmed to its level of detail: markers, then titles, then the rest'''
+    poi = item.poi
+    payload = {
+        'id': _id(poi.get('poi_id')),
+        'type': poi.get('type'),
+        'lod': item.lod,
+        'position': _vector(poi.get('position')),
+        'rotation': _vector(poi.get('rotation')),
+        'scale': _vector(poi.get('scale')),
+        'target': _id(poi.get('target_scene_id')),
+    }
+    if item.lod >= LOD_LABEL:
+        payload['title'] = poi.get('title')
+    if item.lod >= LOD_FULL:
+        payload['description'] = poi.get('description') or None
+        payload['image'] = _id(poi.get('image_id'))
+    return payload
+
+
+def _encoding(request: Request) -> str:
+    accept = request.headers.get("accept", "")
+    if msgpack is not None and any(media_type in accept for media_type in MSGPACK_TYPES):
+        return "msgpack"
+    return "json"
+
+
+def _encode(payload: dict, encoding: str) -> tuple[bytes, str]:
+    if encoding == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True), "application/msgpack"
+    return dumps(payload), "application/json"
+
+
+async def _member_scene(space_id: str, scene_id: str, auth_user, loader: RequestLoader):
+    '''(space id, scene id) once the user is known to be a member of a space holding the scene'''
+    if not auth_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    space_oid = validate_object_id(space_id)
+    space = await loader.space_scenes.load(space_oid)
+    if not space:
+        raise HTTPException(status_code=404, detail="Space not found")
+    if str(auth_user.id) not in (space.viewers or {}):
+        raise HTTPException(status_code=403, detail="Not authorized for this space")
+
+    scene_oid = validate_object_id(scene_id)
+    if str(scene_oid) not in (space.scenes or {}):
+        raise HTTPException(status_code=404, detail="Scene not found")
+    return space_oid, scene_oid
+
+
+@router.get("/spaces/{space_id}/scenes/{scene_id}")
+async def scene(
+    request: Request,
+    space_id: str,
+    scene_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
+    space_oid, scene_oid = await _member_scene(space_id, scene_id, auth_user, loader)
+    view = await db_manager.get_scene_view(scene_oid)
+    if not view:
+        raise HTTPException(status_code=404, detail="Scene not found")
+
+    # the view version changes on every write that affects the payload, while
+    # HTTP dates round built_at to the second: only the ETag validates
+    encoding = _encoding(request)
+    etag = f'"{scene_oid}-{view.get("version", 0)}-{encoding}"'
+    headers = cache_headers(etag, 0, immutable=False)
+    headers["Vary"] = "Accept, Cookie, Authorization"
+    if is_not_modified(request.headers, etag, None):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body, media_type = _encode(compact_scene(space_oid, view), encoding)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@router.get("/spaces/{space_id}/scenes/{scene_id}/pois")
+async def scene_pois(
+    request: Request,
+    space_id: str,
+    scene_id: str,
+    yaw: float = 0.0,
+    pitch: Annotated[float, Query(ge=-90, le=90)] = 0.0,
+    hfov: Annotated[float, Query(gt=0, le=360)] = 120.0,
+    vfov: Annotated[float, Query(gt=0, le=180)] = 90.0,
+    lod: Annotated[int, Query(ge=0, le=LOD_FULL)] = LOD_FULL,
+    limit: Annotated[int, Query(ge=1)] = 100,
+    cursor: Annotated[int, Query(ge=0)] = 0,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
+    '''
+    Visible POIs inside a yaw/pitch window (degrees, A-Frame camera
+    rotation), middle of the view first and trimmed to their level of
+    detail, capped by lod. Page with cursor until next is null; restart
+    when version changes.
+    '''
+    _, scene_oid = await _member_scene(space_id, scene_id, auth_user, loader)
+    index = await db_manager.get_poi_index(scene_oid)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Scene not found")
+
+    encoding = _encoding(request)
+    etag = f'"{scene_oid}-{index.version}-{zlib.crc32(request.url.query.encode()):08x}-{encoding}"'
+    headers = cache_headers(etag, 0, immutable=False)
+    headers["Vary"] = "Accept, Cookie, Authorization"
+    if is_not_modified(request.headers, etag, None):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    visible = index.query(yaw, pitch, hfov, vfov, near=settings.POI_LOD_NEAR, far=settings.POI_LOD_FAR)
+    limit = min(limit, settings.POI_PAGE_MAX)
+    page = visible[cursor:cursor + limit]
+    payload = {
+        'scene': str(scene_oid),
+        'version': index.version,
+        'total': len(visible),
+        'next': cursor + limit if cursor + limit < len(visible) else None,
+        'pois': [compact_poi(item._replace(lod=min(item.lod, lod))) for item in page],
+    }
+    body, media_type = _encode(payload, encoding)
+    return Response(content=body, media_type=media_type, headers=headers)
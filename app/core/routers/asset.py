@@ -1,17 +1,27 @@
-from fastapi.responses import HTMLResponse
+import os
 from os.path import dirname, abspath
-from pathlib import Path
-from fastapi import APIRouter, Depends, Request, Response, responses, HTTPException, status
-from fastapi.templating import Jinja2Templates
-from starlette.responses import RedirectResponse
-from starlette.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Request, Response, HTTPException, status
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, StreamingResponse
 
-from jose import JWTError, jwt
 from ..models.database import db_manager
 from ..libs.utils import validate_object_id
+from ..libs.cubemap import CUBE_FACES
+from ..libs.disk_cache import DiskEntry
+from ..libs.image_http import (
+    ImageBlob,
+    cache_headers,
+    image_etag,
+    is_not_modified,
+    iter_gridout,
+    parse_range,
+    range_applies,
+    resolve_content_type,
+)
+from ..libs.serialization import ORJSONResponse
 from ..config import settings
-from ..models.auth_manager import get_current_user
-from ..schemas.space_model import CreateSpaceForm, SpaceModel
+from ..models.auth_manager import get_current_user, get_operator
 
 
 router = APIRouter(include_in_schema=False)
@@ -19,16 +29,127 @@ router = APIRouter(include_in_schema=False)
 db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
 BASE_DIR = dirname(dirname(abspath(__file__)))
 
-from fastapi.responses import StreamingResponse
 
-import io
-
-@router.get("/asset/image/{image_id}", 
+@router.get("/asset/image/{image_id}",
         responses = {
             200: {
-                "content": {"image/png": {}}}
-        }, response_class=Response)        
-async def image(request: Request, image_id:str, auth_user= Depends(get_current_user)):
-    image_bytes, content_type = await db_manager.download_file(validate_object_id(image_id))
-    return Response(content=image_bytes, media_type=content_type)
+                "content": {"image/png": {}}},
+            206: {
+                "content": {"image/png": {}}},
+        }, response_class=Response)
+async def image(request: Request, image_id:str, w: int | None = None, auth_user= Depends(get_current_user)):
+    image_oid = validate_object_id(image_id)
+    immutable = True
+    if w is not None:
+        # ?w= maps to the nearest pyramid level; the level is a separate
+        # immutable image so its own id is the validator
+        image_oid, immutable = await db_manager.resolve_image_variant(image_oid, w)
+    return await _serve_image(request, image_oid, image_etag(image_oid), immutable)
+
+
+@router.get("/asset/tile/{image_id}/{level}/{face}/{x}/{y}", response_class=Response)
+async def tile(request: Request, image_id:str, level:int, face:str, x:int, y:int,
+               auth_user= Depends(get_current_user)):
+    if face not in CUBE_FACES or level < 0 or x < 0 or y < 0:
+        raise HTTPException(status_code=404, detail="Tile not found")
+    image_oid = validate_object_id(image_id)
+
+    # tiles are derived deterministically from an immutable image, so the
+    # address itself is a stable validator
+    etag = f'"{image_oid}-{level}-{face}-{x}-{y}"'
+    tile_oid = await db_manager.find_tile(image_oid, level, face, x, y)
+    if tile_oid is None:
+        raise HTTPException(status_code=404, detail="Tile not found")
+    return await _serve_image(request, tile_oid, etag, True)
+
+
+async def _serve_image(request: Request, image_oid, etag: str, immutable: bool):
+    max_age = settings.IMAGE_CACHE_MAX_AGE if immutable else 0
+
+    # the ObjectId is minted at upload time, so it bounds uploadDate from
+    # below and revalidation only needs to know the image still exists
+    if is_not_modified(request.headers, etag, image_oid.generation_time):
+        if not await db_manager.image_exists(image_oid):
+            raise HTTPException(status_code=404, detail="Image not found")
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=cache_headers(etag, max_age, immutable=immutable),
+        )
+
+    image = await db_manager.load_image(image_oid)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    if isinstance(image, DiskEntry):
+        stat_result = await run_in_threadpool(_stat_or_none, image.path)
+        if stat_result is not None:
+            # FileResponse handles Range/If-Range against the headers set here
+            # and hands the file to the server (sendfile) instead of copying it
+            headers = {"Accept-Ranges": "bytes"}
+            headers.update(cache_headers(etag, max_age, image.upload_date, immutable))
+            return FileResponse(image.path, media_type=image.content_type, headers=headers,
+                                stat_result=stat_result)
+        # evicted since the lookup: stream it from GridFS instead
+        image = await db_manager.open_image(image_oid)
+        if image is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+
+    blob, gridout = (image, None) if isinstance(image, ImageBlob) else (None, image)
+    if blob is not None:
+        size, last_modified = len(blob.content), blob.upload_date
+    else:
+        size, last_modified = gridout.length, gridout.upload_date
+
+    headers = {"Accept-Ranges": "bytes"}
+    headers.update(cache_headers(etag, max_age, last_modified, immutable))
+
+    byte_range = None
+    if range_applies(request.headers, etag, last_modified):
+        byte_range = parse_range(request.headers.get("range"), size)
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if blob is not None:
+        return Response(
+            content=blob.content[start:end + 1],
+            status_code=status_code,
+            media_type=blob.content_type,
+            headers=headers,
+        )
+
+    # GridFS miss: the first byte goes out as soon as the first chunk is
+    # read; a whole-image response also fills the memory cache as it goes,
+    # and the disk tier copies the image once the response is sent
+    headers["Content-Length"] = str(end - start + 1 if size else 0)
+    if byte_range is None:
+        chunks = db_manager.stream_image(image_oid, gridout)
+    else:
+        chunks = iter_gridout(gridout, start, end)
+    background = None
+    if db_manager.disk_cache is not None:
+        background = BackgroundTask(db_manager.cache_image_on_disk, image_oid)
+    return StreamingResponse(
+        chunks,
+        status_code=status_code,
+        media_type=resolve_content_type(gridout),
+        headers=headers,
+        background=background,
+    )
+
+
+def _stat_or_none(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
 
+@router.get("/asset/cache/stats")
+async def cache_stats(operator= Depends(get_operator)):
+    disk = db_manager.disk_cache.stats() if db_manager.disk_cache is not None else None
+    return ORJSONResponse({"images": db_manager.image_cache.stats(), "disk": disk})
@@ -1,13 +1,11 @@
 from fastapi.responses import HTMLResponse
-from os.path import dirname, abspath
-from pathlib import Path
 from fastapi import APIRouter, Depends, Request, responses, HTTPException, status
-from fastapi.templating import Jinja2Templates
 from starlette.responses import RedirectResponse
 from jose import JWTError, jwt
 
 from ..models.database import db_manager
 from ..config import settings
+from ..templates import templates
 from ..models.auth_manager import auth_manager, get_current_user
 from ..schemas.space_model import CreateSpaceForm
 
@@ -15,9 +13,6 @@ from ..schemas.space_model import CreateSpaceForm
 router = APIRouter(include_in_schema=False)
 
 db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
-BASE_DIR = dirname(dirname(abspath(__file__)))
-
-templates = Jinja2Templates(directory=str(Path(BASE_DIR, 'templates')))
 
 @router.get("/create/", response_class=HTMLResponse)
 async def create(request: Request, auth_user= Depends(get_current_user)):
@@ -1,24 +1,21 @@
-from os.path import dirname, abspath
-from pathlib import Path
 from datetime import timedelta
 
 from fastapi import APIRouter, Depends, Request, HTTPException, status
-from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm
 from starlette.responses import RedirectResponse
 
-from ..models.database import db_manager
-from ..models.auth_manager import auth_manager
+from ..models.database import db_manager, password_pool
+from ..models.auth_manager import auth_manager, get_operator, token_cache
+from ..models.invalidation import invalidation_manager
 from ..config import settings
+from ..templates import templates
 from ..schemas.user_model import UserLoginForm, UserModel
 from ..libs.resolve_error import resolve_error
+from ..libs.serialization import ORJSONResponse
 
 router = APIRouter(include_in_schema=False)
 
 db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
-BASE_DIR = dirname(dirname(abspath(__file__)))
-
-templates = Jinja2Templates(directory=str(Path(BASE_DIR, 'templates')))
 
 @router.get("/login/")
 def render_login(request: Request):
@@ -56,4 +53,14 @@ async def handle_login(request: Request, form_data: OAuth2PasswordRequestForm =
 def protected_route(request: Request):
     response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
     response.delete_cookie(key="access_token")
-    return response
\ No newline at end of file
+    return response
+
+
+@router.get("/login/stats")
+async def login_stats(operator=Depends(get_operator)):
+    return ORJSONResponse({
+        "password_pool": password_pool.stats(),
+        "tokens": token_cache.stats(),
+        "users": db_manager.user_cache.stats(),
+        "invalidation": invalidation_manager.stats(),
+    })
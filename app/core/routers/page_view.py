@@ -1,12 +1,10 @@
 from fastapi.responses import HTMLResponse
-from os.path import dirname, abspath
-from pathlib import Path
 from fastapi import APIRouter, Depends, Request, responses, HTTPException, status
-from fastapi.templating import Jinja2Templates
 from jose import jwt
 
 from ..models.database import db_manager
 from ..config import settings
+from ..templates import templates
 from ..models.auth_manager import auth_manager, get_current_user
 from ..schemas.space_model import CreateSpaceForm
 from ..libs.resolve_error import resolve_error
@@ -14,9 +12,6 @@ from ..libs.resolve_error import resolve_error
 router = APIRouter(include_in_schema=False)
 
 db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
-BASE_DIR = dirname(dirname(abspath(__file__)))
-
-templates = Jinja2Templates(directory=str(Path(BASE_DIR, 'templates')))
 
 @router.get("/", response_class=HTMLResponse)
 async def root(request: Request, auth_user= Depends(get_current_user)):
@@ -36,6 +31,8 @@ async def view(request: Request, auth_user= Depends(get_current_user)):
     else:
         spaces = await db_manager.get_spaces(auth_user)
         data = {'text':'<h1>Welcome to the Simulverse Management System </h1>', 'spaces':spaces} 
+        # the rendered list is cached until a space's version or the user's role changes
+        data['spaces_key'] = tuple((key, entry[2], entry[3]) for key, entry in spaces.items())
         
         errors = []
         if 'error' in request.query_params:
@@ -1,19 +1,14 @@
-from os.path import dirname, abspath
-from pathlib import Path
 from fastapi import APIRouter, Depends, Request, responses, status
-from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from ..models.database import db_manager
 from ..config import settings
+from ..templates import templates
 
 from ..schemas.user_model import UserRegisterForm, UserModel
 
 router = APIRouter(include_in_schema=False)
 
 db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
-BASE_DIR = dirname(dirname(abspath(__file__)))
-
-templates = Jinja2Templates(directory=str(Path(BASE_DIR, 'templates')))
 
 @router.get("/register/")
 def render_register(request: Request):
@@ -1,23 +1,22 @@
 from fastapi.responses import HTMLResponse
-from os.path import dirname, abspath
-from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.templating import Jinja2Templates
+from starlette.background import BackgroundTask
 from starlette.responses import RedirectResponse
 
 from ..models.database import db_manager
 from ..config import settings
+from ..templates import templates
 from ..models.auth_manager import get_current_user
+from ..models.job_manager import job_manager
+from ..models.loader import RequestLoader, get_loader
 from ..schemas.space_model import CreateSceneForm, CreateSpaceForm, UpdateSceneForm
 from ..schemas.poi_model import CreatePOIForm
 from ..libs.utils import validate_object_id
+from ..libs.serialization import ORJSONResponse
 
 router = APIRouter(include_in_schema=False)
 
 db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
-BASE_DIR = dirname(dirname(abspath(__file__)))
-
-templates = Jinja2Templates(directory=str(Path(BASE_DIR, 'templates')))
 
 
 def _resolve_viewers(space) -> dict:
@@ -47,6 +46,30 @@ def _ensure_editor(space, user_id: str) -> str:
     return role
 
 
+def _space_scenes(space) -> list:
+    return list((space.scenes or {}).items())
+
+
+def _prefetch_links(scene_id, links: list) -> list:
+    '''One link per distinct target scene, capped by SCENE_PREFETCH_MAX_LINKS'''
+    targets = {}
+    for link in links:
+        target_id = link.get('target_id')
+        if target_id and target_id != scene_id and target_id not in targets:
+            targets[target_id] = link
+    return list(targets.values())[:settings.SCENE_PREFETCH_MAX_LINKS]
+
+
+def _prefetch_header(links: list) -> str:
+    # only the blurred placeholders: a few hundred bytes each, and exactly
+    # the first image the target scene page asks for
+    return ", ".join(
+        f"</asset/image/{link['target_placeholder_id']}>; rel=prefetch; as=image"
+        for link in links
+        if link.get('target_placeholder_id') and not link.get('target_tiled')
+    )
+
+
 async def _render_scene_edit(
     request: Request,
     auth_user,
@@ -57,26 +80,21 @@ async def _render_scene_edit(
     errors: list[str] | None = None,
     poi_form: dict | None = None,
 ):
-    scene_doc = await db_manager.get_scene(scene_oid)
+    scene_doc = await db_manager.get_scene_view(scene_oid)
     if not scene_doc:
         raise HTTPException(status_code=404, detail="Scene not found")
 
-    scenes = await db_manager.get_scenes_from_space(space_oid)
-
-    link_info = []
-    for link_id in scene_doc.get("links", []):
-        link = await db_manager.get_link(link_id)
-        if link:
-            link_info.append(link)
-
     data = {
         'name': scene_doc.get('name'),
         'image_id': scene_doc.get('image_id'),
-        'scenes': scenes,
-        'links': link_info,
-        'pois': scene_doc.get('pois', []),
+        'scenes': _space_scenes(space),
+        'links': scene_doc['links'],
+        'pois': await db_manager.get_scene_pois(scene_oid, limit=settings.POI_PAGE_MAX),
+        'poi_total': await db_manager.count_scene_pois(scene_oid),
         'space_id': str(space_oid),
         'scene_id': str(scene_oid),
+        'status': scene_doc.get('status', 'ready'),
+        'jobs': await job_manager.get_scene_jobs(scene_oid),
     }
 
     context = {
@@ -90,12 +108,17 @@ async def _render_scene_edit(
 
 
 @router.get("/space/view/{space_id}", response_class=HTMLResponse)
-async def space(request: Request, space_id: str, auth_user=Depends(get_current_user)):
+async def space(
+    request: Request,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.space_scenes.load(space_oid))
 
     user_id = str(auth_user.id)
     role = _ensure_member(space, user_id)
@@ -110,32 +133,42 @@ async def space(request: Request, space_id: str, auth_user=Depends(get_current_u
 
 
 @router.get("/space/insert/{space_id}", response_class=HTMLResponse)
-async def insert_scene(request: Request, space_id: str, auth_user=Depends(get_current_user)):
+async def insert_scene(
+    request: Request,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.space_scenes.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
-    scenes = await db_manager.get_scenes_from_space(space_oid)
-    data = {"scenes": scenes}
+    data = {"scenes": _space_scenes(space)}
     return templates.TemplateResponse("space/create_scene.html", {"request": request, "data": data, "login": True})
 
 
 @router.post("/space/insert/{space_id}", response_class=HTMLResponse)
-async def handle_insert_scene(request: Request, space_id: str, auth_user=Depends(get_current_user)):
+async def handle_insert_scene(
+    request: Request,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.spaces.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
     form = CreateSceneForm(request)
     await form.load_data()
     if await form.is_valid():
-        await db_manager.create_scene(form, space_oid)
+        scene_oid, image_oid = await db_manager.create_scene(form, space_oid)
+        await job_manager.enqueue_scene_image(image_oid, scene_oid)
         return RedirectResponse(f"/space/view/{space_id}", status_code=status.HTTP_302_FOUND)
 
     form.__dict__.update(request=request)
@@ -144,28 +177,29 @@ async def handle_insert_scene(request: Request, space_id: str, auth_user=Depends
 
 
 @router.get("/space/scene/{space_id}/{scene_id}", response_class=HTMLResponse)
-async def scene(request: Request, space_id: str, scene_id: str, auth_user=Depends(get_current_user)):
+async def scene(
+    request: Request,
+    space_id: str,
+    scene_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.spaces.load(space_oid))
     _ensure_member(space, str(auth_user.id))
 
     scene_oid = validate_object_id(scene_id)
-    scene_doc = await db_manager.get_scene(scene_oid)
+    scene_doc = await db_manager.get_scene_view(scene_oid)
     if not scene_doc:
         raise HTTPException(status_code=404, detail="Scene not found")
 
     links = []
-    for link_id in scene_doc.get("links", []):
-        link = await db_manager.get_collection("links").find_one({'_id': link_id})
-        if not link:
-            continue
-        target_scene = await db_manager.get_scene(link.get('target_id'))
-        target_name = target_scene['name'] if target_scene else None
+    for link in scene_doc["links"]:
         links.append([
-            target_name,
+            link.get('target_name'),
             link.get('target_id'),
             link.get('x'),
             link.get('y'),
@@ -180,19 +214,43 @@ async def scene(request: Request, space_id: str, scene_id: str, auth_user=Depend
         'space_id': space_id,
         'scene_id': scene_id,
         'background': scene_doc.get('image_id'),
+        'placeholder': scene_doc.get('placeholder_id'),
+        'tiles': scene_doc.get('image_tiles'),
         'links': links,
-        'pois': scene_doc.get('pois', []),
+        'pois': scene_doc['visible_pois'],
+        # keys the cached link/POI entities, see the {% cache %} block
+        'version': scene_doc.get('version'),
     }
-    return templates.TemplateResponse("aframe/scene.html", {"request": request, "data": data, "login": True})
+    if scene_doc.get('poi_count', 0) > len(data['pois']):
+        # the view inlines the POIs nearest the opening view, poi-loader fetches the rest
+        data['poi_src'] = f"/api/v1/spaces/{space_id}/scenes/{scene_id}/pois"
+
+    prefetch = _prefetch_links(scene_oid, scene_doc['links'])
+    warm = db_manager.scene_images_to_warm(prefetch)
+    response = templates.TemplateResponse(
+        "aframe/scene.html",
+        {"request": request, "data": data, "login": True},
+        background=BackgroundTask(db_manager.warm_images, warm) if warm else None,
+    )
+    header = _prefetch_header(prefetch)
+    if header:
+        response.headers['Link'] = header
+    return response
 
 
 @router.get("/space/scene/edit/{space_id}/{scene_id}", response_class=HTMLResponse)
-async def scene_edit(request: Request, scene_id: str, space_id: str, auth_user=Depends(get_current_user)):
+async def scene_edit(
+    request: Request,
+    scene_id: str,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.space_scenes.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
     scene_oid = validate_object_id(scene_id)
@@ -200,12 +258,18 @@ async def scene_edit(request: Request, scene_id: str, space_id: str, auth_user=D
 
 
 @router.post("/space/scene/edit/{space_id}/{scene_id}", response_class=HTMLResponse)
-async def handle_scene_edit(request: Request, scene_id: str, space_id: str, auth_user=Depends(get_current_user)):
+async def handle_scene_edit(
+    request: Request,
+    scene_id: str,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.space_scenes.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
     scene_oid = validate_object_id(scene_id)
@@ -227,13 +291,95 @@ async def handle_scene_edit(request: Request, scene_id: str, space_id: str, auth
     )
 
 
+@router.get("/space/scene/status/{space_id}/{scene_id}")
+async def scene_status(
+    request: Request,
+    space_id: str,
+    scene_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
+    if not auth_user:
+        return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    space_oid = validate_object_id(space_id)
+    space = _ensure_space(await loader.spaces.load(space_oid))
+    _ensure_editor(space, str(auth_user.id))
+
+    scene_oid = validate_object_id(scene_id)
+    scene_doc = await loader.scenes.load(scene_oid)
+    if not scene_doc:
+        raise HTTPException(status_code=404, detail="Scene not found")
+
+    jobs = await job_manager.get_scene_jobs(scene_oid)
+    return ORJSONResponse({
+        'status': scene_doc.get('status', 'ready'),
+        'jobs': [
+            {
+                'id': job['_id'],
+                'kind': job.get('kind'),
+                'status': job.get('status'),
+                'attempts': job.get('attempts', 0),
+                'error': job.get('error'),
+                'updated_at': job.get('updated_at'),
+            }
+            for job in jobs
+        ],
+    })
+
+
+@router.get("/space/graph/{space_id}")
+async def scene_graph(
+    request: Request,
+    space_id: str,
+    start: str | None = None,
+    target: str | None = None,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
+    '''
+    Link graph of a space with integrity checks.
+    start defaults to the first scene; with target the shortest path is included.
+    '''
+    if not auth_user:
+        return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    space_oid = validate_object_id(space_id)
+    space = _ensure_space(await loader.space_scenes.load(space_oid))
+    _ensure_member(space, str(auth_user.id))
+
+    graph = await db_manager.get_scene_graph(space_oid)
+    if graph is None:
+        raise HTTPException(status_code=404, detail="Space not found")
+
+    start_oid = validate_object_id(start) if start else next(iter(graph.nodes), None)
+    data = {
+        'scenes': space.scenes or {},
+        'neighbors': {str(scene): graph.neighbors(scene) for scene in graph.nodes},
+        'start': start_oid,
+        'orphans': graph.orphans(),
+        'unreachable': graph.unreachable(start_oid) if start_oid else [],
+        'dangling': {str(scene): targets for scene, targets in graph.dangling().items()},
+        'components': graph.strongly_connected_components(),
+    }
+    if target and start_oid:
+        data['path'] = graph.shortest_path(start_oid, validate_object_id(target))
+    return ORJSONResponse(data)
+
+
 @router.post("/space/scene/{space_id}/{scene_id}/poi", response_class=HTMLResponse, name="space_add_poi")
-async def create_scene_poi(request: Request, space_id: str, scene_id: str, auth_user=Depends(get_current_user)):
+async def create_scene_poi(
+    request: Request,
+    space_id: str,
+    scene_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.space_scenes.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
     scene_oid = validate_object_id(scene_id)
@@ -268,12 +414,13 @@ async def delete_scene_poi(
     scene_id: str,
     poi_id: str,
     auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
 ):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.spaces.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
     scene_oid = validate_object_id(scene_id)
@@ -290,17 +437,26 @@ async def delete_scene_poi(
 
 
 @router.get("/space/edit/{space_id}", response_class=HTMLResponse)
-async def edit_space(request: Request, space_id: str, auth_user=Depends(get_current_user)):
+async def edit_space(
+    request: Request,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    # the one page that needs every member, not just the caller's role
+    space = _ensure_space(await db_manager.get_space(space_oid, ('name', 'explain', 'viewers')))
     _ensure_editor(space, str(auth_user.id))
 
+    roles = {validate_object_id(user_id): val for user_id, val in _resolve_viewers(space).items()}
+    roles.pop(auth_user.id, None)
+    users = await loader.users.load_many(roles)
+
     viewers = {}
-    for user_id, val in _resolve_viewers(space).items():
-        user = await db_manager.get_user_by_id(validate_object_id(user_id))
+    for user, val in zip(users, roles.values()):
         if user and auth_user.email != user.email:
             viewers[user.email] = val
 
@@ -309,12 +465,17 @@ async def edit_space(request: Request, space_id: str, auth_user=Depends(get_curr
 
 
 @router.post("/space/edit/{space_id}", response_class=HTMLResponse)
-async def handle_update_space(request: Request, space_id: str, auth_user=Depends(get_current_user)):
+async def handle_update_space(
+    request: Request,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.spaces.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
     form = CreateSpaceForm(request)
@@ -328,12 +489,18 @@ async def handle_update_space(request: Request, space_id: str, auth_user=Depends
 
 
 @router.post("/space/delete/scene/{space_id}/{scene_id}", response_class=HTMLResponse)
-async def handle_delete_scene(request: Request, space_id: str, scene_id: str, auth_user=Depends(get_current_user)):
+async def handle_delete_scene(
+    request: Request,
+    space_id: str,
+    scene_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.spaces.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
     scene_oid = validate_object_id(scene_id)
@@ -343,35 +510,42 @@ async def handle_delete_scene(request: Request, space_id: str, scene_id: str, au
 
 
 @router.post("/space/delete/space/{space_id}")
-async def handle_delete_space(request: Request, space_id: str, auth_user=Depends(get_current_user)):
+async def handle_delete_space(
+    request: Request,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.spaces.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
-    for scene_id in (space.scenes or {}):
-        await db_manager.delete_scene(space_oid, validate_object_id(scene_id))
-
-    await db_manager.get_collection('spaces').delete_one({'_id': space_oid})
-    await db_manager.get_collection('users').update_many({}, {'$unset': {f"spaces.{str(space_oid)}": ""}})
+    await db_manager.delete_space(space_oid)
 
     return RedirectResponse("/", status_code=status.HTTP_302_FOUND)
 
 
 @router.put("/space/scene/link/update/{space_id}")
-async def handle_link_update(request: Request, space_id: str, auth_user=Depends(get_current_user)):
+async def handle_link_update(
+    request: Request,
+    space_id: str,
+    auth_user=Depends(get_current_user),
+    loader: RequestLoader = Depends(get_loader),
+):
     if not auth_user:
         return RedirectResponse("/login", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     space_oid = validate_object_id(space_id)
-    space = _ensure_space(await db_manager.get_space(space_oid))
+    space = _ensure_space(await loader.spaces.load(space_oid))
     _ensure_editor(space, str(auth_user.id))
 
     payload = await request.json()
+    poses = {}
     for link_id, val in payload.items():
-        data = {
+        poses[validate_object_id(link_id)] = {
             'x': val[0]["x"],
             'y': val[0]["y"],
             'z': val[0]["z"],
@@ -379,7 +553,5 @@ async def handle_link_update(request: Request, space_id: str, auth_user=Depends(
             'pitch': val[1]["y"],
             'roll': val[1]["z"],
         }
-        await db_manager.get_collection('links').update_one({'_id': validate_object_id(link_id)}, {'$set': data})
-
-    return 'done'
+    return ORJSONResponse(await db_manager.update_link_poses(poses))
 
@@ -1,22 +1,56 @@
 from fastapi import Request
 from pydantic import BaseModel, Field, ConfigDict
 from bson import ObjectId
-from typing import Dict, Any, Optional
+from datetime import datetime
+from typing import Dict, Any, NamedTuple, Optional
+
+from ..libs.serialization import ObjectIdStr
 
 class SpaceModel(BaseModel):
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
     )
 
-    id: ObjectId = Field(default_factory=ObjectId, alias="_id")
+    id: ObjectIdStr = Field(default_factory=ObjectId, alias="_id")
     name: str = ""
     explain: str = ""
-    creator: ObjectId = Field(default_factory=ObjectId)
+    creator: ObjectIdStr = Field(default_factory=ObjectId)
     viewers: Optional[Dict[str, Any]] = None
     scenes: Optional[Dict[str, Any]] = None
-    
+    # bumped by every write to the space document, see db_manager._versioned
+    version: int = 0
+    updated_at: Optional[datetime] = None
+
+
+class SpaceSummary(NamedTuple):
+    '''
+    Space read through a field projection, built without validation.
+    Only the projected fields are set; viewers holds just the projected
+    entries (usually the requesting user's role).
+    '''
+    id: ObjectId
+    name: str = ""
+    explain: str = ""
+    creator: Optional[ObjectId] = None
+    viewers: Optional[Dict[str, Any]] = None
+    scenes: Optional[Dict[str, Any]] = None
+    version: int = 0
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_document(cls, document: dict) -> "SpaceSummary":
+        return cls(
+            document['_id'],
+            document.get('name', ""),
+            document.get('explain', ""),
+            document.get('creator'),
+            document.get('viewers'),
+            document.get('scenes'),
+            document.get('version', 0),
+            document.get('updated_at'),
+        )
+
 class CreateSpaceForm: 
     def __init__(self, request: Request):
         self.request: Request = request
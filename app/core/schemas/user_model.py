@@ -3,6 +3,8 @@ from pydantic import BaseModel, Field, ConfigDict
 from bson.objectid import ObjectId
 from typing import Dict, Any
 
+from ..libs.serialization import ObjectIdStr
+
 class UserModel(BaseModel):
     userid: str = ""
     email: str = ""
@@ -11,10 +13,9 @@ class UserInDB(UserModel):
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
     )
 
-    id: ObjectId = Field(default_factory=ObjectId, alias="_id")
+    id: ObjectIdStr = Field(default_factory=ObjectId, alias="_id")
     hashed_password: str = ""
     spaces: Dict[str, Any] = {}
     
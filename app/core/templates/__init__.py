@@ -0,0 +1,17 @@
+from pathlib import Path
+
+from ..config import settings
+from ..libs.templating import create_templates
+from ..libs.ttl_cache import TTLCache
+
+# rendered {% cache %} blocks, keyed by the version of the data they show
+fragment_cache = TTLCache(settings.TEMPLATE_FRAGMENT_CACHE_MAX_ENTRIES, settings.TEMPLATE_FRAGMENT_CACHE_TTL)
+
+# shared by every router so each template is compiled once per process
+templates = create_templates(
+    Path(__file__).parent,
+    fragment_cache=fragment_cache,
+    bytecode_cache_dir=settings.TEMPLATE_BYTECODE_CACHE_DIR,
+    bytecode_cache=settings.TEMPLATE_BYTECODE_CACHE,
+    auto_reload=settings.DEBUG,
+)
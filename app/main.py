@@ -1,8 +1,8 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 
 from os.path import dirname, abspath
@@ -14,17 +14,31 @@ from fastapi.security import OAuth2PasswordRequestForm
 from starlette.responses import RedirectResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from .core.models.database import db_manager
+from .core.models.database import db_manager, password_pool
 from .core.models.auth_manager import auth_manager
+from .core.models.job_manager import job_manager
+from .core.models.invalidation import invalidation_manager
 from .core.schemas.token_model import Token
 from .core.config import settings
+from .core.templates import templates
+from .core.libs.serialization import ORJSONResponse
 
-from app.core.routers import page_view, register, login, create, space, asset
+from app.core.routers import page_view, register, login, create, space, asset, api
 
 BASE_DIR = dirname(abspath(__file__))
-templates = Jinja2Templates(directory=str(Path(BASE_DIR, 'core/templates')))
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_manager.start()
+    invalidation_manager.start()
+    yield
+    await invalidation_manager.stop()
+    await job_manager.stop()
+    password_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=str(Path(BASE_DIR, 'static'))), name="static")
 db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
 
@@ -34,12 +48,14 @@ app.include_router(login.router, prefix="", tags=["login"])
 app.include_router(create.router, prefix="", tags=["create"])
 app.include_router(space.router, prefix="", tags=["space"])
 app.include_router(asset.router, prefix="", tags=["asset"])
+app.include_router(api.router, prefix="/api/v1", tags=["api"])
 
 logger = logging.getLogger("simulverse.main")
 
 ERROR_PAGE_CONTENT = {
     status.HTTP_403_FORBIDDEN: ("접근이 거부되었습니다", "요청하신 리소스에 접근할 수 없습니다."),
     status.HTTP_404_NOT_FOUND: ("페이지를 찾을 수 없습니다", "요청하신 리소스를 찾지 못했습니다."),
+    status.HTTP_429_TOO_MANY_REQUESTS: ("요청이 너무 많습니다", "잠시 후 다시 시도해 주세요."),
     status.HTTP_500_INTERNAL_SERVER_ERROR: ("서버 오류", "예기치 못한 오류가 발생했습니다."),
 }
 
@@ -57,11 +73,14 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     access_token = await auth_manager.create_access_token(
         data={"sub": user.userid}, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return ORJSONResponse({"access_token": access_token, "token_type": "bearer"})
 
 
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    if request.url.path.startswith("/api/"):
+        return ORJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=getattr(exc, "headers", None))
+
     if exc.status_code == status.HTTP_401_UNAUTHORIZED:
         return RedirectResponse("/login/?error=unauthorized", status_code=status.HTTP_302_FOUND)
 
@@ -74,7 +93,9 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         "login": False,
         "data": {"code": exc.status_code, "title": title, "message": message},
     }
-    return templates.TemplateResponse("error.html", context, status_code=exc.status_code)
+    return templates.TemplateResponse(
+        "error.html", context, status_code=exc.status_code, headers=getattr(exc, "headers", None)
+    )
 
 
 @app.exception_handler(Exception)
@@ -0,0 +1,163 @@
+/* global AFRAME, THREE */
+
+// Progressive cubemap panorama.
+// Draws the six whole-face tiles of level 0 first, then fetches only the
+// tiles facing the camera at the level the viewport needs. The face
+// layout mirrors FACE_BASIS in app/core/libs/cubemap.py.
+(function () {
+  var FACES = {
+    px: [[1, 0, 0], [0, 0, 1], [0, 1, 0]],
+    nx: [[-1, 0, 0], [0, 0, -1], [0, 1, 0]],
+    py: [[0, 1, 0], [1, 0, 0], [0, 0, 1]],
+    ny: [[0, -1, 0], [1, 0, 0], [0, 0, -1]],
+    pz: [[0, 0, 1], [-1, 0, 0], [0, 1, 0]],
+    nz: [[0, 0, -1], [1, 0, 0], [0, 1, 0]]
+  };
+  var MAX_CANVAS = 2048;
+
+  function vec(values) {
+    return new THREE.Vector3(values[0], values[1], values[2]);
+  }
+
+  AFRAME.registerComponent('cubemap-tiles', {
+    schema: {
+      src: {type: 'string'},
+      levels: {type: 'int', default: 1},
+      tileSize: {type: 'int', default: 512},
+      radius: {type: 'number', default: 10}
+    },
+
+    init: function () {
+      var data = this.data;
+      this.canvasSize = Math.min(data.tileSize * Math.pow(2, data.levels - 1), MAX_CANVAS);
+      this.maxLevel = Math.round(Math.log2(this.canvasSize / data.tileSize));
+      this.requested = {};
+      this.faces = {};
+      this.group = new THREE.Group();
+
+      var basis = new THREE.Matrix4();
+      for (var name in FACES) {
+        var center = vec(FACES[name][0]);
+        var right = vec(FACES[name][1]);
+        var up = vec(FACES[name][2]);
+
+        var canvas = document.createElement('canvas');
+        canvas.width = canvas.height = this.canvasSize;
+        var texture = new THREE.CanvasTexture(canvas);
+        texture.colorSpace = THREE.SRGBColorSpace;
+
+        var mesh = new THREE.Mesh(
+          new THREE.PlaneGeometry(data.radius * 2, data.radius * 2),
+          new THREE.MeshBasicMaterial({map: texture})
+        );
+        basis.makeBasis(right, up, right.clone().cross(up));
+        mesh.quaternion.setFromRotationMatrix(basis);
+        mesh.position.copy(center).multiplyScalar(data.radius);
+        this.group.add(mesh);
+
+        this.faces[name] = {
+          center: center, right: right, up: up, mesh: mesh, texture: texture,
+          context: canvas.getContext('2d'),
+          // level drawn into each cell of the finest grid, so a coarse
+          // tile landing late never paints over a sharper one
+          drawn: new Int8Array(Math.pow(4, this.maxLevel)).fill(-1)
+        };
+      }
+      this.el.setObject3D('mesh', this.group);
+
+      for (var face in FACES) {
+        this.loadTile(0, face, 0, 0);
+      }
+      this.tick = AFRAME.utils.throttleTick(this.tick, 250, this);
+    },
+
+    neededLevel: function () {
+      var sceneEl = this.el.sceneEl;
+      if (!sceneEl.camera || !sceneEl.renderer) { return 0; }
+      // a face spans 90 degrees of the vertical field of view
+      var needed = sceneEl.renderer.domElement.height * 90 / sceneEl.camera.fov;
+      var level = 0;
+      while (level < this.maxLevel && this.data.tileSize * Math.pow(2, level) < needed) {
+        level++;
+      }
+      return level;
+    },
+
+    tick: function () {
+      var camera = this.el.sceneEl.camera;
+      if (!camera) { return; }
+      var forward = new THREE.Vector3();
+      camera.getWorldDirection(forward);
+      var inverse = this.el.object3D.getWorldQuaternion(new THREE.Quaternion()).invert();
+      forward.applyQuaternion(inverse);
+
+      var fov = THREE.MathUtils.degToRad(Math.max(camera.fov, camera.fov * camera.aspect));
+      var target = this.neededLevel();
+      for (var level = 1; level <= target; level++) {
+        var count = Math.pow(2, level);
+        var threshold = Math.cos(Math.min(Math.PI, fov / 2 + THREE.MathUtils.degToRad(90 / count) * 0.75));
+        for (var name in this.faces) {
+          var face = this.faces[name];
+          for (var y = 0; y < count; y++) {
+            for (var x = 0; x < count; x++) {
+              var a = (x + 0.5) / count * 2 - 1;
+              var b = 1 - (y + 0.5) / count * 2;
+              var direction = face.center.clone()
+                .addScaledVector(face.right, a)
+                .addScaledVector(face.up, b)
+                .normalize();
+              if (direction.dot(forward) >= threshold) {
+                this.loadTile(level, name, x, y);
+              }
+            }
+          }
+        }
+      }
+    },
+
+    loadTile: function (level, name, x, y) {
+      var key = level + '/' + name + '/' + x + '/' + y;
+      if (this.requested[key]) { return; }
+      this.requested[key] = true;
+
+      var self = this;
+      var image = new Image();
+      image.crossOrigin = 'anonymous';
+      image.onload = function () { self.drawTile(level, name, x, y, image); };
+      image.src = this.data.src + '/' + key;
+    },
+
+    drawTile: function (level, name, x, y, image) {
+      var face = this.faces[name];
+      var cells = Math.pow(2, this.maxLevel);
+      var span = Math.pow(2, this.maxLevel - level);
+      var cell = this.canvasSize / cells;
+
+      for (var cy = y * span; cy < (y + 1) * span; cy++) {
+        for (var cx = x * span; cx < (x + 1) * span; cx++) {
+          var index = cy * cells + cx;
+          if (face.drawn[index] > level) { continue; }
+          face.drawn[index] = level;
+          // crop the part of this tile that covers the cell
+          var source = image.width / span;
+          face.context.drawImage(
+            image,
+            (cx - x * span) * source, (cy - y * span) * source, source, source,
+            cx * cell, cy * cell, cell, cell
+          );
+        }
+      }
+      face.texture.needsUpdate = true;
+    },
+
+    remove: function () {
+      for (var name in this.faces) {
+        var face = this.faces[name];
+        face.texture.dispose();
+        face.mesh.geometry.dispose();
+        face.mesh.material.dispose();
+      }
+      this.el.removeObject3D('mesh');
+    }
+  });
+})();
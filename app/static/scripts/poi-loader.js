@@ -0,0 +1,111 @@
+/* global AFRAME */
+
+// Incremental POIs for scenes with more than the page inlines.
+// Whenever the camera turns to a new sector it asks the POI API for the
+// window in view and adds the entities it has not drawn yet, as much
+// detail as the response's lod allows. See app/core/libs/poi_index.py.
+(function () {
+  var SECTOR = 15;
+
+  function vector(values) {
+    return values[0] + ' ' + values[1] + ' ' + values[2];
+  }
+
+  AFRAME.registerComponent('poi-loader', {
+    schema: {
+      src: {type: 'string'},
+      hfov: {type: 'number', default: 120},
+      vfov: {type: 'number', default: 90},
+      limit: {type: 'int', default: 100}
+    },
+
+    init: function () {
+      this.loaded = {};
+      this.sector = null;
+      this.pending = false;
+      var inline = this.el.querySelectorAll('[data-poi-id]');
+      for (var i = 0; i < inline.length; i++) {
+        this.loaded[inline[i].getAttribute('data-poi-id')] = true;
+      }
+      // /api/v1/spaces/<space>/scenes/<scene>/pois
+      this.spaceId = this.data.src.split('/')[4];
+      this.tick = AFRAME.utils.throttleTick(this.tick, 500, this);
+    },
+
+    tick: function () {
+      var camera = this.el.camera;
+      if (!camera || !camera.el || this.pending) { return; }
+      var rotation = camera.el.getAttribute('rotation');
+      var yaw = Math.round(rotation.y / SECTOR) * SECTOR;
+      var pitch = Math.max(-90, Math.min(90, Math.round(rotation.x / SECTOR) * SECTOR));
+      var sector = yaw + ',' + pitch;
+      if (sector === this.sector) { return; }
+      this.sector = sector;
+      this.request(sector, yaw, pitch, 0);
+    },
+
+    request: function (sector, yaw, pitch, cursor) {
+      var self = this;
+      var data = this.data;
+      var url = data.src + '?yaw=' + yaw + '&pitch=' + pitch + '&hfov=' + data.hfov +
+        '&vfov=' + data.vfov + '&limit=' + data.limit + '&cursor=' + cursor;
+      this.pending = true;
+      fetch(url, {credentials: 'same-origin', headers: {Accept: 'application/json'}})
+        .then(function (response) { return response.ok ? response.json() : null; })
+        .then(function (page) {
+          self.pending = false;
+          if (!page) { return; }
+          page.pois.forEach(self.add, self);
+          // keep paging only while the camera stays in this sector
+          if (page.next !== null && self.sector === sector) {
+            self.request(sector, yaw, pitch, page.next);
+          }
+        })
+        .catch(function () { self.pending = false; });
+    },
+
+    add: function (poi) {
+      if (this.loaded[poi.id]) { return; }
+      this.loaded[poi.id] = true;
+
+      var entity = document.createElement('a-entity');
+      entity.setAttribute('data-poi-id', poi.id);
+      entity.setAttribute('position', vector(poi.position));
+      entity.setAttribute('rotation', vector(poi.rotation));
+      entity.setAttribute('scale', vector(poi.scale));
+
+      if (poi.type === 'link' && poi.target) {
+        var link = document.createElement('a-link');
+        link.setAttribute('class', 'clickable');
+        link.setAttribute('href', '/space/scene/' + this.spaceId + '/' + poi.target);
+        if (poi.title) { link.setAttribute('title', poi.title); }
+        entity.appendChild(link);
+      } else {
+        var marker = document.createElement('a-sphere');
+        marker.setAttribute('radius', 0.25);
+        marker.setAttribute('color', '#4CAF50');
+        marker.setAttribute('class', 'clickable');
+        entity.appendChild(marker);
+        if (poi.title) {
+          entity.appendChild(this.text(poi.title, '0 0.6 0', '#ffffff', 3));
+        }
+        if (poi.description) {
+          var description = this.text(poi.description, '0 -0.4 0', '#eeeeee', 4);
+          description.setAttribute('wrap-count', 32);
+          entity.appendChild(description);
+        }
+      }
+      this.el.appendChild(entity);
+    },
+
+    text: function (value, position, color, width) {
+      var text = document.createElement('a-text');
+      text.setAttribute('value', value);
+      text.setAttribute('align', 'center');
+      text.setAttribute('position', position);
+      text.setAttribute('color', color);
+      text.setAttribute('width', width);
+      return text;
+    }
+  });
+})();
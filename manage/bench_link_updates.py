@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+링크 저장 왕복(round-trip) 벤치마크
+
+씬 하나에 링크 N개를 만든 뒤 두 가지 저장 경로를 기존 방식(링크마다
+update_one)과 bulk_write 방식으로 비교합니다:
+  - poses : PUT /space/scene/link/update (hotspot 드래그 후 저장)
+  - scene : 씬 편집 폼 저장 (수정 + 추가 + 삭제 혼합)
+
+pymongo CommandListener로 서버에 보낸 명령 수를 셉니다.
+별도 데이터베이스(<MONGODB_DATABASE>_bench)를 만들고 끝나면 삭제합니다.
+
+사용법:
+    python bench_link_updates.py [--links 40]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.core.models.database import db_manager
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        self.commands.clear()
+
+    @property
+    def total(self):
+        return sum(self.commands.values())
+
+
+def pose(index):
+    return {'x': index, 'y': 1.5, 'z': -3, 'yaw': 0, 'pitch': index % 90, 'roll': 0}
+
+
+async def seed(db, count):
+    target = (await db.scenes.insert_one({'name': 'target', 'links': [], 'pois': []})).inserted_id
+    links = [{'target_id': target, **pose(i)} for i in range(count)]
+    link_ids = (await db.links.insert_many(links)).inserted_ids
+    scene = (await db.scenes.insert_one({'name': 'bench', 'links': link_ids, 'pois': []})).inserted_id
+    space = (await db.spaces.insert_one({'name': 'bench', 'scenes': {str(scene): 'bench', str(target): 'target'}})).inserted_id
+    return space, scene, target, link_ids
+
+
+async def legacy_poses(db, poses):
+    for link_id, data in poses.items():
+        await db.links.update_one({'_id': link_id}, {'$set': data})
+
+
+async def legacy_update_scene(db, form, scene_id):
+    prev_links = (await db.scenes.find_one(scene_id))['links']
+    for plink in zip(form.scene, form.x, form.y, form.z, form.yaw, form.pitch, form.roll):
+        target_id, link_id = plink[0].split(".")
+        data = {'x': plink[1], 'y': plink[2], 'z': plink[3], 'target_id': ObjectId(target_id),
+                'yaw': plink[4], 'pitch': plink[5], 'roll': plink[6]}
+        if link_id != "":
+            if ObjectId(link_id) in prev_links:
+                prev_links.remove(ObjectId(link_id))
+            await db.links.update_one({'_id': ObjectId(link_id)}, {'$set': data})
+        else:
+            res = await db.links.insert_one(data)
+            await db.scenes.update_one({'_id': scene_id}, {'$push': {'links': res.inserted_id}})
+    for link in prev_links:
+        await db.scenes.update_one({'_id': scene_id}, {'$pull': {'links': link}})
+
+
+def scene_form(target, link_ids):
+    # keep two thirds, drop the rest, add a quarter as new links
+    kept = link_ids[: len(link_ids) * 2 // 3]
+    rows = [f"{target}.{link_id}" for link_id in kept] + [f"{target}." for _ in range(len(link_ids) // 4)]
+    poses = [pose(i) for i in range(len(rows))]
+    return SimpleNamespace(
+        scene_name='bench',
+        scene=rows,
+        **{field: [p[field] for p in poses] for field in ('x', 'y', 'z', 'yaw', 'pitch', 'roll')},
+    )
+
+
+async def measure(label, counter, coroutine):
+    counter.reset()
+    started = time.perf_counter()
+    result = await coroutine
+    elapsed = (time.perf_counter() - started) * 1000
+    detail = ", ".join(f"{name} {count}" for name, count in counter.commands.most_common())
+    print(f"  {label:<10} {counter.total:>5} round-trips  {elapsed:>8.1f} ms   ({detail})")
+    return counter.total, result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=40, help="links on the benchmark scene")
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[counter])
+    name = f"{settings.MONGODB_DATABASE}_bench"
+    db_manager.client = client
+    db_manager.db = client[name]
+    db = db_manager.db
+
+    try:
+        await client.drop_database(name)
+        print(f"\n📌 링크 {args.links}개 pose 저장")
+        _, scene, target, link_ids = await seed(db, args.links)
+        poses = {link_id: pose(i + 1) for i, link_id in enumerate(link_ids)}
+        before, _ = await measure("legacy", counter, legacy_poses(db, poses))
+        after, summary = await measure("bulk", counter, db_manager.update_link_poses(poses))
+        print(f"  → summary {summary}")
+        print(f"  → {before / max(after, 1):.1f}x fewer round-trips (bulk includes the scene view rebuild)")
+
+        print(f"\n📝 씬 편집 저장 (링크 {args.links}개 중 수정/삭제/추가)")
+        await client.drop_database(name)
+        _, scene, target, link_ids = await seed(db, args.links)
+        before, _ = await measure("legacy", counter, legacy_update_scene(db, scene_form(target, link_ids), scene))
+
+        await client.drop_database(name)
+        space, scene, target, link_ids = await seed(db, args.links)
+        form = scene_form(target, link_ids)
+        after, summary = await measure("bulk", counter, db_manager.update_scene(form, space_id=space, scene_id=scene))
+        print(f"  → summary {summary}")
+        print(f"  → {before / max(after, 1):.1f}x fewer round-trips (bulk includes the scene view rebuilds)")
+    finally:
+        await client.drop_database(name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+파노라마 전송 방식 벤치마크 (MongoDB 불필요)
+
+첫 렌더링까지 내려받는 바이트 수를 비교합니다:
+  - a-sky  : 원본 equirect 이미지 전체 (기존 방식)
+  - pyramid: 블러 placeholder → 화면 크기에 맞는 레벨
+  - tiles  : level 0 큐브맵 타일 6장 → 시야 안의 상위 레벨 타일
+
+사용법:
+    python bench_panorama.py [image ...] [--width 8192] [--fov 80] [--viewport 1080]
+
+--width 를 주면 원본을 해당 너비로 확대해 대형 파노라마를 흉내냅니다.
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from PIL import Image
+
+from app.core.libs.cubemap import TILE_SIZE, build_cubemap_tiles, tiles_in_view
+from app.core.libs.panorama import build_pyramid, choose_level
+
+
+def load_source(path: Path, width: int | None) -> bytes:
+    data = path.read_bytes()
+    if not width:
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB").resize((width, width // 2), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90)
+        return buffer.getvalue()
+
+
+def needed_level(levels: int, viewport: int, fov: float) -> int:
+    needed = viewport * 90 / fov
+    level = 0
+    while level < levels - 1 and TILE_SIZE * 2 ** level < needed:
+        level += 1
+    return level
+
+
+def bench(path: Path, width: int | None, fov: float, viewport: int):
+    data = load_source(path, width)
+
+    started = time.perf_counter()
+    size, derivatives = build_pyramid(data)
+    pyramid_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    levels, tiles = build_cubemap_tiles(data)
+    tile_seconds = time.perf_counter() - started
+
+    placeholder = next(d for d in derivatives if d.kind == "placeholder")
+    pyramid_levels = [{"width": d.width, "image_id": d} for d in derivatives if d.kind == "level"]
+    pyramid_levels.append({"width": size[0], "image_id": None})
+    screen_level = choose_level(pyramid_levels, 2048 if viewport <= 1080 else 4096)
+    screen_bytes = len(screen_level["image_id"].content) if screen_level["image_id"] else len(data)
+
+    by_key = {(t.level, t.face, t.x, t.y): len(t.content) for t in tiles}
+    first_tiles = sum(size for (level, *_), size in by_key.items() if level == 0)
+    target = needed_level(levels, viewport, fov)
+    view_tiles = [(target, *key) for key in tiles_in_view((0, 0, -1), fov, target)] if target else []
+    view_bytes = sum(by_key[key] for key in view_tiles)
+
+    print(f"\n📷 {path.name}  {size[0]}x{size[1]}  ({len(data):,} bytes)")
+    print(f"  a-sky    first render : {len(data):>12,} bytes")
+    print(f"  pyramid  first render : {len(placeholder.content):>12,} bytes (placeholder)"
+          f"  + {screen_bytes:,} bytes ({screen_level['width']}px level)"
+          f"  [build {pyramid_seconds:.2f}s]")
+    print(f"  tiles    first render : {first_tiles:>12,} bytes (6 level-0 tiles)"
+          f"  + {view_bytes:,} bytes ({len(view_tiles)} level-{target} tiles in view)"
+          f"  [build {tile_seconds:.2f}s, {levels} levels, {len(tiles)} tiles]")
+    return len(data), len(placeholder.content), first_tiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", type=Path)
+    parser.add_argument("--width", type=int, default=None, help="resize sources to this equirect width")
+    parser.add_argument("--fov", type=float, default=80.0, help="camera field of view in degrees")
+    parser.add_argument("--viewport", type=int, default=1080, help="viewport height in device pixels")
+    args = parser.parse_args()
+
+    images = args.images or sorted((Path(__file__).parent / "assets").glob("space_*.jpg"))
+    totals = [0, 0, 0]
+    for path in images:
+        for index, value in enumerate(bench(path, args.width, args.fov, args.viewport)):
+            totals[index] += value
+
+    original, placeholder, tiles = totals
+    print("\n" + "=" * 60)
+    print(f"  a-sky   : {original:,} bytes")
+    print(f"  pyramid : {placeholder:,} bytes  ({original / max(placeholder, 1):.0f}x smaller)")
+    print(f"  tiles   : {tiles:,} bytes  ({original / max(tiles, 1):.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+POI 저장 방식 벤치마크 (씬 문서 포함 vs pois 컬렉션)
+
+POI N개를 가진 씬을 두 방식으로 만들어 씬 조회 비용을 비교합니다:
+  - embedded   : POI 배열이 씬 문서에 포함된 기존 방식 (find_one 전체 문서)
+  - collection : pois 컬렉션 + 프로젝션된 씬/씬 뷰 조회, POI 페이지 조회
+
+각 항목은 --repeat 회 실행한 중앙값(ms)과 응답 BSON 크기입니다.
+별도 데이터베이스(<MONGODB_DATABASE>_bench)를 만들고 끝나면 삭제합니다.
+
+사용법:
+    python bench_pois.py [--pois 10000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import bson
+from bson import ObjectId
+
+# 로컬 유틸리티
+try:
+    from create_indexes import INDEX_DEFINITIONS
+except ImportError:
+    from manage.create_indexes import INDEX_DEFINITIONS
+
+from app.core.config import settings
+from app.core.models.database import SCENE_HEADER_FIELDS, db_manager
+
+
+def build_pois(count):
+    now = datetime.utcnow()
+    return [
+        {
+            'poi_id': ObjectId(), 'type': ('info', 'link', 'media')[index % 3], 'title': f'poi {index}',
+            'description': 'description ' * 4,
+            'position': {'x': (index % 40) - 20.0, 'y': 1.5, 'z': (index // 40 % 40) - 20.0},
+            'rotation': {'x': 0.0, 'y': 0.0, 'z': 0.0}, 'scale': {'x': 1.0, 'y': 1.0, 'z': 1.0},
+            'visible': index % 10 != 0, 'image_id': None, 'target_scene_id': None,
+            'created_at': now, 'updated_at': now,
+        }
+        for index in range(count)
+    ]
+
+
+def size_of(result):
+    if isinstance(result, list):
+        return sum(len(bson.encode(document)) for document in result)
+    return len(bson.encode(result)) if isinstance(result, dict) else 0
+
+
+async def measure(label, repeat, factory):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await factory()
+        timings.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(timings)
+    print(f"  {label:<28} {median:>8.2f} ms  {size_of(result) / 1024:>9.1f} KiB")
+    return median
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pois", type=int, default=10000, help="POIs on the benchmark scene")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    name = f"{settings.MONGODB_DATABASE}_bench"
+    db_manager.init_manager(settings.MONGODB_URL, name)
+    client, db = db_manager.client, db_manager.db
+
+    try:
+        await client.drop_database(name)
+        for keys, options in INDEX_DEFINITIONS["pois"]:
+            await db.pois.create_index(keys, **options)
+        pois = build_pois(args.pois)
+        base = {'name': 'bench', 'image_id': ObjectId(), 'links': [], 'status': 'ready', 'version': 1}
+        legacy = (await db.scenes.insert_one({**base, 'pois': pois})).inserted_id
+        scene = (await db.scenes.insert_one({**base, 'pois': pois})).inserted_id
+
+        print(f"\n🚚 POI {args.pois}개 마이그레이션")
+        started = time.perf_counter()
+        moved = await db_manager.migrate_scene_pois(scene)
+        print(f"  {moved}개 이동  {(time.perf_counter() - started) * 1000:.1f} ms")
+        await db_manager.rebuild_scene_view(scene)
+
+        print(f"\n📦 embedded (씬 문서에 POI {args.pois}개)")
+        before = await measure("find_one scene", args.repeat, lambda: db.scenes.find_one({'_id': legacy}))
+
+        print(f"\n🗂  collection (pois 컬렉션, 페이지 {settings.POI_PAGE_MAX}개)")
+        header = await measure("get_scene(header fields)", args.repeat,
+                               lambda: db_manager.get_scene(scene, SCENE_HEADER_FIELDS))
+        view = await measure("get_scene_view", args.repeat, lambda: db_manager.get_scene_view(scene))
+        await measure("get_scene_pois(first page)", args.repeat,
+                      lambda: db_manager.get_scene_pois(scene, limit=settings.POI_PAGE_MAX))
+        await measure("get_scene_pois(type=link)", args.repeat,
+                      lambda: db_manager.get_scene_pois(scene, type='link', limit=settings.POI_PAGE_MAX))
+
+        async def cold_index():
+            db_manager.poi_indexes.discard(scene)
+            index = await db_manager.get_poi_index(scene)
+            return [item.poi for item in index.query(0, 0, 120, 90)[:100]]
+
+        await measure("get_poi_index(cold) + window", args.repeat, cold_index)
+        print(f"  → scene page read {before / max(view, 1e-6):.1f}x faster via the view, "
+              f"{before / max(header, 1e-6):.1f}x via the projected scene")
+    finally:
+        await client.drop_database(name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+JSON 직렬화 벤치마크 (MongoDB 불필요)
+
+씬 200개, 링크 2000개짜리 공간 문서를 만들어 두 경로를 비교합니다:
+  - jsonable_encoder : FastAPI 기본 경로 (jsonable_encoder → JSONResponse)
+  - orjson           : app.core.libs.serialization.ORJSONResponse
+
+사용법:
+    python bench_serialization.py [--scenes 200] [--links 2000] [--repeat 50]
+"""
+import argparse
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.core.libs.serialization import ORJSONResponse
+from app.core.schemas.space_model import SpaceModel
+
+
+def build_space(scene_count: int, link_count: int):
+    now = datetime(2024, 1, 1)
+    scene_ids = [ObjectId() for _ in range(scene_count)]
+    scenes = []
+    for index, scene_id in enumerate(scene_ids):
+        links = [
+            {
+                '_id': ObjectId(),
+                'target_id': scene_ids[(index + offset + 1) % scene_count],
+                'x': 1.5 * offset, 'y': 1.2, 'z': -3.0, 'yaw': 0.0, 'pitch': 45.0, 'roll': 0.0,
+            }
+            for offset in range(link_count // scene_count)
+        ]
+        pois = [
+            {
+                'poi_id': ObjectId(), 'type': 'info', 'title': f'poi {index}', 'description': 'description',
+                'position': {'x': 0.0, 'y': 1.3, 'z': -3.0}, 'rotation': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+                'scale': {'x': 1.0, 'y': 1.0, 'z': 1.0}, 'visible': True, 'image_id': None,
+                'target_scene_id': None, 'created_at': now, 'updated_at': now + timedelta(seconds=index),
+            }
+        ]
+        scenes.append({'_id': scene_id, 'name': f'scene {index}', 'image_id': ObjectId(),
+                       'links': links, 'pois': pois, 'status': 'ready'})
+
+    model = SpaceModel(
+        _id=ObjectId(), name='bench', explain='benchmark space', creator=ObjectId(),
+        viewers={str(ObjectId()): 'Viewer' for _ in range(50)},
+        scenes={str(scene_id): f'scene {index}' for index, scene_id in enumerate(scene_ids)},
+    )
+    return {'space': model, 'scenes': scenes}
+
+
+def legacy(document):
+    return JSONResponse(jsonable_encoder(document, custom_encoder={ObjectId: str})).body
+
+
+def fast(document):
+    return ORJSONResponse(document).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=200)
+    parser.add_argument("--links", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    document = build_space(args.scenes, args.links)
+    # same data either way, only whitespace differs
+    assert orjson.loads(legacy(document)) == orjson.loads(fast(document))
+
+    print(f"\n📦 space: {args.scenes} scenes, {args.links} links ({len(fast(document)):,} bytes)")
+    results = {}
+    for label, function in (("jsonable_encoder", legacy), ("orjson", fast)):
+        seconds = min(timeit.repeat(lambda: function(document), number=args.repeat, repeat=3)) / args.repeat
+        results[label] = seconds
+        print(f"  {label:<17} {seconds * 1000:>8.2f} ms / response")
+    print(f"  → {results['jsonable_encoder'] / results['orjson']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
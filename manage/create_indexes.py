@@ -14,10 +14,19 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from app.core.config import settings
 
 INDEX_DEFINITIONS = {
-    "users": (("email", {"unique": True}),),
-    "spaces": (("creator", {}), ("viewers", {})),
-    "scenes": (("image_id", {}),),
+    # updated_at is scanned by the polling cache invalidation fallback
+    "users": (("email", {"unique": True}), ("updated_at", {})),
+    "spaces": (("creator", {}), ("viewers", {}), ("updated_at", {})),
+    "scenes": (("image_id", {}), ("links", {}), ("updated_at", {})),
     "links": (("target_id", {}),),
+    # one document per POI, see db_manager.get_scene_pois
+    "pois": (([("scene_id", 1), ("poi_id", 1)], {"unique": True}), ([("scene_id", 1), ("type", 1)], {})),
+    "image_jobs": (("status", {}), ("scene_id", {}), ("created_at", {})),
+    "images.files": (
+        ("metadata.variant_of", {}),
+        ([("metadata.tile_of", 1), ("metadata.level", 1), ("metadata.face", 1),
+          ("metadata.x", 1), ("metadata.y", 1)], {}),
+    ),
 }
 
 
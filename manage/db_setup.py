@@ -258,8 +258,15 @@ async def seed_database():
         "pois": []
     }
 
+    # POI는 씬 문서가 아닌 pois 컬렉션에 저장
+    poi_docs = [
+        {**poi, "scene_id": scene["_id"]}
+        for scene in (scene1, scene2, scene3, scene4)
+        for poi in scene.pop("pois")
+    ]
     await db.scenes.insert_many([scene1, scene2, scene3, scene4])
-    total_pois = len(scene1["pois"]) + len(scene2["pois"]) + len(scene3["pois"])
+    await db.pois.insert_many(poi_docs)
+    total_pois = len(poi_docs)
     print(f"✅ 씬 생성 완료: 4개 (총 {total_pois}개 POI 포함)")
 
     # ============================================
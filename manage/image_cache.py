@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+이미지 디스크 캐시 관리 스크립트
+
+사용법:
+    python image_cache.py warm [space_id ...]   # GridFS 이미지를 디스크 캐시에 미리 적재
+    python image_cache.py purge                 # 디스크 캐시 전체 삭제
+    python image_cache.py stats                 # 캐시 사용량 확인
+
+IMAGE_DISK_CACHE_DIR 환경변수가 설정되어 있어야 합니다.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+
+from app.core.config import settings
+from app.core.libs.disk_cache import DiskImageCache
+from app.core.libs.image_http import iter_gridout, resolve_content_type
+
+
+async def image_ids_for_spaces(db, space_ids):
+    """공간에 속한 씬의 배경 이미지 ID 목록"""
+    scene_ids = []
+    async for space in db.spaces.find({"_id": {"$in": space_ids}}, {"scenes": 1}):
+        scene_ids.extend(ObjectId(scene_id) for scene_id in (space.get("scenes") or {}))
+    cursor = db.scenes.find({"_id": {"$in": scene_ids}}, {"image_id": 1})
+    return [scene["image_id"] async for scene in cursor if scene.get("image_id")]
+
+
+async def warm(cache: DiskImageCache, space_ids):
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.MONGODB_DATABASE]
+    fs = AsyncIOMotorGridFSBucket(db, bucket_name="images")
+    try:
+        if space_ids:
+            image_ids = await image_ids_for_spaces(db, space_ids)
+        else:
+            image_ids = [doc["_id"] async for doc in db["images.files"].find({}, {"_id": 1})]
+
+        print(f"🔥 {len(image_ids)}개 이미지 캐시 적재 시작...")
+        stored = skipped = 0
+        for image_id in image_ids:
+            if await cache.get(image_id) is not None:
+                skipped += 1
+                continue
+            gridout = await fs.open_download_stream(image_id)
+            await cache.store(
+                image_id,
+                iter_gridout(gridout, 0, gridout.length - 1),
+                resolve_content_type(gridout),
+                gridout.upload_date,
+            )
+            stored += 1
+            print(f"  📷 {image_id} ({gridout.length:,} bytes)")
+        print(f"✅ 적재 완료: {stored}개 저장, {skipped}개 이미 캐시됨")
+    finally:
+        client.close()
+
+
+def print_stats(cache: DiskImageCache):
+    stats = cache.stats()
+    print(f"📂 위치: {stats['root']}")
+    print(f"💾 사용량: {stats['bytes']:,} / {stats['max_bytes']:,} bytes")
+
+
+def main(argv):
+    if not settings.IMAGE_DISK_CACHE_DIR:
+        print("❌ IMAGE_DISK_CACHE_DIR 가 설정되지 않았습니다.")
+        return 1
+    if not argv or argv[0] not in ("warm", "purge", "stats"):
+        print(__doc__)
+        return 1
+
+    cache = DiskImageCache(settings.IMAGE_DISK_CACHE_DIR, settings.IMAGE_DISK_CACHE_MAX_BYTES)
+    command = argv[0]
+    if command == "warm":
+        asyncio.run(warm(cache, [ObjectId(space_id) for space_id in argv[1:]]))
+    elif command == "purge":
+        removed = cache.purge()
+        print(f"🗑️  디스크 캐시 삭제 완료: {removed}개 파일")
+    print_stats(cache)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
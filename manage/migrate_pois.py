@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+씬 문서에 포함된 POI를 pois 컬렉션으로 옮기는 온라인 마이그레이션
+
+서비스를 멈추지 않고 실행할 수 있습니다:
+  - 이미 옮겨진 POI는 덮어쓰지 않음 ((scene_id, poi_id) 유니크 인덱스 + $setOnInsert)
+  - 옮긴 poi_id만 씬에서 $pull 하므로 실행 중 추가된 POI는 다음 실행에서 이동
+  - 이동이 끝난 씬은 scene_views를 다시 생성
+
+앱도 씬 뷰를 다시 만들 때 같은 방식으로 씬마다 옮기므로, 이 스크립트는
+오래 열리지 않은 씬까지 한 번에 정리하는 용도입니다. 여러 번 실행해도 안전합니다.
+
+사용법:
+    python migrate_pois.py [--dry-run]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 로컬 유틸리티
+try:
+    from create_indexes import ensure_indexes
+except ImportError:
+    from manage.create_indexes import ensure_indexes
+
+from app.core.config import settings
+from app.core.models.database import db_manager
+
+EMBEDDED = {"pois.0": {"$exists": True}}
+
+
+async def pending(db):
+    """POI를 아직 포함하고 있는 씬 수와 POI 수"""
+    pipeline = [
+        {"$match": EMBEDDED},
+        {"$group": {"_id": None, "scenes": {"$sum": 1}, "pois": {"$sum": {"$size": "$pois"}}}},
+    ]
+    result = await db.scenes.aggregate(pipeline).to_list(length=1)
+    return (result[0]["scenes"], result[0]["pois"]) if result else (0, 0)
+
+
+async def migrate(db):
+    scene_ids = [scene["_id"] async for scene in db.scenes.find(EMBEDDED, {"_id": 1})]
+    moved = 0
+    for number, scene_id in enumerate(scene_ids, 1):
+        count = await db_manager.migrate_scene_pois(scene_id)
+        await db_manager.rebuild_scene_view(scene_id)
+        moved += count
+        print(f"  [{number}/{len(scene_ids)}] {scene_id}: POI {count}개 이동")
+    return len(scene_ids), moved
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="옮길 씬과 POI 수만 출력")
+    args = parser.parse_args()
+
+    db_manager.init_manager(settings.MONGODB_URL, settings.MONGODB_DATABASE)
+    db = db_manager.db
+    try:
+        scenes, pois = await pending(db)
+        print(f"🔍 POI를 포함한 씬 {scenes}개, POI {pois}개")
+        if args.dry_run or not scenes:
+            return
+
+        print("🧱 인덱스 생성 확인 중...")
+        await ensure_indexes(db)
+
+        print("🚚 POI 이동 시작...")
+        scenes, moved = await migrate(db)
+        print(f"✅ 씬 {scenes}개에서 POI {moved}개 이동 완료")
+
+        remaining, left = await pending(db)
+        if remaining:
+            # poi_id가 없거나 실행 중 새로 추가된 POI
+            print(f"⚠️ 씬 {remaining}개에 POI {left}개가 남아 있습니다. 다시 실행해 주세요.")
+    finally:
+        db_manager.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
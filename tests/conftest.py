@@ -0,0 +1,96 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.core.models.database import db_manager
+
+
+OPERATORS = {
+    '$ne': lambda value, operand: value != operand,
+    '$gt': lambda value, operand: value is not None and value > operand,
+    '$gte': lambda value, operand: value is not None and value >= operand,
+    '$lt': lambda value, operand: value is not None and value < operand,
+    '$lte': lambda value, operand: value is not None and value <= operand,
+    '$in': lambda value, operand: value in operand,
+    '$nin': lambda value, operand: value not in operand,
+    '$exists': lambda value, operand: (value is not None) == operand,
+}
+
+
+def matches(document, query):
+    '''enough of MongoDB's query language for the fakes: equality, $or and OPERATORS'''
+    for field, condition in query.items():
+        if field == '$or':
+            if not any(matches(document, branch) for branch in condition):
+                return False
+            continue
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if not all(OPERATORS[operator](value, operand) for operator, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    '''A Motor cursor over a list: async iteration, sort/skip/limit chaining and to_list'''
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+
+    def sort(self, field, direction=1):
+        self.documents = sorted(self.documents, key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        self.documents = self.documents[count:]
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.documents if length is None else self.documents[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+
+class FakeViews:
+    '''scene_views keyed by scene id; rebuilds apply $set and $inc like MongoDB, filters included'''
+
+    def __init__(self):
+        self.documents = {}
+        self.reads = 0
+        self.projections = []
+
+    async def find_one(self, query, projection=None):
+        self.reads += 1
+        self.projections.append(projection)
+        return self.documents.get(query["_id"])
+
+    async def find_one_and_update(self, query, update, upsert, return_document):
+        document = self.documents.setdefault(query["_id"], {"_id": query["_id"]})
+        if not matches(document, query):
+            # the upsert would insert a second document with this _id
+            raise DuplicateKeyError("E11000 duplicate key error")
+        document.update(update["$set"])
+        for field, amount in update["$inc"].items():
+            document[field] = document.get(field, 0) + amount
+        return document
+
+    async def delete_one(self, query):
+        self.documents.pop(query["_id"], None)
+
+
+@pytest.fixture
+def fake_collections(monkeypatch):
+    '''db_manager.get_collection(name) returns fake_collections[name]; tests fill in the fakes they need'''
+    collections = {}
+    monkeypatch.setattr(db_manager, "get_collection", classmethod(lambda cls, name: collections[name]))
+    return collections
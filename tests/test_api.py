@@ -0,0 +1,78 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.models.database import db_manager
+from app.core.routers import api
+
+
+SPACE_ID, SCENE_ID, TARGET_ID, USER_ID = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+
+VIEW = {
+    "_id": SCENE_ID, "name": "lobby", "image_id": ObjectId(), "placeholder_id": None, "status": "ready",
+    "image_tiles": {"levels": 3, "tile_size": 512, "generated_at": datetime(2024, 1, 1)},
+    "links": [{"_id": ObjectId(), "target_id": TARGET_ID, "target_name": "hall",
+               "x": "1", "y": "2.5", "z": "-3", "yaw": "0", "pitch": "90", "roll": None}],
+    "visible_pois": [{"poi_id": ObjectId(), "type": "info", "title": "t", "description": "",
+                      "position": {"x": 1, "y": 2, "z": 3}, "rotation": None, "scale": {"x": 1, "y": 1, "z": 1}}],
+    "version": 4, "built_at": datetime(2024, 1, 1, 12, 0, 0),
+}
+
+
+def test_compact_scene_uses_string_ids_and_float_arrays():
+    payload = api.compact_scene(SPACE_ID, VIEW)
+    assert payload["id"] == str(SCENE_ID) and payload["version"] == 4
+    assert payload["image"]["tiles"] == {"levels": 3, "tile_size": 512}
+    assert payload["links"][0]["pose"] == [1.0, 2.5, -3.0, 0.0, 90.0, 0.0]
+    assert payload["links"][0]["target"] == str(TARGET_ID)
+    assert payload["pois"][0]["rotation"] == [0.0, 0.0, 0.0]
+    assert payload["pois"][0]["description"] is None
+
+
+def call(headers=None, scene_id=SCENE_ID):
+    space = SimpleNamespace(viewers={str(USER_ID): "Viewer"}, scenes={str(SCENE_ID): "lobby"})
+
+    async def load(space_id):
+        return space if space_id == SPACE_ID else None
+
+    request = Request({"type": "http", "method": "GET", "path": "/", "query_string": b"",
+                       "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]})
+    loader = SimpleNamespace(space_scenes=SimpleNamespace(load=load))
+    return asyncio.run(api.scene(request, str(SPACE_ID), str(scene_id),
+                                 auth_user=SimpleNamespace(id=USER_ID), loader=loader))
+
+
+def test_scene_endpoint_etag_and_revalidation(monkeypatch):
+    async def get_scene_view(scene_id):
+        return VIEW
+
+    monkeypatch.setattr(db_manager, "get_scene_view", get_scene_view)
+
+    response = call()
+    assert response.status_code == 200
+    assert json.loads(response.body)["name"] == "lobby"
+    etag = response.headers["etag"]
+    assert etag == f'"{SCENE_ID}-4-json"'
+
+    assert call({"If-None-Match": etag}).status_code == 304
+
+    with pytest.raises(HTTPException) as exc:
+        call(scene_id=ObjectId())
+    assert exc.value.status_code == 404
+
+
+def test_scene_endpoint_ignores_if_modified_since(monkeypatch):
+    async def get_scene_view(scene_id):
+        return VIEW
+
+    monkeypatch.setattr(db_manager, "get_scene_view", get_scene_view)
+
+    response = call({"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 200
+    assert "last-modified" not in response.headers
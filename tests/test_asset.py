@@ -0,0 +1,180 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson.objectid import ObjectId
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+
+from app.core.libs.byte_cache import ByteLRUCache
+from app.core.libs.disk_cache import DiskImageCache, iter_bytes
+from app.core.libs.image_http import ImageBlob, image_etag
+from app.core.models.database import db_manager
+from app.core.routers import asset
+
+
+class FakeGridOut:
+    def __init__(self, data: bytes, chunk_size: int = 4):
+        self.data = data
+        self.length = len(data)
+        self.chunk_size = chunk_size
+        self.position = 0
+        self.chunks_read = 0
+        self.upload_date = datetime(2024, 1, 1)
+        self.content_type = "image/jpeg"
+        self.metadata = None
+
+    def seek(self, position):
+        self.position = position
+
+    async def readchunk(self):
+        await asyncio.sleep(0)
+        offset = self.position % self.chunk_size
+        chunk = self.data[self.position:self.position + self.chunk_size - offset]
+        self.position += len(chunk)
+        self.chunks_read += 1
+        return chunk
+
+    async def read(self):
+        await asyncio.sleep(0.01)
+        return self.data
+
+
+@pytest.fixture
+def images(monkeypatch):
+    '''image id -> bytes in a fake GridFS; returns (store, opened GridOuts)'''
+    store, opened = {}, []
+
+    async def open_image(file_id):
+        await asyncio.sleep(0)
+        if file_id not in store:
+            return None
+        opened.append(FakeGridOut(store[file_id]))
+        return opened[-1]
+
+    monkeypatch.setattr(db_manager, "open_image", open_image)
+    monkeypatch.setattr(db_manager, "image_cache", ByteLRUCache(100, size_of=lambda blob: len(blob.content)))
+    monkeypatch.setattr(db_manager, "disk_cache", None)
+    return store, opened
+
+
+def serve(image_id, **headers):
+    request = SimpleNamespace(headers=Headers(headers))
+    return asset._serve_image(request, image_id, image_etag(image_id), True)
+
+
+async def send(response, stop_after=None):
+    '''the body as a server would send it, then the background task'''
+    if not hasattr(response, "body_iterator"):
+        return response.body
+    body = []
+    async for chunk in response.body_iterator:
+        body.append(chunk)
+        if len(body) == stop_after:
+            await response.body_iterator.aclose()
+            return b"".join(body)
+    if response.background is not None:
+        await response.background()
+    return b"".join(body)
+
+
+def test_miss_streams_chunks_and_fills_the_cache_once(images):
+    store, opened = images
+    image_id = ObjectId()
+    store[image_id] = b"panorama"
+
+    async def run():
+        responses = await asyncio.gather(*(serve(image_id) for _ in range(3)))
+        return await asyncio.gather(*(send(response) for response in responses))
+
+    assert asyncio.run(run()) == [b"panorama"] * 3
+    assert db_manager.image_cache.get(image_id).content == b"panorama"
+    assert db_manager.image_cache.filling_bytes == 0
+
+    opened.clear()
+    assert asyncio.run(send(asyncio.run(serve(image_id)))) == b"panorama"
+    assert opened == []
+
+
+def test_range_and_large_misses_are_not_cached(images):
+    store, opened = images
+    small, large = ObjectId(), ObjectId()
+    store[small], store[large] = b"panorama", b"x" * 500
+
+    response = asyncio.run(serve(small, range="bytes=0-3"))
+    assert response.status_code == 206 and asyncio.run(send(response)) == b"pano"
+    assert opened[-1].chunks_read == 1
+    assert asyncio.run(send(asyncio.run(serve(large)))) == b"x" * 500
+    assert len(db_manager.image_cache) == 0
+
+    with pytest.raises(HTTPException):
+        asyncio.run(serve(ObjectId()))
+
+
+def test_response_cut_short_caches_nothing(images):
+    store, opened = images
+    image_id = ObjectId()
+    store[image_id] = b"panorama"
+
+    assert asyncio.run(send(asyncio.run(serve(image_id)), stop_after=1)) == b"pano"
+    assert image_id not in db_manager.image_cache
+    assert db_manager.image_cache.filling_bytes == 0
+
+
+def test_disk_tier_copies_a_streamed_miss_after_the_response(images, monkeypatch, tmp_path):
+    store, opened = images
+    large = ObjectId()
+    store[large] = b"x" * 500
+    disk = DiskImageCache(tmp_path, max_bytes=4096)
+    monkeypatch.setattr(db_manager, "disk_cache", disk)
+
+    assert asyncio.run(send(asyncio.run(serve(large)))) == b"x" * 500
+    assert disk.lookup(large).path.read_bytes() == b"x" * 500
+    assert isinstance(asyncio.run(db_manager.load_image(large)), type(disk.lookup(large)))
+
+
+def test_revalidating_a_missing_image_is_not_found(images):
+    store, opened = images
+    stored, missing = ObjectId(), ObjectId()
+    store[stored] = b"panorama"
+
+    assert asyncio.run(serve(stored, **{"if-none-match": "*"})).status_code == 304
+    for headers in ({"if-none-match": "*"}, {"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"}):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(serve(missing, **headers))
+        assert exc.value.status_code == 404
+
+
+def test_revalidating_a_cached_image_skips_gridfs(images):
+    store, opened = images
+    image_id = ObjectId()
+    db_manager.image_cache.put(image_id, ImageBlob(b"panorama", "image/jpeg", datetime(2024, 1, 1)))
+
+    assert asyncio.run(serve(image_id, **{"if-none-match": image_etag(image_id)})).status_code == 304
+    assert opened == []
+
+
+def test_blob_evicted_after_the_lookup_is_read_from_gridfs(images, monkeypatch, tmp_path):
+    store, opened = images
+    small, large = ObjectId(), ObjectId()
+    store[small], store[large] = b"panorama", b"x" * 500
+    disk = DiskImageCache(tmp_path, max_bytes=4096)
+    monkeypatch.setattr(db_manager, "disk_cache", disk)
+    for image_id in (small, large):
+        asyncio.run(disk.store(image_id, iter_bytes(store[image_id]), "image/jpeg", datetime(2024, 1, 1)))
+
+    lookup = disk.lookup
+
+    def evicting_lookup(key):
+        entry = lookup(key)
+        if entry is not None:
+            entry.path.unlink()
+        return entry
+
+    monkeypatch.setattr(disk, "lookup", evicting_lookup)
+    assert isinstance(asyncio.run(db_manager.load_image(small)), FakeGridOut)
+
+    response = asyncio.run(serve(large))
+    assert response.status_code == 200 and response.headers["content-length"] == "500"
+    assert len(opened) == 2
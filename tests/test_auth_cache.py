@@ -0,0 +1,64 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+from app.core.libs.ttl_cache import TTLCache
+from app.core.models import auth_manager as auth_module
+from app.core.models.database import db_manager
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts_lru():
+    clock = Clock()
+    cache = TTLCache(max_entries=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2, ttl=60)  # capped at the cache ttl
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None  # least recently used
+    clock.now = 10
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def test_ttl_cache_discard_where():
+    cache = TTLCache(max_entries=10, ttl=10)
+    cache.put("x", SimpleNamespace(id=1))
+    cache.put("y", SimpleNamespace(id=2))
+    assert cache.discard_where(lambda user: user.id == 1) == 1
+    assert cache.get("x") is None and cache.get("y").id == 2
+
+
+def test_get_current_user_reuses_token_and_user(monkeypatch):
+    lookups = []
+    user = SimpleNamespace(id="u1", email="a@b.c")
+
+    async def get_user_by_email(email):
+        lookups.append(email)
+        return user
+
+    monkeypatch.setattr(db_manager, "get_user_by_email", get_user_by_email)
+    monkeypatch.setattr(db_manager, "user_cache", TTLCache(10, 30))
+    monkeypatch.setattr(auth_module, "token_cache", TTLCache(10, 300))
+
+    decodes = []
+    real_decode = auth_module.decode
+    monkeypatch.setattr(auth_module, "decode", lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+
+    async def run():
+        token = await auth_module.auth_manager.create_access_token({"sub": "a@b.c"}, timedelta(minutes=5))
+        first = await auth_module.get_current_user(token)
+        second = await auth_module.get_current_user(token)
+        db_manager.invalidate_users(["u1"])
+        third = await auth_module.get_current_user(token)
+        return first, second, third
+
+    assert asyncio.run(run()) == (user, user, user)
+    assert len(decodes) == 1
+    assert lookups == ["a@b.c", "a@b.c"]
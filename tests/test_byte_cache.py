@@ -0,0 +1,111 @@
+import asyncio
+
+from app.core.libs.byte_cache import ByteLRUCache
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = ByteLRUCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.current_bytes == 8
+    assert cache.evictions == 1
+
+def test_rejects_items_over_item_budget():
+    cache = ByteLRUCache(max_bytes=100, max_item_bytes=4)
+    assert cache.put("big", b"12345") is False
+    assert "big" not in cache
+    assert cache.stats()["rejected"] == 1
+
+def test_replacing_a_key_keeps_byte_count_consistent():
+    cache = ByteLRUCache(max_bytes=100)
+    cache.put("a", b"1234")
+    cache.put("a", b"12")
+    assert cache.current_bytes == 2
+    assert len(cache) == 1
+
+def test_get_or_load_coalesces_concurrent_misses():
+    cache = ByteLRUCache(max_bytes=100)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"payload"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert results == [b"payload"] * 5
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["inflight"] == 0
+
+def test_get_or_load_propagates_errors_to_waiters():
+    cache = ByteLRUCache(max_bytes=100)
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            cache.get_or_load("k", loader),
+            cache.get_or_load("k", loader),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert "k" not in cache
+
+def test_get_or_load_does_not_cache_missing_values():
+    cache = ByteLRUCache(max_bytes=100)
+
+    async def loader():
+        return None
+
+    assert asyncio.run(cache.get_or_load("k", loader)) is None
+    assert "k" not in cache
+
+def test_cancelled_loader_leaves_waiters_to_retry():
+    cache = ByteLRUCache(max_bytes=100)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"payload"
+
+    async def run():
+        first = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.gather(first, waiter, return_exceptions=True)
+
+    first, waiter = asyncio.run(run())
+    assert isinstance(first, asyncio.CancelledError)
+    assert waiter == b"payload"
+    assert len(calls) == 2 and cache.stats()["inflight"] == 0
+
+
+def test_fills_are_exclusive_and_share_one_item_budget():
+    cache = ByteLRUCache(max_bytes=20, max_item_bytes=8)
+    assert cache.begin_fill("a", 6)
+    assert not cache.begin_fill("a", 6)
+    assert not cache.begin_fill("b", 4)
+    assert cache.begin_fill("c", 2)
+
+    cache.end_fill("a", b"aaaaaa")
+    cache.end_fill("c")
+    assert cache.get("a") == b"aaaaaa" and "c" not in cache
+    assert cache.filling_bytes == 0
+    assert not cache.begin_fill("a", 6)
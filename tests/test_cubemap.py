@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.core.libs.cubemap import (
+    CUBE_FACES,
+    build_cubemap_tiles,
+    equirect_to_face,
+    tile_levels,
+    tiles_in_view,
+)
+
+
+def test_tile_levels_follow_source_resolution():
+    assert tile_levels(1440) == 1
+    assert tile_levels(4096) == 2
+    assert tile_levels(8192) == 3
+    assert tile_levels(65536) == 4
+
+def test_equirect_to_face_matches_a_sky_orientation():
+    # a-sky shows image column u=0.75 straight ahead (-Z) and u=0 to the right (+X)
+    pixels = np.zeros((64, 128, 3), dtype=np.uint8)
+    pixels[:, 92:100] = (255, 0, 0)   # around u = 0.75
+    pixels[:, :4] = (0, 0, 255)       # around u = 0
+    pixels[:, 124:] = (0, 0, 255)
+    forward = equirect_to_face(pixels, "nz", 16)
+    right = equirect_to_face(pixels, "px", 16)
+    assert tuple(forward[8, 8]) == (255, 0, 0)
+    assert tuple(right[8, 8]) == (0, 0, 255)
+
+def test_build_cubemap_tiles_produces_full_grid_per_level():
+    buffer = io.BytesIO()
+    Image.new("RGB", (512, 256), (10, 20, 30)).save(buffer, format="JPEG")
+    levels, tiles = build_cubemap_tiles(buffer.getvalue(), tile_size=32, max_levels=2)
+    assert levels == 2
+    assert len(tiles) == len(CUBE_FACES) * (1 + 4)
+    tile = Image.open(io.BytesIO(tiles[-1].content))
+    assert tile.size == (32, 32)
+
+def test_tiles_in_view_selects_only_facing_tiles():
+    visible = tiles_in_view((0, 0, -1), 60, level=2)
+    faces = {face for face, _, _ in visible}
+    assert "nz" in faces
+    assert "pz" not in faces
+    assert len(visible) < 6 * 16
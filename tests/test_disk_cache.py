@@ -0,0 +1,64 @@
+import asyncio
+import os
+from datetime import datetime
+
+from app.core.libs.disk_cache import DiskImageCache, iter_bytes
+
+
+def store(cache, key, content):
+    return asyncio.run(cache.store(key, iter_bytes(content), "image/jpeg", datetime(2024, 1, 1)))
+
+
+def test_store_and_lookup_round_trip(tmp_path):
+    cache = DiskImageCache(tmp_path, max_bytes=1024)
+    entry = store(cache, "img1", b"panorama")
+    assert entry.path.read_bytes() == b"panorama"
+
+    found = cache.lookup("img1")
+    assert found.path == entry.path
+    assert found.content_type == "image/jpeg"
+    assert found.upload_date == datetime(2024, 1, 1)
+    assert cache.lookup("missing") is None
+    assert list(cache.tmp_dir.iterdir()) == []
+
+def test_identical_content_is_stored_once(tmp_path):
+    cache = DiskImageCache(tmp_path, max_bytes=1024)
+    first = store(cache, "img1", b"same-bytes")
+    second = store(cache, "img2", b"same-bytes")
+    assert first.path == second.path
+    assert cache.current_bytes == len(b"same-bytes")
+
+def test_evicts_least_recently_used_blob(tmp_path):
+    cache = DiskImageCache(tmp_path, max_bytes=10)
+    old = store(cache, "old", b"aaaaaa")
+    os.utime(old.path, (1, 1))
+    store(cache, "new", b"bbbbbb")
+    assert cache.lookup("old") is None
+    assert cache.lookup("new") is not None
+    assert cache.current_bytes == 6
+
+def test_purge_and_stale_partials(tmp_path):
+    cache = DiskImageCache(tmp_path, max_bytes=1024)
+    store(cache, "img1", b"data")
+    partial = cache.tmp_dir / "crashed.part"
+    partial.write_bytes(b"half")
+    os.utime(partial, (1, 1))
+
+    reopened = DiskImageCache(tmp_path, max_bytes=1024)
+    assert not partial.exists()
+    assert reopened.current_bytes == 4
+
+    reopened.purge()
+    assert reopened.lookup("img1") is None
+    assert reopened.current_bytes == 0
+
+def test_counters_stay_exact_across_threadpool_lookups(tmp_path):
+    cache = DiskImageCache(tmp_path, max_bytes=1024)
+    store(cache, "img1", b"data")
+
+    async def run():
+        return await asyncio.gather(*(cache.get(key) for key in ["img1", "missing"] * 50))
+
+    results = asyncio.run(run())
+    assert sum(entry is not None for entry in results) == 50
+    assert (cache.hits, cache.misses) == (50, 50)
@@ -0,0 +1,73 @@
+import asyncio
+
+from bson.objectid import ObjectId
+
+from app.core.models.database import db_manager
+from app.core.schemas.user_model import UserInDB
+from tests.conftest import FakeCursor
+
+
+class FakeSpaces:
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        wanted = set(query["_id"]["$in"])
+        return FakeCursor([d for d in self.documents if d["_id"] in wanted])
+
+
+def setup(fake_collections, documents):
+    spaces = fake_collections["spaces"] = FakeSpaces(documents)
+    return spaces
+
+
+def test_get_spaces_uses_one_query_and_skips_deleted(fake_collections):
+    first, second, deleted = ObjectId(), ObjectId(), ObjectId()
+    spaces = setup(fake_collections, [
+        {"_id": second, "name": "b", "explain": "B"},
+        {"_id": first, "name": "a", "explain": "A"},
+    ])
+    user = UserInDB(email="u@x.io", userid="u",
+                    spaces={str(first): "Editor", str(deleted): "Viewer", str(second): "Viewer"})
+
+    result = asyncio.run(db_manager.get_spaces(user))
+
+    assert len(spaces.queries) == 1
+    assert list(result) == [str(first), str(second)]
+    assert result[str(first)] == ["a", "A", "Editor", 0]
+
+
+def test_get_spaces_paginates_sorted(fake_collections):
+    ids = [ObjectId() for _ in range(3)]
+    setup(fake_collections, [{"_id": oid, "name": name, "explain": ""} for oid, name in zip(ids, "cab")])
+    user = UserInDB(email="u@x.io", userid="u", spaces={str(oid): "Viewer" for oid in ids})
+
+    result = asyncio.run(db_manager.get_spaces(user, skip=1, limit=1, sort="-name"))
+
+    assert [value[0] for value in result.values()] == ["b"]
+
+
+def test_get_spaces_skips_memberships_without_a_role(fake_collections):
+    member, roleless, upper = ObjectId(), ObjectId(), ObjectId()
+    setup(fake_collections, [{"_id": oid, "name": name, "explain": ""}
+                             for oid, name in ((member, "a"), (roleless, "b"), (upper, "c"))])
+    user = UserInDB(email="u@x.io", userid="u",
+                    spaces={str(member): "Viewer", str(roleless): "", str(upper).upper(): "Editor"})
+
+    result = asyncio.run(db_manager.get_spaces(user))
+
+    assert result == {str(member): ["a", "", "Viewer", 0], str(upper): ["c", "", "Editor", 0]}
+
+
+def test_get_spaces_pages_past_deleted_spaces(fake_collections):
+    ids = [ObjectId() for _ in range(5)]
+    deleted = {ids[0], ids[2]}
+    setup(fake_collections, [{"_id": oid, "name": str(index), "explain": ""}
+                             for index, oid in enumerate(ids) if oid not in deleted])
+    user = UserInDB(email="u@x.io", userid="u", spaces={str(oid): "Viewer" for oid in ids})
+
+    pages = [asyncio.run(db_manager.get_spaces(user, skip=skip, limit=2)) for skip in (0, 2)]
+
+    assert [[value[0] for value in page.values()] for page in pages] == [["1", "3"], ["4"]]
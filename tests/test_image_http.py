@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from bson.objectid import ObjectId
+from fastapi import HTTPException
+
+from app.core.libs.image_http import (
+    http_date,
+    image_etag,
+    is_not_modified,
+    iter_gridout,
+    parse_range,
+    range_applies,
+)
+
+
+class FakeGridOut:
+    def __init__(self, data: bytes, chunk_size: int):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.position = 0
+
+    def seek(self, pos):
+        self.position = pos
+
+    async def readchunk(self):
+        offset = self.position % self.chunk_size
+        chunk = self.data[self.position:self.position + self.chunk_size - offset]
+        self.position += len(chunk)
+        return chunk
+
+
+def collect(gridout, start, end):
+    async def run():
+        return [chunk async for chunk in iter_gridout(gridout, start, end)]
+    return asyncio.run(run())
+
+
+def test_parse_range_without_header_returns_none():
+    assert parse_range(None, 100) is None
+
+def test_parse_range_explicit_and_open_ended():
+    assert parse_range("bytes=10-19", 100) == (10, 19)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=90-500", 100) == (90, 99)
+
+def test_parse_range_suffix():
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+
+def test_parse_range_ignores_malformed_and_multi_range():
+    assert parse_range("bytes=abc", 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+
+def test_parse_range_unsatisfiable():
+    with pytest.raises(HTTPException) as exc:
+        parse_range("bytes=100-", 100)
+    assert exc.value.status_code == 416
+    assert exc.value.headers["Content-Range"] == "bytes */100"
+
+def test_iter_gridout_streams_requested_slice_by_chunk():
+    data = bytes(range(100))
+    chunks = collect(FakeGridOut(data, chunk_size=16), 10, 40)
+    assert b"".join(chunks) == data[10:41]
+    assert max(len(chunk) for chunk in chunks) <= 16
+
+def test_is_not_modified_matches_etag_list_and_weak_tags():
+    etag = image_etag(ObjectId())
+    stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert is_not_modified({"if-none-match": f'"other", W/{etag}'}, etag, stamp)
+    assert is_not_modified({"if-none-match": "*"}, etag, stamp)
+    assert not is_not_modified({"if-none-match": '"other"'}, etag, stamp)
+
+def test_is_not_modified_if_none_match_takes_precedence():
+    etag = image_etag(ObjectId())
+    stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    headers = {"if-none-match": '"other"', "if-modified-since": http_date(stamp)}
+    assert not is_not_modified(headers, etag, stamp)
+
+def test_is_not_modified_by_date():
+    etag = image_etag(ObjectId())
+    stamp = datetime(2024, 1, 1, 12, 0, 0, 500000)
+    assert is_not_modified({"if-modified-since": http_date(stamp)}, etag, stamp)
+    earlier = http_date(datetime(2023, 12, 31, tzinfo=timezone.utc))
+    assert not is_not_modified({"if-modified-since": earlier}, etag, stamp)
+    assert not is_not_modified({"if-modified-since": "garbage"}, etag, stamp)
+
+def test_range_applies_checks_if_range_validator():
+    etag = image_etag(ObjectId())
+    stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert range_applies({}, etag, stamp)
+    assert range_applies({"if-range": etag}, etag, stamp)
+    assert not range_applies({"if-range": '"stale"'}, etag, stamp)
+    assert range_applies({"if-range": http_date(stamp)}, etag, stamp)
+
+def test_is_not_modified_without_a_date_uses_the_etag_only():
+    etag = '"abc"'
+    assert not is_not_modified({"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"}, etag, None)
+    assert is_not_modified({"if-none-match": etag}, etag, None)
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+
+from app.core.libs.scene_graph import SceneGraph
+from app.core.models import invalidation
+from app.core.models.database import db_manager
+from app.core.models.invalidation import invalidation_manager
+from app.core.schemas.user_model import UserInDB
+from tests.conftest import FakeCursor
+
+
+def change(coll, document_id, operation="update", fields=None):
+    return {"ns": {"coll": coll}, "documentKey": {"_id": document_id}, "operationType": operation,
+            "updateDescription": {"updatedFields": fields or {}}}
+
+
+def test_changes_evict_the_matching_entries():
+    user = UserInDB(email="u@x.io", _id=ObjectId())
+    space_id, scene_id, other_space = ObjectId(), ObjectId(), ObjectId()
+    db_manager.user_cache.put(user.email, user)
+    db_manager.scene_graphs.put(space_id, SceneGraph([scene_id]))
+    db_manager.scene_graphs.put(other_space, SceneGraph([ObjectId()]))
+
+    invalidation_manager.handle_change(change("users", user.id))
+    invalidation_manager.handle_change(change("scenes", scene_id))
+
+    assert db_manager.user_cache.peek(user.email) is None
+    assert db_manager.scene_graphs.peek(space_id) is None
+    assert db_manager.scene_graphs.peek(other_space) is not None
+
+    # a pose edit leaves graphs alone, a new target does not
+    invalidation_manager.handle_change(change("links", ObjectId(), fields={"x": 1}))
+    assert db_manager.scene_graphs.peek(other_space) is not None
+    invalidation_manager.handle_change(change("links", ObjectId(), fields={"target_id": ObjectId()}))
+    assert db_manager.scene_graphs.peek(other_space) is None
+
+
+def test_change_without_document_flushes():
+    db_manager.scene_graphs.put(ObjectId(), SceneGraph())
+    flushes = invalidation_manager.flushes
+    invalidation_manager.handle_change({"operationType": "dropDatabase"})
+    assert invalidation_manager.flushes == flushes + 1
+    assert db_manager.scene_graphs.stats()["entries"] == 0
+
+
+class FakeUpdated:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection):
+        return FakeCursor(self.documents)
+
+
+def test_poll_once_dispatches_each_write_once(monkeypatch, fake_collections):
+    scene_id, stamp = ObjectId(), datetime(2024, 1, 1)
+    documents = {"users": [], "spaces": [], "scenes": [{"_id": scene_id, "updated_at": stamp}]}
+    fake_collections.update({name: FakeUpdated(documents[name]) for name in documents})
+    dispatched = []
+    monkeypatch.setattr(invalidation_manager, "dispatch",
+                        classmethod(lambda cls, coll, document_id, change=None: dispatched.append((coll, document_id))))
+
+    seen = asyncio.run(invalidation_manager.poll_once(stamp, {}))
+    seen = asyncio.run(invalidation_manager.poll_once(stamp, seen))
+    assert dispatched == [("scenes", scene_id)]
+
+    documents["scenes"][0] = {"_id": scene_id, "updated_at": datetime(2024, 1, 2)}
+    asyncio.run(invalidation_manager.poll_once(stamp, seen))
+    assert len(dispatched) == 2
+
+
+def test_falls_back_to_polling_without_replica_set(monkeypatch):
+    calls = []
+
+    async def watch():
+        calls.append("watch")
+        raise OperationFailure("not a replica set", code=invalidation.CHANGE_STREAMS_UNSUPPORTED)
+
+    async def poll():
+        calls.append("poll")
+
+    monkeypatch.setattr(invalidation_manager, "watch", watch)
+    monkeypatch.setattr(invalidation_manager, "poll", poll)
+    asyncio.run(invalidation_manager.run("auto"))
+    asyncio.run(invalidation_manager.run("change_stream"))
+    assert calls == ["watch", "poll", "watch"]
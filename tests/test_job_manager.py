@@ -0,0 +1,186 @@
+import asyncio
+import copy
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import pytest
+from bson.objectid import ObjectId
+
+from app.core.config import settings
+from app.core.models import job_manager as jobs_module
+from app.core.models.database import db_manager
+from app.core.models.job_manager import job_manager
+from tests.conftest import matches
+
+
+def apply(document, update):
+    document.update(update.get('$set', {}))
+    for field, amount in update.get('$inc', {}).items():
+        document[field] = document.get(field, 0) + amount
+
+
+class FakeJobs:
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+
+    async def find_one_and_update(self, query, update, sort=None, return_document=False):
+        found = [document for document in self.documents if matches(document, query)]
+        for field, direction in reversed(sort or []):
+            found.sort(key=lambda document: document[field], reverse=direction < 0)
+        if not found:
+            return None
+        before = copy.deepcopy(found[0])
+        apply(found[0], update)
+        return copy.deepcopy(found[0]) if return_document else before
+
+    async def update_one(self, query, update):
+        for document in self.documents:
+            if matches(document, query):
+                apply(document, update)
+                return
+
+
+def job(status="pending", attempts=0, age=0, lease=None, **extra):
+    now = datetime.utcnow()
+    return {"_id": ObjectId(), "image_id": ObjectId(), "scene_id": ObjectId(), "kind": "pyramid",
+            "status": status, "attempts": attempts, "error": None, "created_at": now - timedelta(seconds=age),
+            "lease_until": now + timedelta(seconds=lease) if lease is not None else None, **extra}
+
+
+@pytest.fixture
+def ready(monkeypatch):
+    '''scene ids marked ready without derived images'''
+    marked = []
+
+    async def mark_scene_ready(scene_id, variants):
+        marked.append((scene_id, variants))
+
+    monkeypatch.setattr(db_manager, "mark_scene_ready", mark_scene_ready)
+    return marked
+
+
+@pytest.fixture
+def image(monkeypatch):
+    class GridOut:
+        async def read(self):
+            return b"image"
+
+    async def open_image(image_id):
+        return GridOut()
+
+    monkeypatch.setattr(db_manager, "open_image", open_image)
+
+
+def test_claim_takes_the_oldest_pending_job(fake_collections, ready):
+    newer, older = job(age=1), job(age=5)
+    fake_collections["image_jobs"] = FakeJobs([newer, older])
+
+    claimed = asyncio.run(job_manager.claim())
+
+    assert claimed["_id"] == older["_id"]
+    assert claimed["status"] == "running" and claimed["attempts"] == 1
+    assert claimed["lease_until"] > datetime.utcnow()
+    assert newer["status"] == "pending"
+
+
+def test_claim_retakes_expired_leases_and_fails_abandoned_last_attempts(fake_collections, ready):
+    leased = job("running", attempts=1, age=9, lease=60)
+    expired = job("running", attempts=1, age=5, lease=-1)
+    abandoned = job("running", attempts=settings.IMAGE_JOB_MAX_ATTEMPTS, age=7, lease=-1)
+    fake_collections["image_jobs"] = FakeJobs([leased, expired, abandoned])
+
+    claimed = asyncio.run(job_manager.claim())
+
+    assert claimed["_id"] == expired["_id"] and claimed["attempts"] == 2
+    assert abandoned["status"] == "failed" and abandoned["lease_until"] is None
+    assert ready == [(abandoned["scene_id"], None)]
+    assert leased["status"] == "running"
+    assert asyncio.run(job_manager.claim()) is None
+
+
+def test_failed_job_retries_then_fails_and_marks_the_scene_ready(monkeypatch, fake_collections, ready, image):
+    def explode(contents):
+        raise RuntimeError("decoder crashed")
+
+    monkeypatch.setitem(jobs_module.PROCESSORS, "pyramid", explode)
+    monkeypatch.setattr(job_manager, "executor", None)
+    running = job("running", attempts=1)
+    fake_collections["image_jobs"] = FakeJobs([running])
+
+    asyncio.run(job_manager.run_job(dict(running)))
+    assert running["status"] == "pending" and running["error"] == "decoder crashed"
+    assert ready == []
+
+    running.update(status="running", attempts=settings.IMAGE_JOB_MAX_ATTEMPTS)
+    asyncio.run(job_manager.run_job(dict(running)))
+    assert running["status"] == "failed"
+    assert ready == [(running["scene_id"], None)]
+
+
+def test_cancelled_job_gives_its_attempt_back(monkeypatch, fake_collections, ready):
+    started = []
+
+    async def open_image(image_id):
+        started.append(image_id)
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(db_manager, "open_image", open_image)
+    running = job("running", attempts=2, lease=60)
+    fake_collections["image_jobs"] = FakeJobs([running])
+
+    async def run():
+        task = asyncio.create_task(job_manager.run_job(dict(running)))
+        while not started:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert running["status"] == "pending" and running["attempts"] == 1
+    assert running["lease_until"] is None
+
+
+class BrokenPool:
+    instances = []
+
+    def __init__(self, max_workers):
+        BrokenPool.instances.append(self)
+        self.shut = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("child killed"))
+        return future
+
+    def shutdown(self, wait, cancel_futures):
+        self.shut = True
+
+
+def test_broken_pool_is_replaced_and_the_attempt_given_back(monkeypatch, fake_collections, ready, image):
+    monkeypatch.setattr(jobs_module, "ProcessPoolExecutor", BrokenPool)
+    broken = BrokenPool(1)
+    monkeypatch.setattr(job_manager, "executor", broken)
+    running = job("running", attempts=1)
+    fake_collections["image_jobs"] = FakeJobs([running])
+
+    asyncio.run(job_manager.run_job(dict(running)))
+
+    assert broken.shut and job_manager.executor is BrokenPool.instances[-1] is not broken
+    assert running["status"] == "pending" and running["attempts"] == 0 and running["crashes"] == 1
+    assert ready == []
+
+
+def test_lease_is_renewed_while_the_job_runs(monkeypatch, fake_collections):
+    monkeypatch.setattr(settings, "IMAGE_JOB_LEASE_SECONDS", 0.3)
+    running = job("running", attempts=1, lease=-1)
+    fake_collections["image_jobs"] = FakeJobs([running])
+
+    async def run():
+        task = asyncio.create_task(job_manager.keep_leased(running["_id"]))
+        await asyncio.sleep(0.15)
+        task.cancel()
+
+    asyncio.run(run())
+    assert running["lease_until"] > datetime.utcnow()
@@ -0,0 +1,132 @@
+import asyncio
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+from pymongo import DeleteMany, InsertOne, UpdateOne
+
+from app.core.models.database import db_manager
+from tests.conftest import FakeCursor
+
+
+class FakeCollection:
+    def __init__(self, document=None):
+        self.document = document
+        self.calls = []
+
+    async def find_one(self, *args, **kwargs):
+        self.calls.append(("find_one", args))
+        return self.document
+
+    async def bulk_write(self, operations, ordered):
+        self.calls.append(("bulk_write", operations, ordered))
+        return SimpleNamespace(
+            matched_count=sum(isinstance(op, UpdateOne) for op in operations),
+            modified_count=sum(isinstance(op, UpdateOne) for op in operations),
+            inserted_count=sum(isinstance(op, InsertOne) for op in operations),
+            deleted_count=1,
+        )
+
+    async def update_one(self, query, update):
+        self.calls.append(("update_one", query, update))
+
+    def find(self, *args, **kwargs):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+
+def setup(monkeypatch, fake_collections, scene):
+    fake_collections.update(scenes=FakeCollection(scene), links=FakeCollection(), spaces=FakeCollection())
+
+    async def noop(scene_id):
+        return None
+
+    monkeypatch.setattr(db_manager, "rebuild_scene_view", noop)
+    monkeypatch.setattr(db_manager, "rebuild_referrer_views", noop)
+    return fake_collections
+
+
+def test_update_scene_batches_link_writes(monkeypatch, fake_collections):
+    scene_id, space_id, target = ObjectId(), ObjectId(), ObjectId()
+    kept, dropped = ObjectId(), ObjectId()
+    collections = setup(monkeypatch, fake_collections, {"_id": scene_id, "links": [kept, dropped]})
+    form = SimpleNamespace(
+        scene_name="renamed",
+        scene=[f"{target}.{kept}", f"{target}.", f"{target}."],
+        x=[1, 2, 3], y=[0, 0, 0], z=[0, 0, 0], yaw=[0, 0, 0], pitch=[0, 0, 0], roll=[0, 0, 0],
+    )
+
+    summary = asyncio.run(db_manager.update_scene(form, space_id=space_id, scene_id=scene_id))
+
+    (_, operations, ordered), = [call for call in collections["links"].calls if call[0] == "bulk_write"]
+    assert ordered is False
+    assert [type(op) for op in operations] == [UpdateOne, InsertOne, InsertOne, DeleteMany]
+    scene_updates = [call[2] for call in collections["scenes"].calls if call[0] == "update_one"]
+    assert scene_updates[0] == {"$set": {"name": "renamed"}, "$pull": {"links": {"$in": [dropped]}}}
+    assert len(scene_updates[1]["$push"]["links"]["$each"]) == 2
+    assert summary["added"] == 2 and summary["removed"] == 1
+    assert summary["links"]["inserted"] == 2
+
+
+def test_update_link_poses_is_one_bulk_write(monkeypatch, fake_collections):
+    collections = setup(monkeypatch, fake_collections, None)
+    poses = {ObjectId(): {"x": i} for i in range(5)}
+
+    summary = asyncio.run(db_manager.update_link_poses(poses))
+
+    assert [call[0] for call in collections["links"].calls] == ["bulk_write"]
+    assert summary["matched"] == 5
+
+
+def test_update_scene_bumps_scene_and_space_versions_once(monkeypatch, fake_collections):
+    scene_id, space_id, target, kept = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    collections = setup(monkeypatch, fake_collections, {"_id": scene_id, "links": [kept]})
+    form = SimpleNamespace(scene_name="renamed", scene=[f"{target}.{kept}", f"{target}."],
+                           x=[1, 2], y=[0, 0], z=[0, 0], yaw=[0, 0], pitch=[0, 0], roll=[0, 0])
+
+    asyncio.run(db_manager.update_scene(form, space_id=space_id, scene_id=scene_id))
+
+    scene_updates = [call[2] for call in collections["scenes"].calls if call[0] == "update_one"]
+    # only the last scene write moves the version
+    assert [("$inc" in update) for update in scene_updates] == [False, True]
+    assert scene_updates[-1]["$inc"] == {"version": 1} and "updated_at" in scene_updates[-1]["$set"]
+    (_, query, space_update), = collections["spaces"].calls
+    assert space_update["$set"][f"scenes.{scene_id}"] == "renamed"
+    assert space_update["$inc"] == {"version": 1}
+
+
+class FakeWrites:
+    def __init__(self, found=()):
+        self.found = found
+        self.calls = []
+
+    def find(self, query, projection):
+        return FakeCursor(self.found)
+
+    def __getattr__(self, name):
+        async def write(*args):
+            self.calls.append((name, *args))
+        return write
+
+
+def test_delete_scene_pulls_and_versions_the_referring_scenes(monkeypatch, fake_collections):
+    scene_id, space_id, referrer, link_id = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    fake_collections.update(links=FakeWrites([{"_id": link_id}]), scenes=FakeWrites([{"_id": referrer}]),
+                            pois=FakeWrites(), spaces=FakeWrites(), scene_views=FakeWrites())
+    rebuilt = []
+
+    async def rebuild(scene):
+        rebuilt.append(scene)
+
+    monkeypatch.setattr(db_manager, "rebuild_scene_view", rebuild)
+
+    asyncio.run(db_manager.delete_scene(space_id, scene_id))
+
+    (_, query, update), = [call for call in fake_collections["scenes"].calls if call[0] == "update_many"]
+    assert query == {"_id": {"$in": [referrer]}}
+    assert update["$pull"] == {"links": {"$in": [link_id]}} and update["$inc"] == {"version": 1}
+    assert rebuilt == [referrer]
@@ -0,0 +1,84 @@
+import asyncio
+
+from app.core.models.loader import BatchLoader
+
+
+def make_loader(values):
+    calls = []
+
+    async def batch(keys):
+        calls.append(list(keys))
+        return {key: values[key] for key in keys if key in values}
+
+    return BatchLoader(batch), calls
+
+
+def test_concurrent_loads_are_batched_and_deduplicated():
+    loader, calls = make_loader({"a": 1, "b": 2})
+
+    async def run():
+        results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), loader.load("x"))
+        again = await loader.load("b")
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert results == [1, 2, 1, None]
+    assert again == 2
+    assert calls == [["a", "b", "x"]]
+
+
+def test_prime_skips_fetch_and_clear_refetches():
+    loader, calls = make_loader({"a": 1})
+
+    async def run():
+        loader.prime("a", "cached")
+        first = await loader.load("a")
+        loader.clear("a")
+        second = await loader.load("a")
+        return first, second
+
+    assert asyncio.run(run()) == ("cached", 1)
+    assert calls == [["a"]]
+
+
+def test_batch_errors_reach_every_waiter_and_are_not_cached():
+    attempts = []
+
+    async def batch(keys):
+        attempts.append(keys)
+        if len(attempts) == 1:
+            raise RuntimeError("down")
+        return {key: key.upper() for key in keys}
+
+    loader = BatchLoader(batch)
+
+    async def run():
+        results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        return await loader.load("a")
+
+    assert asyncio.run(run()) == "A"
+
+
+def test_dispatched_batches_are_held_until_they_finish():
+    release = None
+
+    async def batch(keys):
+        await release.wait()
+        return {key: key for key in keys}
+
+    loader = BatchLoader(batch)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        pending = loader.load("a")
+        await asyncio.sleep(0)
+        held = len(loader._pending)
+        release.set()
+        await pending
+        await asyncio.sleep(0)
+        return held
+
+    assert asyncio.run(run()) == 1
+    assert not loader._pending
@@ -0,0 +1,40 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.core.libs.panorama import build_pyramid, choose_level
+
+
+def make_jpeg(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (120, 80, 40)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_build_pyramid_only_derives_levels_below_source_width():
+    size, derivatives = build_pyramid(make_jpeg(3000, 1500))
+    assert size == (3000, 1500)
+    levels = [d for d in derivatives if d.kind == "level"]
+    assert [(d.width, d.height) for d in levels] == [(1024, 512), (2048, 1024)]
+    placeholder = [d for d in derivatives if d.kind == "placeholder"][0]
+    assert placeholder.width == 64
+    assert len(placeholder.content) < len(levels[0].content)
+    assert Image.open(io.BytesIO(levels[1].content)).size == (2048, 1024)
+
+def test_build_pyramid_rejects_non_images():
+    with pytest.raises(ValueError):
+        build_pyramid(b"not an image")
+
+def test_choose_level_picks_nearest_level_at_or_above_width():
+    levels = [
+        {"width": 1024, "image_id": "a"},
+        {"width": 4096, "image_id": "c"},
+        {"width": 2048, "image_id": "b"},
+    ]
+    placeholder = {"width": 64, "image_id": "p"}
+    assert choose_level(levels, 2000)["image_id"] == "b"
+    assert choose_level(levels, 2048)["image_id"] == "b"
+    assert choose_level(levels, 9000)["image_id"] == "c"
+    assert choose_level(levels, 32, placeholder)["image_id"] == "p"
+    assert choose_level([], 100) is None
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.libs.password_pool import PasswordPool
+
+
+def test_hash_and_verify_round_trip_off_loop():
+    pool = PasswordPool(workers=1, max_pending=2)
+
+    async def run():
+        hashed = await pool.hash("secret")
+        return await pool.verify("secret", hashed), await pool.verify("wrong", hashed)
+
+    assert asyncio.run(run()) == (True, False)
+    assert pool.stats()["completed"] == 3
+    pool.shutdown()
+
+
+def test_saturated_pool_rejects_with_429():
+    pool = PasswordPool(workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def run():
+        blocked = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(lambda: None)
+        stats = pool.stats()
+        release.set()
+        await asyncio.gather(*blocked)
+        return exc.value, stats
+
+    error, stats = asyncio.run(run())
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == "1"
+    assert stats["pending"] == 2 and stats["queued"] == 1 and stats["rejected"] == 1
+    assert pool.stats()["pending"] == 0
+    pool.shutdown()
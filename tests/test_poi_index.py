@@ -0,0 +1,125 @@
+import asyncio
+import json
+import math
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson.objectid import ObjectId
+from starlette.requests import Request
+
+from app.core.libs.poi_index import LOD_FULL, LOD_LABEL, LOD_MARKER, PoiIndex, direction, yaw_half_width
+from app.core.models.database import SCENE_VIEW_SCHEMA, db_manager
+from app.core.routers import api
+from tests.conftest import FakeViews
+
+
+def poi(x, y, z, title="p"):
+    return {"poi_id": ObjectId(), "type": "info", "title": title, "description": "d",
+            "position": {"x": x, "y": y, "z": z}, "rotation": {"x": 0, "y": 0, "z": 0}, "scale": {"x": 1, "y": 1, "z": 1}}
+
+
+def at(yaw, pitch, distance=3.0, title="p"):
+    '''POI placed in a camera direction'''
+    yaw_r, pitch_r = math.radians(yaw), math.radians(pitch)
+    return poi(-distance * math.cos(pitch_r) * math.sin(yaw_r), distance * math.sin(pitch_r),
+               -distance * math.cos(pitch_r) * math.cos(yaw_r), title)
+
+
+def test_direction_follows_the_aframe_camera():
+    assert direction({"x": 0, "y": 0, "z": -3})[:2] == pytest.approx((0, 0))
+    assert direction({"x": -3, "y": 0, "z": 0}).yaw == pytest.approx(90)
+    assert direction({"x": 0, "y": 3, "z": 0}).pitch == pytest.approx(90)
+    assert direction({"x": "bad"}).distance == 0
+
+
+def test_query_culls_and_orders_by_offset():
+    front, left, behind = at(0, 0, title="front"), at(40, 5, title="left"), at(180, 0, title="behind")
+    index = PoiIndex([behind, left, front])
+    titles = [item.poi["title"] for item in index.query(0, 0, 120, 90)]
+    assert titles == ["front", "left"]
+    # the window wraps around yaw 180
+    assert [item.poi["title"] for item in index.query(-170, 0, 60, 60)] == ["behind"]
+
+
+def test_query_matches_brute_force():
+    rng = random.Random(7)
+    pois = [at(rng.uniform(-180, 180), rng.uniform(-89, 89), rng.uniform(1, 20)) for _ in range(2000)]
+    index = PoiIndex(pois)
+    for yaw, pitch, hfov, vfov in [(0, 0, 90, 60), (170, 10, 100, 80), (-45, 80, 120, 60), (30, -60, 360, 180)]:
+        half_v = vfov / 2
+        expected = set()
+        for position, heading in enumerate(index.directions):
+            if not max(pitch - half_v, -90) <= heading.pitch <= min(pitch + half_v, 90):
+                continue
+            if abs((heading.yaw - yaw + 180) % 360 - 180) <= yaw_half_width(min(hfov, 360) / 2, heading.pitch):
+                expected.add(position)
+        found = [pois.index(item.poi) for item in index.query(yaw, pitch, hfov, vfov)]
+        assert set(found) == expected
+        offsets = [item.offset for item in index.query(yaw, pitch, hfov, vfov)]
+        assert offsets == sorted(offsets)
+
+
+def test_level_of_detail_by_distance_and_offset():
+    index = PoiIndex([at(0, 0, 3, "near"), at(50, 0, 3, "side"), at(0, 0, 10, "mid"), at(5, 0, 30, "far")])
+    lods = {item.poi["title"]: item.lod for item in index.query(0, 0, 120, 90, near=6, far=15)}
+    assert lods == {"near": LOD_FULL, "side": LOD_LABEL, "mid": LOD_LABEL, "far": LOD_MARKER}
+
+
+SPACE_ID, SCENE_ID, USER_ID = ObjectId(), ObjectId(), ObjectId()
+
+
+def call_pois(monkeypatch, index, **params):
+    async def get_poi_index(scene_id, view=None):
+        return index
+
+    async def load(space_id):
+        return SimpleNamespace(viewers={str(USER_ID): "Viewer"}, scenes={str(SCENE_ID): "lobby"})
+
+    monkeypatch.setattr(db_manager, "get_poi_index", get_poi_index)
+    query = "&".join(f"{key}={value}" for key, value in params.items()).encode()
+    request = Request({"type": "http", "method": "GET", "path": "/", "query_string": query, "headers": []})
+    loader = SimpleNamespace(space_scenes=SimpleNamespace(load=load))
+    arguments = {"yaw": 0.0, "pitch": 0.0, "hfov": 120.0, "vfov": 90.0, "lod": LOD_FULL, "limit": 100, "cursor": 0}
+    arguments.update(params)
+    response = asyncio.run(api.scene_pois(request, str(SPACE_ID), str(SCENE_ID),
+                                          auth_user=SimpleNamespace(id=USER_ID), loader=loader, **arguments))
+    return json.loads(response.body)
+
+
+def test_pois_endpoint_pages_and_caps_detail(monkeypatch):
+    index = PoiIndex([at(offset, 0) for offset in range(0, 50, 5)], version=3, built_at=datetime(2024, 1, 1))
+
+    first = call_pois(monkeypatch, index, limit=4)
+    assert first["total"] == 10 and first["next"] == 4 and first["version"] == 3
+    assert first["pois"][0]["description"] == "d"
+
+    last = call_pois(monkeypatch, index, limit=4, cursor=8, lod=LOD_MARKER)
+    assert last["next"] is None and len(last["pois"]) == 2
+    assert "title" not in last["pois"][0] and last["pois"][0]["lod"] == LOD_MARKER
+
+
+def test_poi_index_cached_until_the_view_changes(monkeypatch, fake_collections):
+    view = {"_id": SCENE_ID, "version": 1, "schema": SCENE_VIEW_SCHEMA, "built_at": datetime(2024, 1, 1)}
+    views = fake_collections["scene_views"] = FakeViews()
+    views.documents[SCENE_ID] = view
+    pois = [at(0, 0)]
+    reads = []
+
+    async def get_scene_pois(scene_id, visible=None):
+        reads.append(visible)
+        return list(pois)
+
+    monkeypatch.setattr(db_manager, "get_scene_pois", get_scene_pois)
+    db_manager.poi_indexes.discard(SCENE_ID)
+
+    first = asyncio.run(db_manager.get_poi_index(SCENE_ID))
+    assert asyncio.run(db_manager.get_poi_index(SCENE_ID)) is first
+    assert views.projections[-1] == {"version": 1, "schema": 1, "built_at": 1}
+    assert reads == [True]
+
+    view["version"] = 2
+    pois.append(at(10, 0))
+    second = asyncio.run(db_manager.get_poi_index(SCENE_ID))
+    assert second is not first and len(second) == 2 and second.version == 2
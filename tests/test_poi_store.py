@@ -0,0 +1,96 @@
+import asyncio
+
+from bson.objectid import ObjectId
+
+from app.core.config import settings
+from app.core.models.database import db_manager
+from tests.conftest import FakeCursor, FakeViews, matches
+
+
+SCENE_ID = ObjectId()
+
+
+class FakePois:
+    def __init__(self, documents=()):
+        self.documents = [dict(document) for document in documents]
+
+    def find(self, query, projection=None):
+        hidden = [field for field, flag in (projection or {}).items() if not flag]
+        return FakeCursor([{key: value for key, value in document.items() if key not in hidden}
+                           for document in self.documents if matches(document, query)])
+
+    async def count_documents(self, query):
+        return sum(1 for document in self.documents if matches(document, query))
+
+    async def bulk_write(self, operations, ordered):
+        for operation in operations:
+            if not any(matches(document, operation._filter) for document in self.documents):
+                self.documents.append({**operation._filter, **operation._doc['$setOnInsert']})
+
+
+class FakeScenes:
+    def __init__(self, pois):
+        self.pois = list(pois)
+
+    async def find_one(self, query, projection=None):
+        return {'_id': query['_id'], 'pois': list(self.pois)}
+
+    async def update_one(self, query, update):
+        if '$pull' in update:
+            pulled = update['$pull']['pois']['poi_id']['$in']
+            self.pois = [poi for poi in self.pois if poi.get('poi_id') not in pulled]
+
+
+def poi(title, type="info", visible=True, scene_id=SCENE_ID):
+    return {"poi_id": ObjectId(), "scene_id": scene_id, "type": type, "title": title, "visible": visible}
+
+
+def setup(fake_collections, documents=(), embedded=()):
+    fake_collections.update(pois=FakePois(documents), scenes=FakeScenes(embedded))
+    return fake_collections
+
+
+def test_get_scene_pois_filters_and_pages(fake_collections):
+    documents = [poi("a"), poi("b", type="link"), poi("c", visible=False), poi("d"), poi("other", scene_id=ObjectId())]
+    legacy = {"poi_id": ObjectId(), "scene_id": SCENE_ID, "type": "info", "title": "e"}  # no visible flag
+    setup(fake_collections, documents + [legacy])
+
+    first = asyncio.run(db_manager.get_scene_pois(SCENE_ID, limit=2))
+    assert [item["title"] for item in first] == ["a", "b"]
+    assert "scene_id" not in first[0]
+    rest = asyncio.run(db_manager.get_scene_pois(SCENE_ID, after=first[-1]["poi_id"]))
+    assert [item["title"] for item in rest] == ["c", "d", "e"]
+
+    visible = asyncio.run(db_manager.get_scene_pois(SCENE_ID, visible=True))
+    assert [item["title"] for item in visible] == ["a", "b", "d", "e"]
+    assert [item["title"] for item in asyncio.run(db_manager.get_scene_pois(SCENE_ID, type="link"))] == ["b"]
+    assert asyncio.run(db_manager.count_scene_pois(SCENE_ID, visible=False)) == 1
+
+
+def test_migrate_scene_pois_keeps_moved_pois_and_pulls_only_their_ids(fake_collections):
+    moved, fresh, unnamed = poi("moved"), poi("fresh"), {"title": "no id"}
+    embedded = [{**moved, "title": "stale copy"}, fresh, unnamed]
+    collections = setup(fake_collections, [moved], embedded)
+
+    assert asyncio.run(db_manager.migrate_scene_pois(SCENE_ID)) == 2
+    titles = {item["poi_id"]: item["title"] for item in collections["pois"].documents}
+    assert titles == {moved["poi_id"]: "moved", fresh["poi_id"]: "fresh"}
+    assert collections["scenes"].pois == [unnamed]
+    assert asyncio.run(db_manager.migrate_scene_pois(SCENE_ID)) == 0
+
+
+def test_scene_view_inlines_the_pois_nearest_the_opening_view(monkeypatch, fake_collections):
+    ahead = [{**poi(f"ahead {i}"), "position": {"x": 0, "y": 0, "z": -3 - i}} for i in range(3)]
+    behind = [{**poi(f"behind {i}"), "position": {"x": 0, "y": 0, "z": 3 + i}} for i in range(3)]
+    fake_collections.update(pois=FakePois(behind + ahead), scene_views=FakeViews())
+    monkeypatch.setattr(settings, "SCENE_POI_INLINE_MAX", 3)
+
+    async def resolve_scene(scene_id):
+        return {"_id": scene_id, "name": "lobby", "links": []}
+
+    monkeypatch.setattr(db_manager, "resolve_scene", resolve_scene)
+
+    view = asyncio.run(db_manager.rebuild_scene_view(SCENE_ID))
+    assert view["poi_count"] == 6
+    assert sorted(item["title"] for item in view["visible_pois"]) == ["ahead 0", "ahead 1", "ahead 2"]
+    assert len(db_manager.poi_indexes.get(SCENE_ID)) == 6
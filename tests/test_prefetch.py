@@ -0,0 +1,55 @@
+import asyncio
+
+from bson.objectid import ObjectId
+
+from app.core.libs.byte_cache import ByteLRUCache
+from app.core.models.database import db_manager
+from app.core.routers import space as space_router
+
+
+def test_prefetch_links_dedupes_targets_and_skips_self():
+    here, other, third = "s0", "s1", "s2"
+    links = [
+        {"target_id": other, "target_placeholder_id": "p1"},
+        {"target_id": here, "target_placeholder_id": "p0"},
+        {"target_id": other, "target_placeholder_id": "p1"},
+        {"target_id": third, "target_placeholder_id": "p2", "target_tiled": True},
+    ]
+    prefetch = space_router._prefetch_links(here, links)
+    assert [link["target_id"] for link in prefetch] == [other, third]
+    assert space_router._prefetch_header(prefetch) == "</asset/image/p1>; rel=prefetch; as=image"
+
+
+def test_scene_images_to_warm_picks_uncached_placeholders_and_levels(monkeypatch):
+    placeholder, cached, small, large, tiled = (ObjectId() for _ in range(5))
+    monkeypatch.setattr(db_manager, "image_cache", ByteLRUCache(100))
+    db_manager.image_cache.put(cached, b"warm")
+    levels = [{"width": 1024, "image_id": small}, {"width": 4096, "image_id": large}]
+    links = [
+        {"target_placeholder_id": placeholder, "target_levels": levels},
+        {"target_placeholder_id": cached, "target_image_id": ObjectId(), "target_levels": None},
+        {"target_placeholder_id": None, "target_levels": [{"width": 8192, "image_id": tiled}], "target_tiled": True},
+    ]
+
+    assert db_manager.scene_images_to_warm(links) == [placeholder, large]
+    assert db_manager.scene_images_to_warm(links, width=1000) == [placeholder, small]
+    db_manager.image_cache.put(placeholder, b"warm")
+    db_manager.image_cache.put(large, b"warm")
+    assert db_manager.scene_images_to_warm(links) == []
+
+
+def test_warm_images_logs_and_skips_failures(monkeypatch, caplog):
+    first, broken, last = ObjectId(), ObjectId(), ObjectId()
+    warmed = []
+
+    async def warm_image(file_id):
+        if file_id == broken:
+            raise RuntimeError("gridfs down")
+        warmed.append(file_id)
+
+    monkeypatch.setattr(db_manager, "warm_image", warm_image)
+
+    asyncio.run(db_manager.warm_images([first, broken, last]))
+
+    assert warmed == [first, last]
+    assert f"image warmup failed for {broken}" in caplog.text
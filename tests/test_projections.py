@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+from app.core.models.database import SCENE_HEADER_FIELDS, SPACE_HEADER_FIELDS, db_manager, space_fields
+from app.core.models.loader import RequestLoader
+from app.core.schemas.space_model import SpaceModel, SpaceSummary
+from tests.conftest import FakeCursor
+
+
+SPACE_ID, USER_ID, OTHER_ID, SCENE_ID = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+
+SPACE = {
+    "_id": SPACE_ID, "name": "museum", "explain": "scan", "creator": USER_ID,
+    "viewers": {str(USER_ID): "Editor", str(OTHER_ID): "Viewer"},
+    "scenes": {str(SCENE_ID): "lobby"},
+}
+SCENE = {"_id": SCENE_ID, "name": "lobby", "links": [], "pois": [{"title": "t"}]}
+
+
+def project(document, projection):
+    '''enough of MongoDB's inclusion projection for these tests'''
+    if projection is None:
+        return dict(document)
+    result = {"_id": document["_id"]}
+    for path in projection:
+        head, _, rest = path.partition(".")
+        if head not in document:
+            continue
+        if rest:
+            nested = result.setdefault(head, {})
+            if rest in document[head]:
+                nested[rest] = document[head][rest]
+        else:
+            result[head] = document[head]
+    return result
+
+
+class FakeCollection:
+    def __init__(self, document):
+        self.document = document
+        self.projections = []
+
+    async def find_one(self, query, projection=None):
+        self.projections.append(projection)
+        return project(self.document, projection) if query["_id"] == self.document["_id"] else None
+
+    def find(self, query, projection=None):
+        self.projections.append(projection)
+        wanted = query["_id"]["$in"]
+        return FakeCursor([project(self.document, projection)] if self.document["_id"] in wanted else [])
+
+
+def setup(fake_collections):
+    fake_collections.update(spaces=FakeCollection(SPACE), scenes=FakeCollection(SCENE))
+    return fake_collections
+
+
+def test_space_fields_project_only_the_callers_role():
+    assert space_fields(USER_ID) == SPACE_HEADER_FIELDS + (f"viewers.{USER_ID}",)
+    assert space_fields(scenes=True)[-1] == "scenes"
+    with pytest.raises(InvalidId):
+        space_fields("$where")
+
+
+def test_get_space_with_fields_returns_summary(fake_collections):
+    collections = setup(fake_collections)
+
+    space = asyncio.run(db_manager.get_space(SPACE_ID, space_fields(USER_ID)))
+    assert isinstance(space, SpaceSummary)
+    assert space.viewers == {str(USER_ID): "Editor"}
+    assert space.scenes is None
+    assert collections["spaces"].projections[-1] == dict.fromkeys(space_fields(USER_ID), 1)
+
+    # no fields keeps the full model
+    assert isinstance(asyncio.run(db_manager.get_space(SPACE_ID)), SpaceModel)
+
+
+def test_get_scenes_from_space_fetches_only_the_scene_map(fake_collections):
+    collections = setup(fake_collections)
+    assert asyncio.run(db_manager.get_scenes_from_space(SPACE_ID)) == [(str(SCENE_ID), "lobby")]
+    assert collections["spaces"].projections == [{"scenes": 1}]
+    assert asyncio.run(db_manager.get_scenes_from_space(ObjectId())) == []
+
+
+def test_get_scene_without_pois(fake_collections):
+    setup(fake_collections)
+    scene = asyncio.run(db_manager.get_scene(SCENE_ID, SCENE_HEADER_FIELDS))
+    assert "pois" not in scene and scene["name"] == "lobby"
+    assert asyncio.run(db_manager.get_scene(SCENE_ID))["pois"] == [{"title": "t"}]
+
+
+def test_request_loader_projects_spaces_for_the_user(fake_collections):
+    collections = setup(fake_collections)
+
+    async def run():
+        loader = RequestLoader(OTHER_ID)
+        return await loader.spaces.load(SPACE_ID), await loader.space_scenes.load(SPACE_ID)
+
+    space, with_scenes = asyncio.run(run())
+    assert space.viewers == {str(OTHER_ID): "Viewer"} and space.scenes is None
+    assert with_scenes.scenes == {str(SCENE_ID): "lobby"}
+    assert "viewers" not in collections["spaces"].projections[0]
@@ -0,0 +1,56 @@
+import asyncio
+
+import motor.motor_asyncio
+from bson.objectid import ObjectId
+
+from app.core.libs.panorama import Derivative
+from app.core.models.database import db_manager
+from tests.conftest import FakeCursor, matches
+
+
+class FakeFiles:
+    '''images.files and the GridFS bucket over it'''
+
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+
+    def bucket(self, db, bucket_name):
+        return self
+
+    async def upload_from_stream(self, filename, source, metadata):
+        self.documents.append({"_id": ObjectId(), "filename": filename, "metadata": metadata})
+        return self.documents[-1]["_id"]
+
+    async def delete(self, file_id):
+        self.documents = [document for document in self.documents if document["_id"] != file_id]
+
+    def find(self, query, projection=None):
+        flat = lambda document: {**document, **{f"metadata.{key}": value
+                                                for key, value in document.get("metadata", {}).items()}}
+        return FakeCursor([document for document in self.documents if matches(flat(document), query)])
+
+    async def update_one(self, query, update):
+        for document in self.documents:
+            if document["_id"] == query["_id"]:
+                document.setdefault("metadata", {})["variants"] = update["$set"]["metadata.variants"]
+
+
+def test_store_pyramid_replaces_the_variants_of_an_earlier_run(monkeypatch, fake_collections):
+    image_id, other = ObjectId(), ObjectId()
+    files = fake_collections["images.files"] = FakeFiles([
+        {"_id": image_id, "metadata": {}},
+        {"_id": ObjectId(), "metadata": {"variant_of": image_id, "kind": "level", "width": 1024}},
+        {"_id": ObjectId(), "metadata": {"variant_of": other, "kind": "level", "width": 1024}},
+    ])
+    monkeypatch.setattr(motor.motor_asyncio, "AsyncIOMotorGridFSBucket", files.bucket)
+    derivatives = [Derivative("level", 1024, 512, b"level"),
+                   Derivative("placeholder", 64, 32, b"blur")]
+
+    for _ in range(2):
+        variants = asyncio.run(db_manager.store_pyramid(image_id, (4096, 2048), derivatives))
+
+    current = {level["image_id"] for level in variants["levels"]} | {variants["placeholder"]["image_id"]}
+    remaining = {document["_id"] for document in files.documents
+                 if document["metadata"].get("variant_of") == image_id}
+    assert remaining == current - {image_id} and len(remaining) == 2
+    assert sum(document["metadata"].get("variant_of") == other for document in files.documents) == 1
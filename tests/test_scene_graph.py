@@ -0,0 +1,44 @@
+from app.core.libs.scene_graph import SceneGraph
+
+
+def make_graph():
+    # a <-> b -> c -> d -> c, e isolated, b also links outside the space
+    return SceneGraph("abcde", {"a": ["b"], "b": ["a", "c", "zz"], "c": ["d"], "d": ["c"]})
+
+
+def test_neighbors_skip_scenes_outside_the_space():
+    graph = make_graph()
+    assert graph.neighbors("b") == ["a", "c"]
+    assert graph.dangling() == {"b": ["zz"]}
+
+
+def test_shortest_path_and_reachability():
+    graph = make_graph()
+    assert graph.shortest_path("a", "d") == ["a", "b", "c", "d"]
+    assert graph.shortest_path("d", "a") is None
+    assert graph.shortest_path("a", "a") == ["a"]
+    assert graph.unreachable("a") == ["e"]
+    assert graph.orphans() == ["e"]
+
+
+def test_strongly_connected_components():
+    components = {frozenset(component) for component in make_graph().strongly_connected_components()}
+    assert components == {frozenset("ab"), frozenset("cd"), frozenset("e")}
+
+
+def test_incremental_updates():
+    graph = make_graph()
+    graph.add_scene("f", ["a"])
+    graph.set_links("e", ["f"])
+    assert graph.shortest_path("e", "d") == ["e", "f", "a", "b", "c", "d"]
+    graph.remove_scene("c")
+    assert graph.neighbors("b") == ["a"]
+    assert graph.neighbors("d") == []
+    assert "c" not in graph.incoming()
+
+
+def test_long_chain_does_not_recurse():
+    nodes = list(range(5000))
+    graph = SceneGraph(nodes, {n: [n + 1] for n in nodes[:-1]})
+    graph.set_links(nodes[-1], [0])
+    assert len(graph.strongly_connected_components()) == 1
@@ -0,0 +1,118 @@
+import asyncio
+
+from bson.objectid import ObjectId
+
+from app.core.models.database import db_manager
+from tests.conftest import FakeCursor, FakeViews
+
+
+def setup(monkeypatch, fake_collections, scene, pois=()):
+    views = fake_collections["scene_views"] = FakeViews()
+
+    async def resolve_scene(scene_id):
+        return scene
+
+    async def get_scene_pois(scene_id, visible=None):
+        return [poi for poi in pois if visible is None or poi.get("visible", True) == visible]
+
+    monkeypatch.setattr(db_manager, "resolve_scene", resolve_scene)
+    monkeypatch.setattr(db_manager, "get_scene_pois", get_scene_pois)
+    return views
+
+
+def test_scene_view_is_built_once_then_read_directly(monkeypatch, fake_collections):
+    scene_id, target = ObjectId(), ObjectId()
+    scene = {
+        "_id": scene_id, "name": "lobby", "image_id": ObjectId(), "status": "ready",
+        "image_variants": {"placeholder": {"image_id": "ph"}},
+        "links": [{"_id": ObjectId(), "target_id": target, "target_name": "hall", "x": 1, "y": 2, "z": 3,
+                   "yaw": 0, "pitch": 0, "roll": 0, "extra": "dropped"}],
+    }
+    pois = [{"title": "shown", "visible": True}, {"title": "hidden", "visible": False}]
+    views = setup(monkeypatch, fake_collections, scene, pois)
+
+    first = asyncio.run(db_manager.get_scene_view(scene_id))
+    second = asyncio.run(db_manager.get_scene_view(scene_id))
+
+    assert first is second
+    assert first["version"] == 1
+    assert first["placeholder_id"] == "ph"
+    assert first["links"][0]["target_name"] == "hall" and "extra" not in first["links"][0]
+    assert [poi["title"] for poi in first["visible_pois"]] == ["shown"]
+    assert first["poi_count"] == 1 and "pois" not in first
+    assert db_manager.poi_indexes.get(scene_id).version == 1
+
+    asyncio.run(db_manager.rebuild_scene_view(scene_id))
+    assert views.documents[scene_id]["version"] == 2
+    assert db_manager.poi_indexes.get(scene_id).version == 2
+
+
+def test_rebuild_drops_view_of_deleted_scene(monkeypatch, fake_collections):
+    scene_id = ObjectId()
+    views = setup(monkeypatch, fake_collections, None)
+    views.documents[scene_id] = {"_id": scene_id}
+
+    assert asyncio.run(db_manager.rebuild_scene_view(scene_id)) is None
+    assert scene_id not in views.documents
+
+
+
+def test_stale_rebuild_does_not_overwrite_a_newer_view(monkeypatch, fake_collections):
+    scene_id = ObjectId()
+    stale = {"_id": scene_id, "name": "old name", "version": 4, "links": []}
+    views = setup(monkeypatch, fake_collections, stale)
+    newer = views.documents[scene_id] = {"_id": scene_id, "name": "new name", "scene_version": 5, "version": 7}
+    db_manager.poi_indexes.discard(scene_id)
+
+    assert asyncio.run(db_manager.rebuild_scene_view(scene_id)) is newer
+    assert views.documents[scene_id] == {"_id": scene_id, "name": "new name", "scene_version": 5, "version": 7}
+    assert db_manager.poi_indexes.get(scene_id) is None
+
+    legacy = views.documents[scene_id] = {"_id": scene_id, "name": "legacy", "version": 2}
+    assert asyncio.run(db_manager.rebuild_scene_view(scene_id))["name"] == "old name"
+    assert legacy["version"] == 3 and legacy["scene_version"] == 4
+
+class FakeScenes:
+    '''aggregate() answers with the document the $lookup pipeline would produce'''
+
+    def __init__(self, document=None):
+        self.document = document
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor([self.document] if self.document else [])
+
+
+def test_resolve_scene_joins_links_and_targets(fake_collections):
+    scene_id, hall, tiled, gone = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    to_hall, to_tiled, to_gone, dangling = (ObjectId() for _ in range(4))
+    document = {
+        "_id": scene_id, "name": "lobby", "links": [to_tiled, dangling, to_hall, to_gone],
+        "link_docs": [{"_id": link_id, "target_id": target}
+                      for link_id, target in ((to_hall, hall), (to_tiled, tiled), (to_gone, gone))],
+        "link_targets": [
+            {"_id": hall, "name": "hall", "image_id": "hall.jpg",
+             "image_variants": {"placeholder": {"image_id": "hall-ph"},
+                                "levels": [{"width": 1024, "image_id": "hall-1k"}]}},
+            {"_id": tiled, "name": "tower", "image_id": "tower.jpg", "image_tiles": {"levels": [1]}},
+        ],
+    }
+    scenes = fake_collections["scenes"] = FakeScenes(document)
+
+    scene = asyncio.run(db_manager.resolve_scene(scene_id))
+
+    assert scenes.pipelines[0][0] == {"$match": {"_id": scene_id}}
+    assert "link_docs" not in scene and "link_targets" not in scene
+    assert [link["_id"] for link in scene["links"]] == [to_tiled, to_hall, to_gone]
+    tower, hall_link, missing = scene["links"]
+    assert (tower["target_name"], tower["target_image_id"], tower["target_placeholder_id"], tower["target_tiled"]) \
+        == ("tower", "tower.jpg", None, True)
+    assert (hall_link["target_name"], hall_link["target_placeholder_id"], hall_link["target_tiled"]) \
+        == ("hall", "hall-ph", False)
+    assert hall_link["target_levels"] == [{"width": 1024, "image_id": "hall-1k"}] and tower["target_levels"] is None
+    assert (missing["target_name"], missing["target_image_id"], missing["target_placeholder_id"]) \
+        == (None, None, None)
+
+    fake_collections["scenes"] = FakeScenes()
+    assert asyncio.run(db_manager.resolve_scene(ObjectId())) is None
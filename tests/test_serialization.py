@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import orjson
+from bson import ObjectId
+
+from app.core.libs.serialization import ORJSONResponse, dumps
+from app.core.schemas.space_model import SpaceModel
+
+
+def test_dumps_mongo_document():
+    oid = ObjectId()
+    body = dumps({'_id': oid, 'links': [oid], 'at': datetime(2024, 1, 2, 3, 4, 5), 'tags': {'a'}})
+    assert orjson.loads(body) == {'_id': str(oid), 'links': [str(oid)], 'at': '2024-01-02T03:04:05', 'tags': ['a']}
+
+
+def test_model_ids_render_as_strings():
+    space_id, creator = ObjectId(), ObjectId()
+    model = SpaceModel(_id=space_id, name='s', explain='e', creator=creator, viewers={}, scenes={})
+    payload = orjson.loads(ORJSONResponse({'space': model}).body)
+    assert payload['space']['_id'] == str(space_id)
+    assert payload['space']['creator'] == str(creator)
+    # python mode keeps the ObjectId for the database layer
+    assert model.model_dump(by_alias=True)['_id'] == space_id
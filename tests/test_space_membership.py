@@ -0,0 +1,49 @@
+import asyncio
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from app.core.models.database import db_manager
+from tests.conftest import FakeCursor
+
+
+class FakeUsers:
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+        self.bulk = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        emails = set(query["email"]["$in"])
+        return FakeCursor([d for d in self.documents if d["email"] in emails])
+
+    async def bulk_write(self, operations, ordered):
+        self.bulk.append(operations)
+
+
+def test_invitees_resolve_in_one_query_and_write_in_one_bulk(fake_collections):
+    creator, alice, bob = ObjectId(), ObjectId(), ObjectId()
+    users = FakeUsers([
+        {"_id": creator, "email": "me@x.io"},
+        {"_id": alice, "email": "alice@x.io"},
+        {"_id": bob, "email": "bob@x.io"},
+    ])
+    fake_collections["users"] = users
+    form = SimpleNamespace(form_data={
+        "username": ["alice@x.io", "ghost@x.io", "me@x.io", "bob@x.io"],
+        "role": ["Viewer", "Editor", "Viewer", "Editor"],
+    })
+
+    async def run():
+        viewers = await db_manager.resolve_viewers(creator, form)
+        await db_manager.write_memberships(ObjectId(), viewers, revoked=[str(ObjectId())])
+        return viewers
+
+    viewers = asyncio.run(run())
+
+    assert len(users.queries) == 1
+    assert viewers == {str(creator): "Editor", str(alice): "Viewer", str(bob): "Editor"}
+    (operations,) = users.bulk
+    assert len(operations) == 4 and all(isinstance(op, UpdateOne) for op in operations)
@@ -29,4 +29,3 @@ def test_ensure_editor_requires_editor_role():
 def test_ensure_editor_allows_editor():
     space = make_space({"user": "Editor"})
     assert space_router._ensure_editor(space, "user") == "Editor"
-
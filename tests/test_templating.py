@@ -0,0 +1,48 @@
+import jinja2
+
+from app.core.libs.templating import create_templates
+from app.core.libs.ttl_cache import TTLCache
+from app.core.routers import page_view, space as space_router
+
+
+def make_templates(tmp_path, source):
+    (tmp_path / "page.html").write_text(source)
+    cache = TTLCache(10, 60)
+    templates = create_templates(tmp_path, fragment_cache=cache, bytecode_cache_dir=str(tmp_path))
+    return templates, cache
+
+
+def test_cache_block_renders_once_per_key(tmp_path):
+    source = "{% cache 'list', version %}{{ render() }}{% endcache %}"
+    templates, cache = make_templates(tmp_path, source)
+    calls = []
+
+    def render():
+        calls.append(1)
+        return "<b>%d</b>" % len(calls)
+
+    template = templates.get_template("page.html")
+    assert template.render(version=1, render=render) == "&lt;b&gt;1&lt;/b&gt;"
+    assert template.render(version=1, render=render) == "&lt;b&gt;1&lt;/b&gt;"
+    # a new version renders again
+    assert template.render(version=2, render=render) == "&lt;b&gt;2&lt;/b&gt;"
+    assert len(calls) == 2 and cache.stats()["hits"] == 1
+
+
+def test_cache_block_skipped_without_version(tmp_path):
+    templates, cache = make_templates(tmp_path, "{% cache 'list', version %}{{ value }}{% endcache %}")
+    template = templates.get_template("page.html")
+    assert template.render(version=None, value="a") == "a"
+    assert template.render(version=None, value="b") == "b"
+    assert cache.stats()["entries"] == 0
+
+
+def test_bytecode_written_to_disk(tmp_path):
+    templates, _ = make_templates(tmp_path, "hello")
+    templates.get_template("page.html")
+    assert list(tmp_path.glob("__jinja2_*.cache"))
+
+
+def test_routers_share_one_environment():
+    assert page_view.templates is space_router.templates
+    assert isinstance(space_router.templates.env.bytecode_cache, (jinja2.FileSystemBytecodeCache, type(None)))